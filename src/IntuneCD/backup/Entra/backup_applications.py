@@ -6,7 +6,7 @@ This module backs up Applications in Entra.
 """
 
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_request import makeapirequest
+from ...intunecdlib.graph_request import iter_graph_items
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
 
@@ -27,19 +27,17 @@ def savebackup(path, output, token):
     results = {"config_count": 0, "outputs": []}
 
     configpath = path + "/" + "Entra/Applications/"
-    data = makeapirequest(ENDPOINT, token)
 
-    if data:
-        for app in data["value"]:
-            results["config_count"] += 1
-            data = remove_keys(app)
-            print(f'Backing up Entra Application {app["displayName"]}')
+    for app in iter_graph_items(ENDPOINT, token):
+        results["config_count"] += 1
+        data = remove_keys(app)
+        print(f'Backing up Entra Application {app["displayName"]}')
 
-            # Get filename without illegal characters
-            fname = clean_filename(app["displayName"])
-            # Save APNs as JSON or YAML depending on configured value in "-o"
-            save_output(output, configpath, fname, data)
+        # Get filename without illegal characters
+        fname = clean_filename(app["displayName"])
+        # Save APNs as JSON or YAML depending on configured value in "-o"
+        save_output(output, configpath, fname, data)
 
-            results["outputs"].append(fname)
+        results["outputs"].append(fname)
 
     return results
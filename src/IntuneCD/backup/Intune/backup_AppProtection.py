@@ -5,10 +5,11 @@
 This module backs up all App Protection Polices in Intune.
 """
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import batch_assignment, get_object_assignment
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
@@ -33,19 +34,16 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     audit_data = None
     configpath = path + "/" + "App Protection/"
     data = makeapirequest(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
 
     assignment_responses = batch_assignment(
         data, "deviceAppManagement/", "/assignments", token, app_protection=True
     )
     if audit:
-        graph_filter = "componentName eq 'ManagedAppProtection'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     # If profile is ManagedAppConfiguration, skip to next
     for profile in data["value"]:
-        if prefix and not check_prefix_match(profile["displayName"], prefix):
-            continue
-
         if profile["@odata.type"] == "#microsoft.graph.targetedManagedAppConfiguration":
             continue
 
@@ -5,8 +5,9 @@
 This module backs up Apple Push Notification setting in Intune.
 """
 
+from ...intunecdlib.audit_index import get_audit_index
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
@@ -32,8 +33,7 @@ def savebackup(path, output, audit, token):
     configpath = path + "/" + "Apple Push Notification/"
     data = makeapirequest(ENDPOINT, token)
     if audit:
-        graph_filter = "resources/any(s:s/auditResourceType eq 'Microsoft.Management.Services.Api.ApplePushNotificationCertificate')"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     if data:
         results["config_count"] += 1
@@ -8,10 +8,15 @@ This module backs up all App Configuration Polices in Intune.
 import base64
 import json
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_batch import batch_assignment, get_object_assignment
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_batch import (
+    batch_assignment,
+    get_object_assignment,
+    resolve_apps,
+)
+from ...intunecdlib.graph_request import makeapirequestWithAssignments
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
@@ -21,7 +26,6 @@ from ...intunecdlib.save_output import save_output
 ENDPOINT = (
     "https://graph.microsoft.com/beta/deviceAppManagement/mobileAppConfigurations"
 )
-APP_ENDPOINT = "https://graph.microsoft.com/beta/deviceAppManagement/mobileApps"
 
 
 # Get all App Configuration policies and save them in specified path
@@ -38,20 +42,25 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     results = {"config_count": 0, "outputs": []}
     audit_data = None
     configpath = path + "/" + "App Configuration/"
-    data = makeapirequest(ENDPOINT, token)
+    data = makeapirequestWithAssignments(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
     if audit:
-        graph_filter = "componentName eq 'MobileAppConfiguration'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     if data["value"]:
         assignment_responses = batch_assignment(
             data, "deviceAppManagement/mobileAppConfigurations/", "/assignments", token
         )
+        apps = resolve_apps(
+            [
+                app_id
+                for profile in data["value"]
+                for app_id in profile.get("targetedMobileApps") or []
+            ],
+            token,
+        )
 
         for profile in data["value"]:
-            if prefix and not check_prefix_match(profile["displayName"], prefix):
-                continue
-
             results["config_count"] += 1
 
             if scope_tags:
@@ -67,7 +76,7 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
             # Get name and type of app on App Configuration Profile
             app_dict = {}
             for app_id in profile["targetedMobileApps"]:
-                app_data = makeapirequest(APP_ENDPOINT + "/" + app_id, token)
+                app_data = apps.get(app_id)
                 if app_data:
                     app_dict["appName"] = app_data["displayName"]
                     app_dict["type"] = app_data["@odata.type"]
@@ -5,10 +5,11 @@
 This module backs up all Apple Enrollment Profiles in Intune.
 """
 
+from ...intunecdlib.audit_index import get_audit_index
 from ...intunecdlib.check_prefix import check_prefix_match
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import batch_request
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
@@ -32,8 +33,7 @@ def savebackup(path, output, token, prefix, append_id, audit):
     configpath = path + "/" + "Enrollment Profiles/Apple/"
     data = makeapirequest(ENDPOINT, token)
     if audit:
-        graph_filter = "componentName eq 'Enrollment'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     if data["value"]:
         profile_ids = []
@@ -7,15 +7,18 @@ This module backs up all App Protection Policies in Intune.
 
 import re
 
+from ...intunecdlib.audit_index import get_audit_index
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import (
     batch_assignment,
     batch_request,
     get_object_assignment,
+    seed_apps,
 )
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequestWithAssignments
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
+from ...intunecdlib.projections import select_query
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
 
@@ -55,27 +58,32 @@ def savebackup(path, output, exclude, token, append_id, audit, scope_tags):
 
     results = {"config_count": 0, "outputs": []}
     audit_data = None
-    data = makeapirequest(ENDPOINT, token, q_param)
+    data = makeapirequestWithAssignments(ENDPOINT, token, q_param)
     assignment_responses = batch_assignment(
         data, "deviceAppManagement/mobileApps/", "/assignments", token
     )
+    # Other modules resolve app names from the apps in this backup
+    seed_apps(data["value"])
     app_ids = [app["id"] for app in data["value"]]
     scope_tag_responses = batch_request(
-        app_ids, "deviceAppManagement/mobileApps/", "?$select=roleScopeTagIds,id", token
+        app_ids,
+        "deviceAppManagement/mobileApps/",
+        select_query("appScopeTags"),
+        token,
     )
+    scope_tag_index = {v["id"]: v for v in scope_tag_responses}
 
     if audit:
-        graph_filter = "componentName eq 'MobileApp'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     for app in data["value"]:
         app_name = ""
         platform = ""
         results["config_count"] += 1
 
-        scope_tag_data = [v for v in scope_tag_responses if app["id"] == v["id"]]
+        scope_tag_data = scope_tag_index.get(app["id"])
         if scope_tag_data:
-            app["roleScopeTagIds"] = scope_tag_data[0]["roleScopeTagIds"]
+            app["roleScopeTagIds"] = scope_tag_data["roleScopeTagIds"]
 
         if scope_tags:
             app = get_scope_tags_name(app, scope_tags)
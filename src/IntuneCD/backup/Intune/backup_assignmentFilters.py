@@ -5,9 +5,10 @@
 This module backs up all Filters in Intune.
 """
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
@@ -31,15 +32,12 @@ def savebackup(path, output, token, prefix, append_id, audit, scope_tags):
     audit_data = None
     configpath = path + "/" + "Filters/"
     data = makeapirequest(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
     if audit:
-        graph_filter = "componentName eq 'AssignmentFilter'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     if data:
         for assign_filter in data["value"]:
-            if prefix and not check_prefix_match(assign_filter["displayName"], prefix):
-                continue
-
             if scope_tags:
                 assign_filter = get_scope_tags_name(assign_filter, scope_tags)
 
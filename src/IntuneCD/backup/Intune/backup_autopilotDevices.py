@@ -6,7 +6,7 @@ This module backs up all Autopilot devices in Intune.
 """
 
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_request import makeapirequest
+from ...intunecdlib.graph_request import iter_graph_items
 from ...intunecdlib.save_output import save_output
 
 # Set MS Graph endpoint
@@ -27,9 +27,8 @@ def savebackup(path, output, token):
 
     print("Backing up Autopilot Devices")
     configpath = path + "/" + "Autopilot Devices/"
-    data = makeapirequest(ENDPOINT, token)
 
-    for device in data["value"]:
+    for device in iter_graph_items(ENDPOINT, token):
         # Get filename without illegal characters
         fname = clean_filename(device["id"])
         # Save Autopilot device as JSON or YAML depending on configured
@@ -5,12 +5,18 @@
 This module backs up all Compliance Polices in Intune.
 """
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_batch import batch_assignment, get_object_assignment
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_batch import (
+    batch_assignment,
+    get_object_assignment,
+    hydrate_collection,
+)
+from ...intunecdlib.graph_request import makeapirequestWithAssignments
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
+from ...intunecdlib.projections import select_query
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
 
@@ -35,19 +41,28 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     q_param = {
         "$expand": "scheduledActionsForRule($expand=scheduledActionConfigurations)"
     }
-    data = makeapirequest(ENDPOINT, token, q_param)
+    data = makeapirequestWithAssignments(ENDPOINT, token, q_param)
+    data = filter_prefix(data, prefix)
 
     assignment_responses = batch_assignment(
         data, "deviceManagement/deviceCompliancePolicies/", "/assignments", token
     )
     if audit:
-        graph_filter = "componentName eq 'DeviceCompliancePolicy'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
+
+    # Get the names of all compliance scripts used by the policies
+    scripts = hydrate_collection(
+        [
+            policy["deviceCompliancePolicyScript"]["deviceComplianceScriptId"]
+            for policy in data["value"]
+            if policy.get("deviceCompliancePolicyScript")
+        ],
+        "deviceManagement/deviceComplianceScripts/{id}"
+        + select_query("complianceScripts"),
+        token,
+    )
 
     for policy in data["value"]:
-        if prefix and not check_prefix_match(policy["displayName"], prefix):
-            continue
-
         results["config_count"] += 1
         print("Backing up compliance policy: " + policy["displayName"])
 
@@ -70,10 +85,8 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
                 remove_keys(scheduled_config)
         if policy.get("deviceCompliancePolicyScript", None):
             # Get the name of the script
-            script_name = makeapirequest(
-                "https://graph.microsoft.com/beta/deviceManagement/deviceComplianceScripts/"
-                + policy["deviceCompliancePolicyScript"]["deviceComplianceScriptId"],
-                token,
+            script_name = scripts.get(
+                policy["deviceCompliancePolicyScript"]["deviceComplianceScriptId"]
             )
             if script_name:
                 policy["deviceComplianceScriptName"] = script_name["displayName"]
@@ -5,12 +5,18 @@
 This module backs up all Compliance Polices in Intune.
 """
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_batch import batch_assignment, get_object_assignment
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_batch import (
+    batch_assignment,
+    get_object_assignment,
+    hydrate_collection,
+)
+from ...intunecdlib.graph_request import makeapirequestWithAssignments
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
+from ...intunecdlib.projections import select_query
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
 
@@ -73,48 +79,53 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     q_param = {
         "$expand": "settings",
     }
-    data = makeapirequest(ENDPOINT, token, q_param)
+    data = makeapirequestWithAssignments(ENDPOINT, token, q_param)
+    data = filter_prefix(data, prefix, "name")
 
     assignment_responses = batch_assignment(
         data, "deviceManagement/compliancePolicies/", "/assignments", token
     )
     if audit:
-        graph_filter = "componentName eq 'DeviceCompliancePolicy'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
-    for policy in data["value"]:
-        if prefix and not check_prefix_match(policy["name"], prefix):
-            continue
+    policies = data["value"]
 
-        # Is the policy a Linux discovery script?
+    # Get the detection script IDs of the Linux discovery scripts
+    detection_script_ids = {}
+    for policy in policies:
         if _check_linux_discovery_script(policy):
-            # Get the detection script ID
             detection_script_id_path = _get_detection_script_id(policy)
             if detection_script_id_path is not None:
-                detection_script_id = _get_value_from_path(
+                detection_script_ids[policy["id"]] = _get_value_from_path(
                     policy, detection_script_id_path
                 )
-                # get the script name
-                detection_script = makeapirequest(
-                    "https://graph.microsoft.com/beta/deviceManagement/reusablePolicySettings/",
-                    token,
-                    {"$filter": f"id eq '{detection_script_id}'"},
-                )
-                if detection_script["value"]:
-                    policy["detectionScriptName"] = detection_script["value"][0][
-                        "displayName"
-                    ]
-                else:
-                    policy["detectionScriptName"] = None
-
-        # get scheduledActionsForRule
-        scheduledActionsForRule = makeapirequest(
-            f"{ENDPOINT}/{policy['id']}/scheduledActionsForRule",
-            token,
-            {"$expand": "scheduledActionConfigurations"},
-        )
 
-        policy["scheduledActionsForRule"] = scheduledActionsForRule["value"]
+    # get the script names and scheduledActionsForRule of all policies
+    detection_scripts = hydrate_collection(
+        list(detection_script_ids.values()),
+        "deviceManagement/reusablePolicySettings/{id}"
+        + select_query("reusablePolicySettingNames"),
+        token,
+    )
+    scheduled_actions = hydrate_collection(
+        policies,
+        "deviceManagement/compliancePolicies/{id}/scheduledActionsForRule"
+        "?$expand=scheduledActionConfigurations",
+        token,
+    )
+
+    for policy in policies:
+        # Is the policy a Linux discovery script?
+        if policy["id"] in detection_script_ids:
+            detection_script = detection_scripts.get(detection_script_ids[policy["id"]])
+            if detection_script:
+                policy["detectionScriptName"] = detection_script["displayName"]
+            else:
+                policy["detectionScriptName"] = None
+
+        policy["scheduledActionsForRule"] = scheduled_actions.get(policy["id"], {}).get(
+            "value", []
+        )
 
         results["config_count"] += 1
         print("Backing up compliance policy: " + policy["name"])
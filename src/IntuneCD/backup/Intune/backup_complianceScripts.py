@@ -6,16 +6,16 @@ This module backs up all Compliance scripts in Intune.
 """
 
 import base64
-import os
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import check_prefix_match, filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import batch_request
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
-from ...intunecdlib.save_output import save_output
+from ...intunecdlib.save_output import save_file, save_output
 
 # Set MS Graph endpoint
 ENDPOINT = "https://graph.microsoft.com/beta/deviceManagement/deviceComplianceScripts/"
@@ -36,6 +36,7 @@ def savebackup(path, output, token, prefix, append_id, audit, scope_tags):
     audit_data = None
     configpath = path + "/" + "Compliance Policies/Scripts/"
     data = makeapirequest(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
     if data["value"]:
         script_ids = []
         for script in data["value"]:
@@ -45,8 +46,7 @@ def savebackup(path, output, token, prefix, append_id, audit, scope_tags):
             script_ids, "deviceManagement/deviceComplianceScripts/", "", token
         )
         if audit:
-            graph_filter = "componentName eq 'DeviceConfiguration'"
-            audit_data = makeAuditRequest(graph_filter, token)
+            audit_data = get_audit_index(token)
 
         for script_data in script_data_responses:
             if prefix and not check_prefix_match(script_data["displayName"], prefix):
@@ -84,16 +84,9 @@ def savebackup(path, output, token, prefix, append_id, audit, scope_tags):
 
             # Save Compliance script data to the script data folder
             if script_data.get("detectionScriptContent"):
-                if not os.path.exists(configpath + "Script Data/"):
-                    os.makedirs(configpath + "Script Data/")
                 decoded = base64.b64decode(
                     script_data["detectionScriptContent"]
                 ).decode("utf-8")
-                f = open(
-                    configpath + "Script Data/" + script_file_name,
-                    "w",
-                    encoding="utf-8",
-                )
-                f.write(decoded)
+                save_file(configpath + "Script Data/" + script_file_name, decoded)
 
     return results
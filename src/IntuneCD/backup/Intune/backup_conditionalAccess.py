@@ -7,7 +7,9 @@ This module backs up all Conditional Access in Intune.
 
 from ...intunecdlib.check_prefix import check_prefix_match
 from ...intunecdlib.clean_filename import clean_filename
+from ...intunecdlib.graph_batch import hydrate_collection
 from ...intunecdlib.graph_request import makeapirequest
+from ...intunecdlib.projections import select_param
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
 
@@ -27,17 +29,26 @@ def savebackup(path, output, token, prefix, append_id):
 
     results = {"config_count": 0, "outputs": []}
     configpath = path + "/" + "Conditional Access/"
-    data = makeapirequest(ENDPOINT, token)
+    data = makeapirequest(ENDPOINT, token, select_param("conditionalAccessList"))
 
     if data["value"]:
-        for policy in data["value"]:
-            if prefix and not check_prefix_match(policy["displayName"], prefix):
+        policies = [
+            policy
+            for policy in data["value"]
+            if not prefix or check_prefix_match(policy["displayName"], prefix)
+        ]
+        # Get the full policies, the list response does not include all settings
+        hydrated = hydrate_collection(
+            policies, "identity/conditionalAccess/policies/{id}", token
+        )
+
+        for policy in policies:
+            policy = hydrated.get(policy["id"])
+            if not policy:
                 continue
 
             results["config_count"] += 1
             print("Backing up Conditional Access policy: " + policy["displayName"])
-
-            policy = makeapirequest(f"{ENDPOINT}/{policy['id']}", token)
             if policy["grantControls"]:
                 policy["grantControls"].pop(
                     "authenticationStrength@odata.context", None
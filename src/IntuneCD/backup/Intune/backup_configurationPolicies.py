@@ -5,7 +5,8 @@
 This module backs up all Configuration Policies in Intune.
 """
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import (
     batch_assignment,
@@ -13,7 +14,8 @@ from ...intunecdlib.graph_batch import (
     get_object_assignment,
     get_object_details,
 )
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequestWithAssignments
+from ...intunecdlib.incremental import get_backup_state
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
@@ -37,10 +39,20 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     results = {"config_count": 0, "outputs": []}
     audit_data = None
     configpath = path + "/" + "Settings Catalog/"
-    policies = makeapirequest(BASE_ENDPOINT + "/configurationPolicies", token)
+    policies = makeapirequestWithAssignments(
+        BASE_ENDPOINT + "/configurationPolicies", token
+    )
+    policies = filter_prefix(policies, prefix, "name")
+    state = get_backup_state()
+    unchanged = {}
     policy_ids = []
     for policy in policies["value"]:
-        policy_ids.append(policy["id"])
+        saved = state.get_unchanged("configurationPolicies", policy) if state else None
+        # The settings of unchanged policies are taken from the last backup
+        if saved is not None:
+            unchanged[policy["id"]] = saved
+        else:
+            policy_ids.append(policy["id"])
 
     assignment_responses = batch_assignment(
         policies, "deviceManagement/configurationPolicies/", "/assignments", token
@@ -52,18 +64,17 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
         token,
     )
     if audit:
-        graph_filter = "componentName eq 'DeviceConfiguration'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     for policy in policies["value"]:
-        if prefix and not check_prefix_match(policy["name"], prefix):
-            continue
-
         results["config_count"] += 1
         name = policy["name"]
         print("Backing up configuration policy: " + name)
 
-        settings = get_object_details(policy["id"], policy_settings_batch)
+        if policy["id"] in unchanged:
+            settings = unchanged[policy["id"]].get("settings")
+        else:
+            settings = get_object_details(policy["id"], policy_settings_batch)
 
         if settings:
             policy["settings"] = settings
@@ -77,6 +88,7 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
                 policy["assignments"] = assignments
 
         graph_id = policy["id"]
+        last_modified = policy.get("lastModifiedDateTime")
         policy = remove_keys(policy)
 
         # Get filename without illegal characters
@@ -88,7 +100,13 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
             fname = f"{fname}__{graph_id}"
         # Save Configuration Policy as JSON or YAML depending on configured
         # value in "-o"
-        save_output(output, configpath, fname, policy)
+        file = f"{configpath}{fname}.{output}"
+        if not state or not state.is_current(
+            "configurationPolicies", graph_id, file, policy
+        ):
+            save_output(output, configpath, fname, policy)
+        if state:
+            state.record("configurationPolicies", graph_id, last_modified, file, policy)
 
         results["outputs"].append(fname)
 
@@ -6,20 +6,20 @@ This module backs up all Custom Attribute Shell scripts in Intune.
 """
 
 import base64
-import os
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import check_prefix_match, filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import (
     batch_assignment,
     batch_request,
     get_object_assignment,
 )
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
-from ...intunecdlib.save_output import save_output
+from ...intunecdlib.save_output import save_file, save_output
 
 # Set MS Graph endpoint
 ENDPOINT = "https://graph.microsoft.com/beta/deviceManagement/deviceCustomAttributeShellScripts/"
@@ -43,6 +43,7 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     audit_data = None
     configpath = path + "/" + "Custom Attributes/"
     data = makeapirequest(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
     script_ids = []
     for script in data["value"]:
         script_ids.append(script["id"])
@@ -57,8 +58,7 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
         script_ids, "deviceManagement/deviceCustomAttributeShellScripts/", "", token
     )
     if audit:
-        graph_filter = "componentName eq 'DeviceConfiguration'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     for script_data in script_data_responses:
         if prefix and not check_prefix_match(script_data["displayName"], prefix):
@@ -93,11 +93,8 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
         results["outputs"].append(fname)
 
         # Save Shell script data to the script data folder
-        if not os.path.exists(configpath + "Script Data/"):
-            os.makedirs(configpath + "Script Data/")
         decoded = base64.b64decode(script_data["scriptContent"]).decode("utf-8")
-        f = open(configpath + "Script Data/" + script_file_name, "w", encoding="utf-8")
-        f.write(decoded)
+        save_file(configpath + "Script Data/" + script_file_name, decoded)
 
         if audit_data:
             compare_data = {"type": "resourceId", "value": graph_id}
@@ -5,9 +5,13 @@
 This module backs up all Windows Enrollment Status Page profiles.
 """
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.check_prefix import filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_batch import batch_assignment, get_object_assignment
+from ...intunecdlib.graph_batch import (
+    batch_assignment,
+    get_object_assignment,
+    resolve_apps,
+)
 from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
@@ -17,7 +21,6 @@ from ...intunecdlib.save_output import save_output
 ENDPOINT = (
     "https://graph.microsoft.com/beta/deviceManagement/deviceEnrollmentConfigurations"
 )
-APP_ENDPOINT = "https://graph.microsoft.com/beta/deviceAppManagement/mobileApps"
 
 
 # Get all Windows Enrollment Status Page profiles and save them in specified path
@@ -34,15 +37,21 @@ def savebackup(path, output, exclude, token, prefix, append_id, scope_tags):
     results = {"config_count": 0, "outputs": []}
     configpath = path + "/" + "Enrollment Profiles/Windows/ESP/"
     data = makeapirequest(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
 
     assignment_responses = batch_assignment(
         data, "deviceManagement/deviceEnrollmentConfigurations/", "/assignments", token
     )
+    apps = resolve_apps(
+        [
+            app_id
+            for profile in data["value"]
+            for app_id in profile.get("selectedMobileAppIds") or []
+        ],
+        token,
+    )
 
     for profile in data["value"]:
-        if prefix and not check_prefix_match(profile["displayName"], prefix):
-            continue
-
         if (
             profile["@odata.type"]
             == "#microsoft.graph.windows10EnrollmentCompletionPageConfiguration"
@@ -64,7 +73,7 @@ def savebackup(path, output, exclude, token, prefix, append_id, scope_tags):
                 app_ids = profile["selectedMobileAppIds"]
                 app_names = []
                 for app_id in app_ids:
-                    app_data = makeapirequest(APP_ENDPOINT + "/" + app_id, token)
+                    app_data = apps.get(app_id)
                     if app_data:
                         app = {
                             "name": app_data["displayName"],
@@ -5,10 +5,17 @@
 This module backs up Group Policy Configurations in Intune.
 """
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_batch import batch_assignment, get_object_assignment
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_batch import (
+    batch_assignment,
+    batch_request,
+    get_object_assignment,
+    get_object_details,
+)
+from ...intunecdlib.graph_request import makeapirequestWithAssignments
+from ...intunecdlib.incremental import get_backup_state
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
@@ -32,36 +39,61 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     results = {"config_count": 0, "outputs": []}
     audit_data = None
     configpath = path + "/" + "Group Policy Configurations/"
-    data = makeapirequest(ENDPOINT, token)
+    data = makeapirequestWithAssignments(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
 
     assignment_responses = batch_assignment(
         data, "deviceManagement/groupPolicyConfigurations/", "/assignments", token
     )
     if audit:
-        graph_filter = "componentName eq 'DeviceConfiguration'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
+
+    profiles = data["value"]
+    state = get_backup_state()
+    unchanged = {}
+    if state:
+        for profile in profiles:
+            saved = state.get_unchanged("groupPolicyConfigurations", profile)
+            if saved is not None:
+                unchanged[profile["id"]] = saved
+    changed = [profile for profile in profiles if profile["id"] not in unchanged]
+
+    # Get definitions for all changed profiles, then the presentations for all definitions
+    definition_responses = batch_request(
+        [profile["id"] for profile in changed],
+        "deviceManagement/groupPolicyConfigurations/",
+        "/definitionValues?$expand=definition",
+        token,
+    )
+    for profile in changed:
+        profile["definitionValues"] = get_object_details(
+            profile["id"], definition_responses
+        )
 
-    for profile in data["value"]:
-        if prefix and not check_prefix_match(profile["displayName"], prefix):
-            continue
+    presentation_responses = batch_request(
+        [
+            f"{profile['id']}/definitionValues/{definition['id']}"
+            for profile in changed
+            for definition in profile["definitionValues"]
+        ],
+        "deviceManagement/groupPolicyConfigurations/",
+        "/presentationValues?$expand=presentation",
+        token,
+    )
 
+    for profile in profiles:
         results["config_count"] += 1
-        definition_endpoint = (
-            f"{ENDPOINT}/{profile['id']}/definitionValues?$expand=definition"
-        )
-        # Get definitions
-        definitions = makeapirequest(definition_endpoint, token)
-
-        if definitions:
-            profile["definitionValues"] = definitions["value"]
 
+        # The definitions of unchanged profiles are taken from the last backup
+        if profile["id"] in unchanged:
+            profile["definitionValues"] = unchanged[profile["id"]].get(
+                "definitionValues", []
+            )
+        else:
             for definition in profile["definitionValues"]:
-                presentation_endpoint = (
-                    f"{ENDPOINT}/{profile['id']}/definitionValues/{definition['id']}/"
-                    f"presentationValues?$expand=presentation "
+                definition["presentationValues"] = get_object_details(
+                    definition["id"], presentation_responses
                 )
-                presentation = makeapirequest(presentation_endpoint, token)
-                definition["presentationValues"] = presentation["value"]
 
         if scope_tags:
             profile = get_scope_tags_name(profile, scope_tags)
@@ -72,6 +104,7 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
                 profile["assignments"] = assignments
 
         graph_id = profile["id"]
+        last_modified = profile.get("lastModifiedDateTime")
         profile = remove_keys(profile)
 
         print("Backing up profile: " + profile["displayName"])
@@ -81,7 +114,15 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
         if append_id:
             fname = f"{fname}__{graph_id}"
 
-        save_output(output, configpath, fname, profile)
+        file = f"{configpath}{fname}.{output}"
+        if not state or not state.is_current(
+            "groupPolicyConfigurations", graph_id, file, profile
+        ):
+            save_output(output, configpath, fname, profile)
+        if state:
+            state.record(
+                "groupPolicyConfigurations", graph_id, last_modified, file, profile
+            )
 
         results["outputs"].append(fname)
 
@@ -5,14 +5,16 @@
 This module backs up all Intents in Intune.
 """
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import check_prefix_match, filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import (
     batch_assignment,
     batch_intents,
     get_object_assignment,
 )
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
+from ...intunecdlib.incremental import get_backup_state
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.save_output import save_output
@@ -37,15 +39,47 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     audit_data = None
     configpath = path + "/" + "Management Intents/"
     intents = makeapirequest(BASE_ENDPOINT + "/intents", token)
+    intents = filter_prefix(intents, prefix)
     templates = makeapirequest(TEMPLATE_ENDPOINT, token)
 
     assignment_responses = batch_assignment(
         intents, "deviceManagement/intents/", "/assignments", token
     )
-    intent_responses = batch_intents(intents, token)
+    state = get_backup_state()
+    unchanged = {}
+    last_modified = {
+        intent["id"]: intent.get("lastModifiedDateTime") for intent in intents["value"]
+    }
+    if state:
+        for intent in intents["value"]:
+            saved = state.get_unchanged("managementIntents", intent)
+            if saved is not None:
+                unchanged[intent["id"]] = saved
+
+    intent_responses = batch_intents(
+        {"value": [i for i in intents["value"] if i["id"] not in unchanged]}, token
+    )
+    # The settings of unchanged Intents are taken from the last backup
+    if unchanged:
+        changed_values = {value["id"]: value for value in intent_responses["value"]}
+        intent_responses["value"] = [
+            (
+                {
+                    "id": intent["id"],
+                    "displayName": intent["displayName"],
+                    "description": intent["description"],
+                    "templateId": intent["templateId"],
+                    "settingsDelta": unchanged[intent["id"]]["settingsDelta"],
+                    "roleScopeTagIds": intent["roleScopeTagIds"],
+                }
+                if intent["id"] in unchanged
+                else changed_values[intent["id"]]
+            )
+            for intent in intents["value"]
+            if intent["id"] in unchanged or intent["id"] in changed_values
+        ]
     if audit:
-        graph_filter = "componentName eq 'DeviceIntent'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     if intent_responses:
         for intent_value in intent_responses["value"]:
@@ -81,7 +115,19 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
             if append_id:
                 fname = f"{fname}__{graph_id}"
             # Save Intent as JSON or YAML depending on configured value in "-o"
-            save_output(output, configpath, fname, intent_value)
+            file = f"{configpath}{fname}.{output}"
+            if not state or not state.is_current(
+                "managementIntents", graph_id, file, intent_value
+            ):
+                save_output(output, configpath, fname, intent_value)
+            if state:
+                state.record(
+                    "managementIntents",
+                    graph_id,
+                    last_modified.get(graph_id),
+                    file,
+                    intent_value,
+                )
 
             results["outputs"].append(fname)
 
@@ -5,11 +5,14 @@
 This module backs up all Notification Templates in Intune.
 """
 
+from ...intunecdlib.audit_index import get_audit_index
 from ...intunecdlib.check_prefix import check_prefix_match
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_batch import hydrate_collection
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
+from ...intunecdlib.projections import select_param
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
 
@@ -32,23 +35,30 @@ def savebackup(path, output, token, prefix, append_id, audit, scope_tags):
     results = {"config_count": 0, "outputs": []}
     audit_data = None
     configpath = path + "/" + "Compliance Policies/Message Templates/"
-    q_param = "?$expand=localizedNotificationMessages"
-    data = makeapirequest(ENDPOINT, token, q_param)
+    data = makeapirequest(ENDPOINT, token, select_param("notificationTemplateList"))
     if audit:
-        graph_filter = "componentName eq 'NotificationMessageTemplate'"
-        audit_data = makeAuditRequest(graph_filter, token)
-
-    for template in data["value"]:
-        if prefix and not check_prefix_match(template["displayName"], prefix):
-            continue
-
-        if template["displayName"] == "EnrollmentNotificationInternalMEO":
+        audit_data = get_audit_index(token)
+
+    templates = [
+        template
+        for template in data["value"]
+        if (not prefix or check_prefix_match(template["displayName"], prefix))
+        and template["displayName"] != "EnrollmentNotificationInternalMEO"
+    ]
+    template_responses = hydrate_collection(
+        templates,
+        "deviceManagement/notificationMessageTemplates/{id}"
+        "?$expand=localizedNotificationMessages",
+        token,
+    )
+
+    for template in templates:
+        template_data = template_responses.get(template["id"])
+        if not template_data:
             continue
 
         results["config_count"] += 1
         print("Backing up Notification message template: " + template["displayName"])
-        q_param = "?$expand=localizedNotificationMessages"
-        template_data = makeapirequest(ENDPOINT + "/" + template["id"], token, q_param)
 
         if scope_tags:
             template_data = get_scope_tags_name(template_data, scope_tags)
@@ -6,20 +6,20 @@ This module backs up all Powershell scripts in Intune.
 """
 
 import base64
-import os
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import check_prefix_match, filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import (
     batch_assignment,
     batch_request,
     get_object_assignment,
 )
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequestWithAssignments
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
-from ...intunecdlib.save_output import save_output
+from ...intunecdlib.save_output import save_file, save_output
 
 # Set MS Graph endpoint
 ENDPOINT = "https://graph.microsoft.com/beta/deviceManagement/deviceManagementScripts/"
@@ -39,7 +39,8 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     results = {"config_count": 0, "outputs": []}
     audit_data = None
     configpath = path + "/" + "Scripts/Powershell/"
-    data = makeapirequest(ENDPOINT, token)
+    data = makeapirequestWithAssignments(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
     if data["value"]:
         script_ids = []
         for script in data["value"]:
@@ -52,8 +53,7 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
             script_ids, "deviceManagement/deviceManagementScripts/", "", token
         )
         if audit:
-            graph_filter = "componentName eq 'DeviceConfiguration'"
-            audit_data = makeAuditRequest(graph_filter, token)
+            audit_data = get_audit_index(token)
 
         for script_data in script_data_responses:
             if prefix and not check_prefix_match(script_data["displayName"], prefix):
@@ -96,14 +96,7 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
 
             # Save Powershell script data to the script data folder
             if script_data.get("scriptContent"):
-                if not os.path.exists(configpath + "Script Data/"):
-                    os.makedirs(configpath + "Script Data/")
                 decoded = base64.b64decode(script_data["scriptContent"]).decode("utf-8")
-                f = open(
-                    configpath + "Script Data/" + script_file_name,
-                    "w",
-                    encoding="utf-8",
-                )
-                f.write(decoded)
+                save_file(configpath + "Script Data/" + script_file_name, decoded)
 
     return results
@@ -6,20 +6,20 @@ This module backs up all Proactive Remediation in Intune.
 """
 
 import base64
-import os
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import check_prefix_match, filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import (
     batch_assignment,
     batch_request,
     get_object_assignment,
 )
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequestWithAssignments
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
-from ...intunecdlib.save_output import save_output
+from ...intunecdlib.save_output import save_file, save_output
 
 # Set MS Graph endpoint
 ENDPOINT = "https://graph.microsoft.com/beta/deviceManagement/deviceHealthScripts"
@@ -39,10 +39,10 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
     results = {"config_count": 0, "outputs": []}
     audit_data = None
     configpath = f"{path}/Proactive Remediations/"
-    data = makeapirequest(ENDPOINT, token)
+    data = makeapirequestWithAssignments(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
     if audit:
-        graph_filter = "componentName eq 'DeviceConfiguration'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     if data["value"]:
         pr_ids = []
@@ -94,9 +94,6 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
                         audit_data, compare_data, path, f"{configpath}{fname}.{output}"
                     )
 
-                if not os.path.exists(f"{configpath}/Script Data"):
-                    os.makedirs(f"{configpath}/Script Data")
-
                 # Save detection script to the Script Data folder
                 results["config_count"] += 1
                 fname = clean_filename(pr_details["displayName"])
@@ -107,22 +104,18 @@ def savebackup(path, output, exclude, token, prefix, append_id, audit, scope_tag
                 decoded = base64.b64decode(pr_details["detectionScriptContent"]).decode(
                     "utf-8"
                 )
-                f = open(
+                save_file(
                     f"{configpath}/Script Data/{fname}_DetectionScript{fname_id}.ps1",
-                    "w",
-                    encoding="utf-8",
+                    decoded,
                 )
-                f.write(decoded)
                 # Save remediation script to the Script Data folder
                 results["config_count"] += 1
                 decoded = base64.b64decode(
                     pr_details["remediationScriptContent"]
                 ).decode("utf-8")
-                f = open(
+                save_file(
                     f"{configpath}/Script Data/{fname}_RemediationScript{fname_id}.ps1",
-                    "w",
-                    encoding="utf-8",
+                    decoded,
                 )
-                f.write(decoded)
 
     return results
@@ -6,16 +6,20 @@ This module backs up Device Configurations in Intune.
 """
 
 import base64
-import os
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_batch import batch_assignment, get_object_assignment
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_batch import (
+    batch_assignment,
+    batch_oma_settings,
+    get_object_assignment,
+)
+from ...intunecdlib.graph_request import makeapirequestWithAssignments
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
-from ...intunecdlib.save_output import save_output
+from ...intunecdlib.save_output import save_file, save_output
 
 # Set MS Graph endpoint
 ENDPOINT = "https://graph.microsoft.com/beta/deviceManagement/deviceConfigurations"
@@ -45,19 +49,29 @@ def savebackup(
     results = {"config_count": 0, "outputs": []}
     audit_data = None
     configpath = path + "/" + "Device Configurations/"
-    data = makeapirequest(ENDPOINT, token)
+    data = makeapirequestWithAssignments(ENDPOINT, token)
+    data = filter_prefix(data, prefix)
 
     assignment_responses = batch_assignment(
         data, "deviceManagement/deviceConfigurations/", "/assignments", token
     )
     if audit:
-        graph_filter = "componentName eq 'DeviceConfiguration'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
+
+    # Get the plain text values of all encrypted OMA settings in one batch
+    oma_values = {}
+    if not ignore_omasettings:
+        oma_values = batch_oma_settings(
+            [
+                profile
+                for profile in data["value"]
+                if profile["@odata.type"]
+                == "#microsoft.graph.windows10CustomConfiguration"
+            ],
+            token,
+        )
 
     for profile in data["value"]:
-        if prefix and not check_prefix_match(profile["displayName"], prefix):
-            continue
-
         results["config_count"] += 1
 
         if scope_tags:
@@ -86,16 +100,12 @@ def savebackup(
         ):
             decoded = base64.b64decode(profile["payload"]).decode("utf-8")
 
-            if not os.path.exists(configpath + "/" + "mobileconfig/"):
-                os.makedirs(configpath + "/" + "mobileconfig/")
             # Save decoded payload as .mobileconfig
             results["config_count"] += 1
-            f = open(
+            save_file(
                 configpath + "/" + "mobileconfig/" + profile["payloadFileName"],
-                "w",
-                encoding="utf-8",
+                decoded,
             )
-            f.write(decoded)
             # Save Device Configuration as JSON or YAML depending on configured
             # value in "-o"
             save_output(output, configpath, fname, profile)
@@ -126,16 +136,9 @@ def savebackup(
                         decoded_oma["omaUri"] = setting["omaUri"]
                         decoded_oma["isEncrypted"] = False
                         decoded_oma["secretReferenceValueId"] = None
-                        oma_value = makeapirequest(
-                            ENDPOINT
-                            + "/"
-                            + pid
-                            + "/getOmaSettingPlainTextValue(secretReferenceValueId='"
-                            + setting["secretReferenceValueId"]
-                            + "')",
-                            token,
+                        decoded_oma["value"] = oma_values.get(
+                            (pid, setting["secretReferenceValueId"])
                         )
-                        decoded_oma["value"] = oma_value
                         omas.append(decoded_oma)
                     else:
                         omas.append(setting)
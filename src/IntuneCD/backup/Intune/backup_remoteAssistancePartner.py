@@ -5,8 +5,9 @@
 This module backs up all Remote Assistance Partners in Intune.
 """
 
+from ...intunecdlib.audit_index import get_audit_index
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
@@ -30,8 +31,7 @@ def savebackup(path, output, token, append_id, audit):
     configpath = path + "/" + "Partner Connections/Remote Assistance/"
     data = makeapirequest(ENDPOINT, token)
     if audit:
-        graph_filter = "componentName eq 'ManagedDevices'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     for partner in data["value"]:
         if partner["onboardingStatus"] == "notOnboarded":
@@ -6,15 +6,17 @@ This module backs up all Compliance scripts in Intune.
 """
 
 import base64
-import os
 
-from ...intunecdlib.check_prefix import check_prefix_match
+from ...intunecdlib.audit_index import get_audit_index
+from ...intunecdlib.check_prefix import check_prefix_match, filter_prefix
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_batch import hydrate_collection
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
+from ...intunecdlib.projections import select_param, select_query
 from ...intunecdlib.remove_keys import remove_keys
-from ...intunecdlib.save_output import save_output
+from ...intunecdlib.save_output import save_file, save_output
 
 # Set MS Graph endpoint
 ENDPOINT = "https://graph.microsoft.com/beta/deviceManagement/reusablePolicySettings/"
@@ -34,17 +36,18 @@ def savebackup(path, output, token, prefix, append_id, audit, scope_tags):
     results = {"config_count": 0, "outputs": []}
     audit_data = None
     configpath = path + "/" + "Compliance Policies/Scripts/"
-    data = makeapirequest(ENDPOINT, token)
+    data = makeapirequest(ENDPOINT, token, select_param("reusablePolicySettingList"))
+    data = filter_prefix(data, prefix)
     if data["value"]:
         if audit:
-            graph_filter = "componentName eq 'DeviceConfiguration'"
-            audit_data = makeAuditRequest(graph_filter, token)
-        for policy in data["value"]:
-            q_param = {
-                "$select": "id,settinginstance,displayname,description,settingDefinitionId,version"
-            }
-            policy = makeapirequest(f"{ENDPOINT}/{policy['id']}", token, q_param)
-
+            audit_data = get_audit_index(token)
+        policies = hydrate_collection(
+            data,
+            "deviceManagement/reusablePolicySettings/{id}"
+            + select_query("reusablePolicySettings"),
+            token,
+        )
+        for policy in policies.values():
             if (
                 policy.get("settingDefinitionId")
                 != "linux_customcompliance_discoveryscript_reusablesetting"
@@ -86,16 +89,9 @@ def savebackup(path, output, token, prefix, append_id, audit, scope_tags):
 
             # Save Compliance script data to the script data folder
             if script_data.get("settingInstance").get("simpleSettingValue"):
-                if not os.path.exists(configpath + "Script Data/"):
-                    os.makedirs(configpath + "Script Data/")
                 decoded = base64.b64decode(
                     script_data["settingInstance"]["simpleSettingValue"]["value"]
                 ).decode("utf-8")
-                f = open(
-                    configpath + "Script Data/" + script_file_name,
-                    "w",
-                    encoding="utf-8",
-                )
-                f.write(decoded)
+                save_file(configpath + "Script Data/" + script_file_name, decoded)
 
     return results
@@ -5,8 +5,10 @@
 This module backs up all Roles in Intune.
 """
 
+from ...intunecdlib.audit_index import get_audit_index
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_batch import batch_request, get_object_details, resolve_groups
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
@@ -26,28 +28,16 @@ def savebackup(path, output, exclude, token, append_id, audit, scope_tags):
     :param token: Token to use for authenticating the request
     """
 
-    def _get_group_names(obj):
+    def _get_group_names(obj, groups):
         """
-        This function gets the group name from the object.
+        This function gets the group names for the group IDs.
 
-        :param object: The object to get the group name from.
-        :return: The group name.
+        :param obj: The group IDs to get the names for.
+        :param groups: The resolved groups keyed by ID.
+        :return: The group names.
         """
 
-        groups = []
-
-        for group in obj:
-            group_name = makeapirequest(
-                f"https://graph.microsoft.com/beta/groups/{group}",
-                token,
-                "?$select=displayName",
-            )
-
-            if group_name:
-                group_name = group_name["displayName"]
-                groups.append(group_name)
-
-        return groups
+        return [groups[group]["displayName"] for group in obj if group in groups]
 
     results = {"config_count": 0, "outputs": []}
     audit_data = None
@@ -55,8 +45,47 @@ def savebackup(path, output, exclude, token, append_id, audit, scope_tags):
     q_param = {"$filter": "isBuiltIn eq false"}
     data = makeapirequest(ENDPOINT, token, q_param)
     if audit:
-        graph_filter = "componentName eq 'RoleBasedAccessControl'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
+
+    role_assignment_ids = {}
+    role_assignments = {}
+    groups = {}
+    if "assignments" not in exclude and data["value"]:
+        # Get the assignments of all roles, then the details of all assignments
+        assignment_responses = batch_request(
+            [role["id"] for role in data["value"]],
+            "deviceManagement/roleDefinitions/",
+            "/roleAssignments",
+            token,
+        )
+        role_assignment_ids = {
+            role["id"]: [
+                assignment["id"]
+                for assignment in get_object_details(role["id"], assignment_responses)
+            ]
+            for role in data["value"]
+        }
+        role_assignments = {
+            assignment["id"]: assignment
+            for assignment in batch_request(
+                [i for ids in role_assignment_ids.values() for i in ids],
+                "deviceManagement/roleAssignments/",
+                "",
+                token,
+            )
+            if assignment
+        }
+
+        # Resolve all scope members and members at once, each group is only requested once
+        groups = resolve_groups(
+            [
+                group
+                for assignment in role_assignments.values()
+                for key in ("scopeMembers", "members")
+                for group in assignment.get(key) or []
+            ],
+            token,
+        )
 
     for role in data["value"]:
         results["config_count"] += 1
@@ -65,39 +94,29 @@ def savebackup(path, output, exclude, token, append_id, audit, scope_tags):
         if scope_tags:
             role = get_scope_tags_name(role, scope_tags)
         if "assignments" not in exclude:
-            assignments = makeapirequest(
-                ENDPOINT + f"/{role['id']}/roleAssignments", token
-            )
-
-            if assignments["value"]:
-                role["roleAssignments"] = []
-                for assignment in assignments["value"]:
-                    role_assignment = makeapirequest(
-                        f"https://graph.microsoft.com/beta/deviceManagement/roleAssignments/{assignment['id']}",
-                        token,
-                    )
+            assignments = [
+                role_assignments[assignment_id]
+                for assignment_id in role_assignment_ids.get(role["id"], [])
+                if assignment_id in role_assignments
+            ]
 
-                role["roleAssignments"].append(role_assignment)
+            if assignments:
+                role["roleAssignments"] = assignments
 
-                # Get the scopeMembers and resourceScopes ids
-                scope_member_names = ""
-                member_names = ""
+                # Replace the scopeMembers and members ids with the group names
                 for assignment in role["roleAssignments"]:
                     remove_keys(assignment)
                     if assignment.get("scopeMembers"):
                         scope_member_names = _get_group_names(
-                            assignment["scopeMembers"]
+                            assignment["scopeMembers"], groups
                         )
-
-                    if scope_member_names:
-                        assignment["scopeMembers"] = scope_member_names
+                        if scope_member_names:
+                            assignment["scopeMembers"] = scope_member_names
                     assignment.pop("resourceScopes", None)
 
-                    for assignment in role["roleAssignments"]:
-                        if assignment.get("members"):
-                            member_names = _get_group_names(assignment["members"])
-
-                    assignment["members"] = member_names
+                    assignment["members"] = _get_group_names(
+                        assignment.get("members") or [], groups
+                    )
 
         graph_id = role["id"]
         role = remove_keys(role)
@@ -5,9 +5,10 @@
 This module backs up Scope Tags in Intune.
 """
 
+from ...intunecdlib.audit_index import get_audit_index
 from ...intunecdlib.clean_filename import clean_filename
 from ...intunecdlib.graph_batch import batch_assignment, get_object_assignment
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.remove_keys import remove_keys
 from ...intunecdlib.save_output import save_output
@@ -35,8 +36,7 @@ def savebackup(path, output, exclude, token, append_id, audit):
         data, "deviceManagement/roleScopeTags/", "/assignments", token
     )
     if audit:
-        graph_filter = "componentName eq 'RoleBasedAccessControl'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     for tag in data["value"]:
         results["config_count"] += 1
@@ -5,8 +5,9 @@
 This module backs up all VPP tokens in Intune.
 """
 
+from ...intunecdlib.audit_index import get_audit_index
 from ...intunecdlib.clean_filename import clean_filename
-from ...intunecdlib.graph_request import makeapirequest, makeAuditRequest
+from ...intunecdlib.graph_request import makeapirequest
 from ...intunecdlib.process_audit_data import process_audit_data
 from ...intunecdlib.process_scope_tags import get_scope_tags_name
 from ...intunecdlib.remove_keys import remove_keys
@@ -31,8 +32,7 @@ def savebackup(path, output, token, append_id, audit, scope_tags):
     configpath = f"{path}/Apple VPP Tokens/"
     data = makeapirequest(ENDPOINT, token)
     if audit:
-        graph_filter = "componentName eq 'MobileApp'"
-        audit_data = makeAuditRequest(graph_filter, token)
+        audit_data = get_audit_index(token)
 
     for vpp_token in data["value"]:
         results["config_count"] += 1
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module contains the run-wide index of the audit events used to commit the backup with the actor of the change.
+"""
+
+import threading
+
+from .graph_request import makeAuditRequest
+from .logger import log
+
+# Fields the latest audit record is precomputed for, other fields are looked up by scanning the records
+INDEXED_FIELDS = ("resourceId", "auditResourceType")
+
+
+class AuditIndex:
+    """
+    The audit records of a run with the latest record for each resourceId and auditResourceType.
+    """
+
+    def __init__(self, records=None):
+        """
+        :param records: List of audit records as returned by makeAuditRequest
+        """
+        self.records = []
+        self.latest = {field: {} for field in INDEXED_FIELDS}
+        for record in records or []:
+            self.add(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        """
+        Adds an audit record to the index.
+
+        :param record: The audit record
+        """
+        self.records.append(record)
+        for field in INDEXED_FIELDS:
+            value = record.get(field)
+            if value is None:
+                continue
+            latest = self.latest[field].get(value)
+            if (
+                latest is None
+                or record["activityDateTime"] > latest["activityDateTime"]
+            ):
+                self.latest[field][value] = record
+
+    def get_latest(self, compare_data):
+        """
+        Gets the latest audit record matching the compare data.
+
+        :param compare_data: Dict with the field to match as "type" and the value to match as "value"
+        :return: The latest audit record or None if no record matches
+        """
+        field = compare_data["type"]
+        if field in self.latest:
+            return self.latest[field].get(compare_data["value"])
+
+        records = [r for r in self.records if r.get(field) == compare_data["value"]]
+        if not records:
+            return None
+
+        return max(records, key=lambda r: r["activityDateTime"])
+
+
+# The index of the run is kept in a dict so it can be replaced without a global statement
+_shared = {}
+_index_lock = threading.Lock()
+
+
+def get_audit_index(token):
+    """
+    Gets the audit events of all components, only the first call in a run requests the events.
+
+    :param token: The token to use for authenticating the request
+    :return: The AuditIndex
+    """
+    with _index_lock:
+        # Other threads wait for the lock, so they see the requested events
+        if "index" not in _shared:
+            _shared["index"] = AuditIndex(makeAuditRequest(None, token))
+            log("get_audit_index", f"Indexed {len(_shared['index'])} audit records.")
+
+        return _shared["index"]
+
+
+def reset_audit_index():
+    """Removes the index, used to start a new run which requests the audit events again."""
+    with _index_lock:
+        _shared.pop("index", None)
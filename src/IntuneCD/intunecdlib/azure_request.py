@@ -4,6 +4,8 @@ from uuid import uuid4
 
 import requests
 
+from .http_client import get_client
+
 BASE_URL = "https://main.iam.ad.ext.azure.com/api/"
 
 
@@ -21,20 +23,28 @@ def make_azure_request(token, api_endpoint, q_param=None) -> dict:
     Returns:
         dict: The response from the request.
     """
+    client = get_client()
     header = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
         "x-ms-client-request-id": str(uuid4()),
         "x-ms-correlation-id": str(uuid4()),
         "host": "main.iam.ad.ext.azure.com",
     }
 
     if q_param:
-        response = requests.get(
-            f"{BASE_URL}{api_endpoint}", headers=header, params=q_param
+        response = client.request(
+            "GET",
+            f"{BASE_URL}{api_endpoint}",
+            token,
+            params=q_param,
+            headers=header,
         )
     else:
-        response = requests.get(f"{BASE_URL}{api_endpoint}", headers=header)
+        response = client.request(
+            "GET",
+            f"{BASE_URL}{api_endpoint}",
+            token,
+            headers=header,
+        )
 
     if response.status_code == 200:
         return json.loads(response.text)
@@ -58,20 +68,30 @@ def make_azure_request_put(token, api_endpoint, data, q_param=None, status_code=
     Raises:
         requests.exceptions.HTTPError: If the request fails.
     """
+    client = get_client()
     header = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
         "x-ms-client-request-id": str(uuid4()),
         "x-ms-correlation-id": str(uuid4()),
         "host": "main.iam.ad.ext.azure.com",
     }
 
     if q_param:
-        response = requests.put(
-            f"{BASE_URL}{api_endpoint}", headers=header, params=q_param, data=data
+        response = client.request(
+            "PUT",
+            f"{BASE_URL}{api_endpoint}",
+            token,
+            params=q_param,
+            data=data,
+            headers=header,
         )
     else:
-        response = requests.put(f"{BASE_URL}{api_endpoint}", headers=header, data=data)
+        response = client.request(
+            "PUT",
+            f"{BASE_URL}{api_endpoint}",
+            token,
+            data=data,
+            headers=header,
+        )
 
     if response.status_code == status_code:
         pass
@@ -93,20 +113,30 @@ def make_azure_request_post(token, api_endpoint, data, q_param=None, status_code
     Raises:
         requests.exceptions.HTTPError: If the request fails.
     """
+    client = get_client()
     header = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
         "x-ms-client-request-id": str(uuid4()),
         "x-ms-correlation-id": str(uuid4()),
         "host": "main.iam.ad.ext.azure.com",
     }
 
     if q_param:
-        response = requests.post(
-            f"{BASE_URL}{api_endpoint}", headers=header, params=q_param, data=data
+        response = client.request(
+            "POST",
+            f"{BASE_URL}{api_endpoint}",
+            token,
+            params=q_param,
+            data=data,
+            headers=header,
         )
     else:
-        response = requests.post(f"{BASE_URL}{api_endpoint}", headers=header, data=data)
+        response = client.request(
+            "POST",
+            f"{BASE_URL}{api_endpoint}",
+            token,
+            data=data,
+            headers=header,
+        )
 
     if response.status_code == status_code:
         pass
@@ -128,21 +158,29 @@ def make_azure_request_patch(token, api_endpoint, data, q_param=None, status_cod
     Raises:
         requests.exceptions.HTTPError: If the request fails.
     """
+    client = get_client()
     header = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
         "x-ms-client-request-id": str(uuid4()),
         "x-ms-correlation-id": str(uuid4()),
         "host": "main.iam.ad.ext.azure.com",
     }
 
     if q_param:
-        response = requests.patch(
-            f"{BASE_URL}{api_endpoint}", headers=header, params=q_param, data=data
+        response = client.request(
+            "PATCH",
+            f"{BASE_URL}{api_endpoint}",
+            token,
+            params=q_param,
+            data=data,
+            headers=header,
         )
     else:
-        response = requests.patch(
-            f"{BASE_URL}{api_endpoint}", headers=header, data=data
+        response = client.request(
+            "PATCH",
+            f"{BASE_URL}{api_endpoint}",
+            token,
+            data=data,
+            headers=header,
         )
 
     if response.status_code == status_code:
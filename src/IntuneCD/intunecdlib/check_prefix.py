@@ -8,3 +8,16 @@ def check_prefix_match(name, prefix):
     if not prefix_in_name:
         return False
     return True
+
+
+def filter_prefix(data, prefix, key="displayName"):
+    """Remove the objects that do not match the prefix from a list response.
+
+    Filtering the list before anything else is requested for the objects means
+    assignments and details are only requested for the objects that are backed up.
+    """
+    if prefix and data and data.get("value"):
+        data["value"] = [
+            obj for obj in data["value"] if check_prefix_match(obj[key], prefix)
+        ]
+    return data
@@ -8,14 +8,14 @@ This module contains all functions for the documentation.
 import base64
 import binascii
 import glob
-import json
 import os
 import platform
 import re
 
-import yaml
 from pytablewriter import MarkdownTableWriter
 
+from .serializer import load_json, load_yaml
+
 
 def md_file(outpath):
     """
@@ -311,11 +311,9 @@ def document_configs(configpath, outpath, header, max_length, split, cleanup, de
             # Check which format the file is saved as then open file, load data and set query parameter
             with open(filename, encoding="utf-8") as f:
                 if filename.endswith(".yaml"):
-                    data = json.dumps(yaml.safe_load(f))
-                    repo_data = json.loads(data)
+                    repo_data = load_yaml(f)
                 elif filename.endswith(".json"):
-                    f = open(filename, encoding="utf-8")
-                    repo_data = json.load(f)
+                    repo_data = load_json(f)
 
                 # Create assignments table
                 assignments_table = ""
@@ -413,11 +411,9 @@ def document_management_intents(configpath, outpath, header, split):
             # Check which format the file is saved as then open file, load data and set query parameter
             with open(filename, encoding="utf-8") as f:
                 if filename.endswith(".yaml"):
-                    data = json.dumps(yaml.safe_load(f))
-                    repo_data = json.loads(data)
+                    repo_data = load_yaml(f)
                 elif filename.endswith(".json"):
-                    f = open(filename, encoding="utf-8")
-                    repo_data = json.load(f)
+                    repo_data = load_json(f)
 
                 # Create assignments table
                 assignments_table = ""
@@ -8,10 +8,159 @@ the batch request.
 """
 
 import json
+import os
+import re
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from .graph_request import makeapirequestPost
 from .logger import log
+from .projections import select_query
+from .resolver_cache import get_cache
+from .task_runner import submit_in_task
+from .throttling import (
+    RETRY_CODES,
+    backoff_delay,
+    get_bucket,
+    get_max_retries,
+    get_service,
+)
+
+BATCH_ENDPOINT = "https://graph.microsoft.com/beta/$batch"
+# Maximum number of requests in a batch, this is the limit of the Graph Batch endpoint
+BATCH_SIZE = 20
+# Maximum number of batch requests in flight at the same time
+BATCH_CONCURRENCY = 4
+BATCH_MAX_RETRIES = 10
+BATCH_MAX_WAIT = 60
+# Share of throttled sub-responses in a batch above which the batches are made smaller
+THROTTLED_SHARE = 0.1
+# Matches the object IDs in an @odata.context URL such as configurationPolicies('id')/assignments
+CONTEXT_ID_PATTERN = re.compile(r"\('([^']+)'\)")
+# Matches the service root of a next link so the rest can be used as a batch request URL
+SERVICE_ROOT_PATTERN = re.compile(r"^https://graph\.microsoft\.com/[^/]+/")
+
+
+class BatchResponses(list):
+    """
+    List of response bodies from a batch request with an index on the object ID.
+
+    The IDs are parsed once when a response is added, from the ID the request was made for
+    and from the @odata.context URL, so looking up the responses for an object is constant time.
+    """
+
+    def __init__(self, responses=()):
+        super().__init__()
+        self.index = {}
+        # Requests that failed with a status that is not retried, keyed by request ID
+        self.failed = {}
+        # Requests that were still throttled after all retries, keyed by request ID
+        self.permanently_failed = {}
+        for response in responses:
+            self.add(response)
+
+    def add(self, response, object_id=None):
+        """Adds a response to the list and the index.
+
+        Args:
+            response (dict): Response body from the batch request
+            object_id (str, optional): ID the request was made for. Defaults to None.
+        """
+        self.append(response)
+        keys = set()
+        if object_id:
+            keys.add(object_id)
+            keys.update(object_id.split("/"))
+        if isinstance(response, dict):
+            keys.update(CONTEXT_ID_PATTERN.findall(response.get("@odata.context", "")))
+        for key in keys:
+            self.index.setdefault(key, []).append(response)
+
+    def get_responses(self, o_id) -> list:
+        """Gets the responses for the object ID.
+
+        Args:
+            o_id (str): ID of the object
+
+        Returns:
+            list: List of responses for the object
+        """
+        return self.index.get(o_id, [])
+
+
+class BatchPacer:
+    """
+    Sizes the batches and the number of batches in flight from the throttle feedback of Graph.
+
+    When more than THROTTLED_SHARE of the sub-responses in a batch are throttled both limits are
+    halved, each batch without throttled sub-responses grows them by one up to the maximum.
+    """
+
+    def __init__(self, max_size, max_concurrency):
+        """
+        :param max_size: Maximum number of requests in a batch
+        :param max_concurrency: Maximum number of batch requests in flight
+        """
+        self.max_size = max_size
+        self.max_concurrency = max_concurrency
+        self.size = max_size
+        self.concurrency = max_concurrency
+        self._lock = threading.Lock()
+
+    def record(self, request_data):
+        """
+        Adjusts the limits from the sub-responses of a batch.
+
+        :param request_data: List of sub-responses from the batch request
+        """
+        if not request_data:
+            return
+        throttled = sum(1 for resp in request_data if resp["status"] in RETRY_CODES)
+        with self._lock:
+            size, concurrency = self.size, self.concurrency
+            if throttled / len(request_data) > THROTTLED_SHARE:
+                self.size = max(self.size // 2, 1)
+                self.concurrency = max(self.concurrency // 2, 1)
+            elif not throttled:
+                self.size = min(self.size + 1, self.max_size)
+                self.concurrency = min(self.concurrency + 1, self.max_concurrency)
+            if (size, concurrency) != (self.size, self.concurrency):
+                log(
+                    "BatchPacer",
+                    f"{throttled} of {len(request_data)} requests throttled, batch size "
+                    f"{self.size}, {self.concurrency} batches at a time",
+                )
+
+
+# The shared pacer is kept in a dict so it can be replaced without a global statement
+_shared = {}
+_pacer_lock = threading.Lock()
+
+
+def get_batch_pacer() -> BatchPacer:
+    """Gets the shared pacer, the pacer is created on first use.
+
+    The limits can be configured with the BATCH_SIZE and BATCH_CONCURRENCY environment variables.
+
+    Returns:
+        BatchPacer: The shared pacer
+    """
+    with _pacer_lock:
+        if "pacer" not in _shared:
+            size = int(os.getenv("BATCH_SIZE", str(BATCH_SIZE)))
+            concurrency = int(os.getenv("BATCH_CONCURRENCY", str(BATCH_CONCURRENCY)))
+            _shared["pacer"] = BatchPacer(
+                min(max(size, 1), BATCH_SIZE), max(concurrency, 1)
+            )
+
+        return _shared["pacer"]
+
+
+def reset_batch_pacer():
+    """Removes the shared pacer, used to start a new run with the configured limits."""
+    with _pacer_lock:
+        _shared.pop("pacer", None)
 
 
 def create_batch_request(batch, batch_id, method, url, extra_url) -> tuple:
@@ -37,33 +186,33 @@ def create_batch_request(batch, batch_id, method, url, extra_url) -> tuple:
 
 
 def handle_responses(
-    initial_request_data, request_data, responses, retry_pool
+    initial_request_data, request_data, responses, retry_pool, object_ids=None
 ) -> tuple:
     """Handle the responses from the batch request.
 
     Args:
-        initial_request_data (list): List of initial requests
+        initial_request_data (dict): Initial requests keyed by request ID
         request_data (list): List of responses from the batch request
-        responses (list): List of responses from the batch request
-        retry_pool (list): List of failed requests
+        responses (BatchResponses): List of responses from the batch request
+        retry_pool (dict): Failed requests to retry keyed by request ID
+        object_ids (dict, optional): Object ID for each request ID. Defaults to None.
 
     Returns:
         tuple: Tuple containing the responses, retry pool and wait time
     """
     wait_time = 0
     for resp in request_data:
-        failed_batch_requests = []
+        request_id = int(resp["id"])
         if resp["status"] == 200:
-            responses.append(resp["body"])
-            retry_pool = [req for req in retry_pool if req["id"] != int(resp["id"])]
-        elif resp["status"] in [429, 503]:
-            if initial_request_data:
-                failed_batch_requests = [
-                    i
-                    for i in initial_request_data
-                    if i["id"] == int(resp["id"]) and i not in retry_pool
-                ]
-            retry_pool += failed_batch_requests
+            responses.add(resp["body"], (object_ids or {}).get(request_id))
+            retry_pool.pop(request_id, None)
+            responses.failed.pop(request_id, None)
+        elif resp["status"] in RETRY_CODES:
+            if request_id in initial_request_data:
+                retry_pool.setdefault(request_id, initial_request_data[request_id])
+        else:
+            retry_pool.pop(request_id, None)
+            responses.failed[request_id] = resp["status"]
 
         wait_time = max(wait_time, int(resp["headers"].get("Retry-After", 0)))
 
@@ -83,44 +232,65 @@ def create_batch_list(data, batch_count) -> list:
     return [data[i : i + batch_count] for i in range(0, len(data), batch_count)]
 
 
-def process_batch(
-    batch,
-    batch_id,
-    method,
-    url,
-    extra_url,
-    token,
-    initial_request_data,
-    responses,
-    retry_pool,
-) -> tuple:
-    """Process the batch request.
+def post_batch(query_data, token) -> list:
+    """Post a single batch request to the Graph API.
 
     Args:
-        batch (list): List of objects
-        batch_id (str): ID for the batch request
-        method (str): HTTP method to use
-        url (str): MS graph endpoint for the object
-        extra_url (str): Used if anything extra is needed for the url such as /assignments or ?$filter
+        query_data (dict): The batch request data
         token (str): OAuth token used for authentication
-        initial_request_data (list): List of initial requests
-        responses (list): List of responses from the batch request
-        retry_pool (list): List of failed requests
 
     Returns:
-        tuple: Tuple containing the batch ID, responses, retry pool and wait time
+        list: List of responses from the batch request sorted by request ID
     """
-    query_data, batch_id = create_batch_request(batch, batch_id, method, url, extra_url)
     json_data = json.dumps(query_data)
+    # The batch is throttled as the service of its requests, e.g. Entra for groups
+    service = get_service(query_data["requests"][0]["url"])
+    # A batch of reads is retried like a read
+    max_retries = min(get_max_retries(r["method"]) for r in query_data["requests"])
     request = makeapirequestPost(
-        "https://graph.microsoft.com/beta/$batch", token, jdata=json_data
-    )
-    request_data = sorted(request["responses"], key=lambda item: item.get("id"))
-    initial_request_data += query_data["requests"]
-    responses, retry_pool, wait_time = handle_responses(
-        initial_request_data, request_data, responses, retry_pool
+        BATCH_ENDPOINT,
+        token,
+        jdata=json_data,
+        service=service,
+        max_retries=max_retries,
     )
-    return batch_id, responses, retry_pool, wait_time
+    request_data = sorted(request["responses"], key=lambda item: int(item.get("id")))
+    get_batch_pacer().record(request_data)
+    return request_data
+
+
+def send_batches(items, build_query, token) -> list:
+    """Post the items in batches with a sliding window of batches in flight.
+
+    A new batch is sent as soon as one is done, sized from the current limits of the pacer.
+
+    Args:
+        items (list): List of objects or requests to send
+        build_query (function): Creates the batch request data from a batch of items
+        token (str): OAuth token used for authentication
+
+    Returns:
+        list: List of responses for each batch request, in the order the batches were sent
+    """
+    pacer = get_batch_pacer()
+    results = []
+    running = {}
+    position = 0
+    with ThreadPoolExecutor(max_workers=pacer.max_concurrency) as executor:
+        while position < len(items) or running:
+            while position < len(items) and len(running) < pacer.concurrency:
+                batch = items[position : position + pacer.size]
+                position += len(batch)
+                # Retry and throttling messages are printed with the output of the task
+                future = submit_in_task(executor, post_batch, build_query(batch), token)
+                running[future] = len(results)
+                results.append(None)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+
+    return results
 
 
 def retry_failed_requests(
@@ -131,64 +301,66 @@ def retry_failed_requests(
     token,
     initial_request_data,
     responses,
-    batch_count,
+    object_ids=None,
 ) -> tuple:
     """Retry failed requests.
 
     Args:
-        retry_pool (list): List of failed requests
+        retry_pool (dict): Failed requests to retry keyed by request ID
         wait_time (int): Time to wait before retrying
         max_retries (int): Maximum number of retries
         max_wait_time (int): Maximum time to wait before retrying
         token (str): OAuth token used for authentication
-        initial_request_data (list): List of initial requests
-        responses (list): List of responses from the batch request
-        batch_count (int): Number of objects to include in each batch
+        initial_request_data (dict): Initial requests keyed by request ID
+        responses (BatchResponses): List of responses from the batch request
+        object_ids (dict, optional): Object ID for each request ID. Defaults to None.
 
     Returns:
-        list: List of responses from the batch request
+        BatchResponses: List of responses from the batch request
     """
     retry_count = 0
-    failed_retry_requests = []
     while retry_count < max_retries and retry_pool:
         log(
             "retry_failed_requests",
             f"Retrying failed requests, retry pool count: {str(len(retry_pool))}",
         )
         if wait_time > 0:
-            log("retry_failed_requests", f"Sleeping for {str(wait_time)} seconds...")
-            time.sleep(wait_time)
-            wait_time = min(wait_time * 2, max_wait_time)
-        else:
+            wait_time = min(wait_time, max_wait_time)
             log(
                 "retry_failed_requests",
-                "No wait time in headers, sleeping for 20 seconds...",
+                f"Pausing Graph requests for {str(wait_time)} seconds...",
             )
-            time.sleep(20)
-        batch_list = [
-            retry_pool[i : i + batch_count]
-            for i in range(0, len(retry_pool), batch_count)
-        ]
-        for batch in batch_list:
-            batch_data = {"requests": list(batch)}
-            json_data = json.dumps(batch_data)
-            request = makeapirequestPost(
-                "https://graph.microsoft.com/beta/$batch", token, jdata=json_data
+            # Pause the shared buckets so all other requests to the same services wait as well
+            for service in {get_service(r["url"]) for r in retry_pool.values()}:
+                get_bucket(service).pause(wait_time)
+        else:
+            delay = backoff_delay(retry_count)
+            log(
+                "retry_failed_requests",
+                f"No wait time in headers, sleeping for {delay:.0f} seconds...",
             )
-            request_data = sorted(request["responses"], key=lambda item: item.get("id"))
-            responses, retry_pool, _ = handle_responses(
-                initial_request_data, request_data, responses, retry_pool
+            time.sleep(delay)
+        wait_time = 0
+        for request_data in send_batches(
+            list(retry_pool.values()), lambda batch: {"requests": batch}, token
+        ):
+            responses, retry_pool, batch_wait_time = handle_responses(
+                initial_request_data,
+                request_data,
+                responses,
+                retry_pool,
+                object_ids,
             )
-            failed_retry_requests = [
-                r for r in request["responses"] if r["status"] != 200
-            ]
+            wait_time = max(wait_time, batch_wait_time)
         retry_count += 1
         log("retry_failed_requests", f"Retry count: {str(retry_count)}")
-        if retry_pool and retry_count == max_retries:
-            break
+
+    # Requests still in the pool have used up their retries
+    for request_id in retry_pool:
+        responses.permanently_failed[request_id] = initial_request_data[request_id]
     log(
         "retry_failed_requests",
-        f"Failed requests after {str(retry_count)} retries: {str(len(failed_retry_requests))}",
+        f"Failed requests after {str(retry_count)} retries: {str(len(retry_pool))}",
     )
     return responses
 
@@ -204,31 +376,34 @@ def batch_request(data, url, extra_url, token, method="GET") -> list:
         method (str): HTTP method to use
 
     Returns:
-        list: List of responses from the batch request
+        BatchResponses: List of responses from the batch request indexed on the object ID
     """
-    responses = []
+    responses = BatchResponses()
+    object_ids = {}
     batch_id = 1
-    batch_count = 20
-    retry_pool = []
+    retry_pool = {}
     wait_time = 0
-    initial_request_data = []
-
-    batch_list = create_batch_list(data, batch_count)
-    for batch in batch_list:
-        batch_id, responses, retry_pool, wait_time = process_batch(
-            batch,
-            batch_id,
-            method,
-            url,
-            extra_url,
-            token,
-            initial_request_data,
-            responses,
-            retry_pool,
+    initial_request_data = {}
+
+    def build_query(batch):
+        nonlocal batch_id
+        query_data, batch_id = create_batch_request(
+            batch, batch_id, method, url, extra_url
+        )
+        for request, b_id in zip(query_data["requests"], batch):
+            initial_request_data[request["id"]] = request
+            object_ids[request["id"]] = b_id
+        return query_data
+
+    # Responses are handled in the order of the batches so the result keeps the order of the IDs
+    for request_data in send_batches(list(data), build_query, token):
+        responses, retry_pool, batch_wait_time = handle_responses(
+            initial_request_data, request_data, responses, retry_pool, object_ids
         )
+        wait_time = max(wait_time, batch_wait_time)
 
-    max_retries = 10
-    max_wait_time = 60
+    max_retries = int(os.getenv("BATCH_MAX_RETRIES", str(BATCH_MAX_RETRIES)))
+    max_wait_time = int(os.getenv("BATCH_MAX_WAIT", str(BATCH_MAX_WAIT)))
     if retry_pool:
         responses = retry_failed_requests(
             retry_pool,
@@ -238,65 +413,164 @@ def batch_request(data, url, extra_url, token, method="GET") -> list:
             token,
             initial_request_data,
             responses,
-            batch_count,
+            object_ids,
         )
 
+    for request_id, status in responses.failed.items():
+        log(
+            "batch_request",
+            f"Request {initial_request_data[request_id]['url']} failed with status {status}",
+        )
+    if responses.permanently_failed:
+        print(
+            f"{len(responses.permanently_failed)} requests to {url} were still throttled after "
+            f"{max_retries} retries and are missing from the results"
+        )
+        for request in responses.permanently_failed.values():
+            log("batch_request", f"Request {request['url']} used up all retries")
+
+    return follow_next_links(responses, token)
+
+
+def follow_next_links(responses, token) -> list:
+    """Get the remaining pages of all responses that have a @odata.nextLink.
+
+    The next pages of all responses are batch requested together and their values are added
+    to the value of the first page, so the responses hold all objects like makeapirequest does.
+
+    Args:
+        responses (BatchResponses): List of responses from the batch request
+        token (str): OAuth token used for authentication
+
+    Returns:
+        BatchResponses: The responses with the values of all pages
+    """
+    paged = {}
+    for response in responses:
+        if isinstance(response, dict) and response.get("@odata.nextLink"):
+            next_url = SERVICE_ROOT_PATTERN.sub("", response.pop("@odata.nextLink"))
+            paged[next_url] = response
+
+    if not paged:
+        return responses
+
+    log("follow_next_links", f"Requesting next page for {len(paged)} responses")
+    # Pages after the next page are followed by the batch request for the next pages
+    next_pages = batch_request(list(paged), "", "", token)
+    for next_url, response in paged.items():
+        pages = next_pages.get_responses(next_url)
+        if not pages:
+            log("follow_next_links", f"Next page {next_url} could not be requested")
+            continue
+        response.setdefault("value", []).extend(pages[0].get("value", []))
+
     return responses
 
 
-def get_group_names(responses, group_ids, token):
-    """get all group names."""
-    group_responses = batch_request(
+def resolve_groups(group_ids, token) -> dict:
+    """
+    Resolve group IDs to groups, groups already resolved during the run are taken from the cache.
+
+    :param group_ids: List of group IDs, duplicates are only requested once
+    :param token: OAuth token used for authentication
+    :return: Dict of groups with displayName, groupTypes and membershipRule keyed by ID
+    """
+
+    return get_cache("groups").resolve(
         group_ids,
-        "groups/",
-        "?$select=displayName,id,groupTypes,membershipRule",
-        token,
+        lambda ids: batch_request(ids, "groups/", select_query("groups"), token),
+    )
+
+
+def seed_apps(apps):
+    """
+    Adds apps that were already requested to the cache used by resolve_apps.
+
+    :param apps: List of apps with id, displayName and @odata.type
+    """
+
+    get_cache("apps").add(
+        [
+            {
+                "id": app["id"],
+                "displayName": app.get("displayName"),
+                "@odata.type": app.get("@odata.type"),
+            }
+            for app in apps
+        ]
+    )
+
+
+def resolve_apps(app_ids, token) -> dict:
+    """
+    Resolve app IDs to apps with displayName and @odata.type.
+
+    Apps added with seed_apps or resolved earlier in the run are not requested again, other apps are batch requested.
+
+    :param app_ids: List of app IDs, duplicates are only requested once
+    :param token: OAuth token used for authentication
+    :return: Dict of apps keyed by ID
+    """
+
+    if not app_ids:
+        return {}
+
+    return get_cache("apps").resolve(
+        app_ids,
+        lambda ids: batch_request(
+            ids, "deviceAppManagement/mobileApps/", select_query("apps"), token
+        ),
     )
+
+
+def get_group_names(responses, group_ids, token):
+    """get all group names."""
+    groups = resolve_groups(group_ids, token)
     for value in responses:
         if value is None or "value" not in value:
             continue
 
         for val in value["value"]:
-            if "groupId" not in val["target"]:
+            target = val["target"]
+            group = groups.get(target.get("groupId"))
+            if group is None:
                 continue
 
-            for g_id in group_responses:
-                if g_id.get("id") == val["target"]["groupId"]:
-                    val["target"]["groupName"] = g_id.get("displayName", "")
-                    if "DynamicMembership" in g_id.get("groupTypes", []):
-                        val["target"]["groupType"] = "DynamicMembership"
-                        val["target"]["membershipRule"] = g_id.get(
-                            "membershipRule", None
-                        )
-                    else:
-                        val["target"]["groupType"] = "StaticMembership"
-                    break
-
-
-def get_filter_name(val, filter_responses):
-    """Get the name of the filter."""
-    for f_id in filter_responses:
-        if f_id["id"] == val["target"]["deviceAndAppManagementAssignmentFilterId"]:
-            val["target"]["deviceAndAppManagementAssignmentFilterId"] = f_id[
-                "displayName"
-            ]
-            break
+            target["groupName"] = group.get("displayName", "")
+            if "DynamicMembership" in group.get("groupTypes", []):
+                target["groupType"] = "DynamicMembership"
+                target["membershipRule"] = group.get("membershipRule", None)
+            else:
+                target["groupType"] = "StaticMembership"
+
+
+def get_filter_name(val, filters):
+    """Get the name of the filter from the filters keyed by ID."""
+    target = val["target"]
+    assignment_filter = filters.get(target["deviceAndAppManagementAssignmentFilterId"])
+    if assignment_filter is not None:
+        target["deviceAndAppManagementAssignmentFilterId"] = assignment_filter[
+            "displayName"
+        ]
 
 
 def get_filter_names(responses, filter_ids, token):
-    """Get all filter names."""
+    """Get all filter names, filters already resolved during the run are taken from the cache."""
     filter_ids = [i for i in filter_ids if i != "00000000-0000-0000-0000-000000000000"]
-    filter_responses = batch_request(
+    filters = get_cache("filters").resolve(
         filter_ids,
-        "deviceManagement/assignmentFilters/",
-        "?$select=displayName",
-        token,
+        lambda ids: batch_request(
+            ids,
+            "deviceManagement/assignmentFilters/",
+            select_query("assignmentFilters"),
+            token,
+        ),
     )
     for value in responses:
         if value["value"]:
             for val in value["value"]:
                 if "deviceAndAppManagementAssignmentFilterId" in val["target"]:
-                    get_filter_name(val, filter_responses)
+                    get_filter_name(val, filters)
 
 
 def batch_assignment(data, url, extra_url, token, app_protection=False) -> list:
@@ -336,24 +610,37 @@ def batch_assignment(data, url, extra_url, token, app_protection=False) -> list:
     else:
         for a_id in data["value"]:
             data_ids.append(a_id["id"])
+
+    # If the list was requested with $expand=assignments, the assignments are already in the objects
+    if (
+        app_protection is False
+        and data_ids
+        and all("assignments" in value for value in data["value"])
+    ):
+        responses = BatchResponses()
+        for value in data["value"]:
+            value.pop("assignments@odata.context", None)
+            responses.add({"value": value.pop("assignments")}, value["id"])
     # If we have any IDs, batch request the assignments
-    if data_ids:
+    elif data_ids:
         responses = batch_request(data_ids, url, extra_url, token)
         if not responses:
             return
 
         if extra_url == "?$expand=assignments":
-            response_values = []
+            response_values = BatchResponses()
             for value in responses:
                 if value:
-                    response_values.append(
+                    response_values.add(
                         {
                             "value": value["assignments"],
                             "@odata.context": value["assignments@odata.context"],
-                        }
+                        },
+                        value.get("id"),
                     )
             responses = response_values
 
+    if data_ids:
         group_ids = [
             val
             for list in responses
@@ -421,11 +708,11 @@ def batch_intents(data, token) -> dict:
     # Build ID for requesting settings for each Intent
     if categories_responses:
         for intent in data["value"]:
+            if intent["templateId"] is None:
+                continue
             settings_ids = [
                 val
-                for list in categories_responses
-                if intent["templateId"] is not None
-                and intent["templateId"] in list["@odata.context"]
+                for list in categories_responses.get_responses(intent["templateId"])
                 for val in list["value"]
                 for keys, val in val.items()
                 if "id" in keys
@@ -444,8 +731,7 @@ def batch_intents(data, token) -> dict:
         for intent in data["value"]:
             settingsDelta = [
                 val
-                for list in settings_responses
-                if intent["id"] in list["@odata.context"]
+                for list in settings_responses.get_responses(intent["id"])
                 for val in list["value"]
             ]
             intent_values["value"].append(
@@ -462,21 +748,87 @@ def batch_intents(data, token) -> dict:
     return intent_values
 
 
+def hydrate_collection(data, url_template, token) -> dict:
+    """
+    Batch request each object of a collection, e.g. to get the full object when the list response is not complete.
+
+    :param data: List response from the Graph API, list of objects with an id or list of IDs
+    :param url_template: URL of each object relative to the beta endpoint with an {id} placeholder,
+        e.g. "identity/conditionalAccess/policies/{id}"
+    :param token: OAuth token used for authentication
+    :return: Dict of the responses keyed by object ID in the order of data, objects that could not be requested are left out
+    """
+
+    if isinstance(data, dict):
+        data = data.get("value", [])
+    object_ids = list(
+        dict.fromkeys(obj["id"] if isinstance(obj, dict) else obj for obj in data)
+    )
+    if not object_ids:
+        return {}
+
+    url, extra_url = url_template.split("{id}", 1)
+    responses = batch_request(object_ids, url, extra_url, token)
+
+    hydrated = {}
+    for o_id in object_ids:
+        found = responses.get_responses(o_id)
+        if found:
+            hydrated[o_id] = found[0]
+
+    return hydrated
+
+
+def batch_oma_settings(profiles, token) -> dict:
+    """
+    Batch request the plain text values of all encrypted OMA settings in the profiles.
+
+    :param profiles: List of Windows 10 custom configurations
+    :param token: OAuth token used for authentication
+    :return: Dict of the plain text value responses keyed by profile ID and secret reference value ID
+    """
+
+    oma_requests = {}
+    for profile in profiles:
+        for setting in profile.get("omaSettings") or []:
+            if not setting.get("isEncrypted"):
+                continue
+            secret_id = setting["secretReferenceValueId"]
+            request_id = (
+                f"{profile['id']}/getOmaSettingPlainTextValue"
+                f"(secretReferenceValueId='{secret_id}')"
+            )
+            oma_requests[request_id] = (profile["id"], secret_id)
+
+    if not oma_requests:
+        return {}
+
+    responses = batch_request(
+        list(oma_requests), "deviceManagement/deviceConfigurations/", "", token
+    )
+
+    oma_values = {}
+    for request_id, key in oma_requests.items():
+        for response in responses.get_responses(request_id):
+            oma_values[key] = response
+
+    return oma_values
+
+
 def get_object_assignment(o_id, responses) -> list:
     """
     Get the object assignment for the object ID.
 
     :param o_id: Id of the object to get the assignment for
-    :param responses: List of responses from the batch request
+    :param responses: BatchResponses returned by batch_request or batch_assignment
     :return: List of assignments for the object
     """
 
     remove_keys = {"id", "groupId", "sourceId"}
     assignments_list = [
         val
-        for list in responses
-        if list and "value" in list
-        if o_id in list["@odata.context"]
+        for list in responses.get_responses(o_id)
+        if "value" in list
         for val in list["value"]
     ]
     for value in assignments_list:
@@ -492,14 +844,9 @@ def get_object_details(o_id, responses) -> list:
     Get the object details for the object ID.
 
     :param o_id: Id of the object to get the details for
-    :param responses: List of responses from the batch request
+    :param responses: BatchResponses returned by batch_request or batch_assignment
     :return: List of details for the object
     """
 
-    details = [
-        val
-        for list in responses
-        if o_id in list["@odata.context"]
-        for val in list["value"]
-    ]
+    details = [val for list in responses.get_responses(o_id) for val in list["value"]]
     return details
@@ -8,13 +8,81 @@ This module contains the functions to make API requests to the Microsoft Graph A
 import datetime
 import json
 import os
-import time
 
 import requests
 
+from .http_client import get_client
 from .logger import log
 
 
+def _handle_get_error(endpoint, response):
+    """
+    This function handles a failed GET request to the Microsoft Graph API.
+
+    :param endpoint: The endpoint the request was made to.
+    :param response: The response object from the request.
+    """
+
+    if response.status_code == 404:
+        print("Resource not found in Microsoft Graph: " + endpoint)
+    elif ("assignmentFilters" in endpoint) and ("FeatureNotEnabled" in response.text):
+        print("Assignment filters not enabled in tenant, skipping")
+    else:
+        raise requests.exceptions.HTTPError(
+            "Request failed with {} - {}".format(response.status_code, response.text)
+        )
+
+
+def iter_graph_pages(endpoint, token, q_param=None):
+    """
+    This function yields each page of a GET request to the Microsoft Graph API.
+    @odata.nextLink is followed iteratively so only one page is held at a time.
+
+    :param endpoint: The endpoint to make the request to.
+    :param token: The token to use for authenticating the request.
+    :param q_param: The query parameters to use for the request.
+    :return: Generator of the response pages.
+    """
+
+    first_page = True
+    while endpoint:
+        response = get_client().request(
+            "GET", endpoint, token["access_token"], params=q_param
+        )
+        if response.status_code != 200:
+            # A missing page after the first would return a partial collection, so it fails the request
+            if not first_page:
+                raise requests.exceptions.HTTPError(
+                    "Request failed with {} - {}".format(
+                        response.status_code, response.text
+                    )
+                )
+            _handle_get_error(endpoint, response)
+            return
+        first_page = False
+
+        page = json.loads(response.text)
+        # The next link already contains the query parameters
+        endpoint = page.get("@odata.nextLink")
+        q_param = None
+
+        yield page
+
+
+def iter_graph_items(endpoint, token, q_param=None):
+    """
+    This function yields each object of a GET request to the Microsoft Graph API page by page.
+
+    :param endpoint: The endpoint to make the request to.
+    :param token: The token to use for authenticating the request.
+    :param q_param: The query parameters to use for the request.
+    :return: Generator of the objects in the response.
+    """
+
+    for page in iter_graph_pages(endpoint, token, q_param):
+        yield from page.get("value", [])
+
+
 def makeapirequest(endpoint, token, q_param=None):
     """
     This function makes a GET request to the Microsoft Graph API.
@@ -25,70 +93,40 @@ def makeapirequest(endpoint, token, q_param=None):
     :return: The response from the request.
     """
 
-    retry_codes = [504, 502, 503]
+    pages = iter_graph_pages(endpoint, token, q_param)
+    json_data = next(pages, None)
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": "Bearer {0}".format(token["access_token"]),
-    }
+    if json_data and "@odata.nextLink" in json_data:
+        json_data.pop("@odata.nextLink")
+        for page in pages:
+            json_data["value"].extend(page["value"])
 
-    if q_param is not None:
-        response = requests.get(endpoint, headers=headers, params=q_param, timeout=120)
-        if response.status_code in retry_codes:
-            print(
-                "Ran into issues with Graph request, waiting 10 seconds and trying again..."
-            )
-            time.sleep(10)
-            response = requests.get(endpoint, headers=headers, timeout=120)
-        elif response.status_code == 429:
-            print(
-                f"Hit Graph throttling, trying again after {response.headers['Retry-After']} seconds"
-            )
-            while response.status_code == 429:
-                time.sleep(int(response.headers["Retry-After"]))
-                response = requests.get(endpoint, headers=headers, timeout=120)
-    else:
-        response = requests.get(endpoint, headers=headers, timeout=120)
-        if response.status_code in retry_codes:
-            retry_count = 0
-            while retry_count < 3:
-                print(
-                    "Ran into issues with Graph request, waiting 10 seconds and trying again..."
-                )
-                time.sleep(10)
-                response = requests.get(endpoint, headers=headers, timeout=120)
-                if response.status_code == 200:
-                    break
-                retry_count += 1
-        elif response.status_code == 429:
-            print(
-                f"Hit Graph throttling, trying again after {response.headers['Retry-After']} seconds"
-            )
-            while response.status_code == 429:
-                time.sleep(int(response.headers["Retry-After"]))
-                response = requests.get(endpoint, headers=headers, timeout=120)
+    return json_data
 
-    if response.status_code == 200:
-        json_data = json.loads(response.text)
 
-        if "@odata.nextLink" in json_data.keys():
-            record = makeapirequest(json_data["@odata.nextLink"], token)
-            entries = len(record["value"])
-            count = 0
-            while count < entries:
-                json_data["value"].append(record["value"][count])
-                count += 1
+def makeapirequestWithAssignments(endpoint, token, q_param=None):
+    """
+    This function makes a GET request to the Microsoft Graph API with the assignments of each object expanded.
+    If the endpoint does not support expanding the assignments, the objects are requested without them.
 
-        return json_data
+    :param endpoint: The endpoint to make the request to.
+    :param token: The token to use for authenticating the request.
+    :param q_param: The query parameters to use for the request.
+    :return: The response from the request.
+    """
 
-    if response.status_code == 404:
-        print("Resource not found in Microsoft Graph: " + endpoint)
-    elif ("assignmentFilters" in endpoint) and ("FeatureNotEnabled" in response.text):
-        print("Assignment filters not enabled in tenant, skipping")
-    else:
-        raise requests.exceptions.HTTPError(
-            "Request failed with {} - {}".format(response.status_code, response.text)
+    expand_param = dict(q_param or {})
+    expand = expand_param.get("$expand")
+    expand_param["$expand"] = f"{expand},assignments" if expand else "assignments"
+
+    try:
+        return makeapirequest(endpoint, token, expand_param)
+    except requests.exceptions.HTTPError:
+        log(
+            "makeapirequestWithAssignments",
+            f"Expanding assignments is not supported for {endpoint}, requesting without assignments",
         )
+        return makeapirequest(endpoint, token, q_param)
 
 
 def makeapirequestPatch(
@@ -104,18 +142,15 @@ def makeapirequestPatch(
     :param status_code: The status code to expect from the request.
     """
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": "Bearer {0}".format(token["access_token"]),
-    }
+    client = get_client()
 
     if q_param is not None:
-        response = requests.patch(
-            patchEndpoint, headers=headers, params=q_param, data=jdata, timeout=120
+        response = client.request(
+            "PATCH", patchEndpoint, token["access_token"], params=q_param, data=jdata
         )
     else:
-        response = requests.patch(
-            patchEndpoint, headers=headers, data=jdata, timeout=120
+        response = client.request(
+            "PATCH", patchEndpoint, token["access_token"], data=jdata
         )
     if response.status_code == status_code:
         pass
@@ -138,18 +173,15 @@ def makeapirequestDelete(
     :param status_code: The status code to expect from the request.
     """
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": "Bearer {0}".format(token["access_token"]),
-    }
+    client = get_client()
 
     if q_param is not None:
-        response = requests.delete(
-            deleteEndpoint, headers=headers, params=q_param, data=jdata, timeout=120
+        response = client.request(
+            "DELETE", deleteEndpoint, token["access_token"], params=q_param, data=jdata
         )
     else:
-        response = requests.delete(
-            deleteEndpoint, headers=headers, data=jdata, timeout=120
+        response = client.request(
+            "DELETE", deleteEndpoint, token["access_token"], data=jdata
         )
     if response.status_code == status_code:
         pass
@@ -159,7 +191,15 @@ def makeapirequestDelete(
         )
 
 
-def makeapirequestPost(patchEndpoint, token, q_param=None, jdata=None, status_code=200):
+def makeapirequestPost(
+    patchEndpoint,
+    token,
+    q_param=None,
+    jdata=None,
+    status_code=200,
+    service=None,
+    max_retries=None,
+):
     """
     This function makes a POST request to the Microsoft Graph API.
 
@@ -168,43 +208,35 @@ def makeapirequestPost(patchEndpoint, token, q_param=None, jdata=None, status_co
     :param q_param: The query parameters to use for the request.
     :param jdata: The JSON data to use for the request.
     :param status_code: The status code to expect from the request.
+    :param service: The service the request is throttled as, found from the endpoint if not set.
+    :param max_retries: The number of retries for 5xx responses, a POST is retried once if not set.
     """
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": "Bearer {0}".format(token["access_token"]),
-    }
+    client = get_client()
 
     if q_param is not None:
-        response = requests.post(
-            patchEndpoint, headers=headers, params=q_param, data=jdata, timeout=120
+        response = client.request(
+            "POST",
+            patchEndpoint,
+            token["access_token"],
+            params=q_param,
+            data=jdata,
+            service=service,
+            max_retries=max_retries,
         )
     else:
-        response = requests.post(
-            patchEndpoint, headers=headers, data=jdata, timeout=120
+        response = client.request(
+            "POST",
+            patchEndpoint,
+            token["access_token"],
+            data=jdata,
+            service=service,
+            max_retries=max_retries,
         )
     if response.status_code == status_code:
         if response.text:
             json_data = json.loads(response.text)
             return json_data
-
-    elif response.status_code == 504:
-        print(
-            "Ran into issues with Graph request, waiting 10 seconds and trying again..."
-        )
-        time.sleep(10)
-        response = requests.post(
-            patchEndpoint, headers=headers, data=jdata, timeout=120
-        )
-    elif response.status_code == 429:
-        print(
-            f"Hit Graph throttling, trying again after {response.headers['Retry-After']} seconds"
-        )
-        while response.status_code == 429:
-            time.sleep(int(response.headers["Retry-After"]))
-            response = requests.post(
-                patchEndpoint, headers=headers, data=jdata, timeout=120
-            )
     else:
         raise requests.exceptions.HTTPError(
             "Request failed with {} - {}".format(response.status_code, response.text)
@@ -222,17 +254,16 @@ def makeapirequestPut(patchEndpoint, token, q_param=None, jdata=None, status_cod
     :param status_code: The status code to expect from the request.
     """
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": "Bearer {0}".format(token["access_token"]),
-    }
+    client = get_client()
 
     if q_param is not None:
-        response = requests.put(
-            patchEndpoint, headers=headers, params=q_param, data=jdata, timeout=120
+        response = client.request(
+            "PUT", patchEndpoint, token["access_token"], params=q_param, data=jdata
         )
     else:
-        response = requests.put(patchEndpoint, headers=headers, data=jdata, timeout=120)
+        response = client.request(
+            "PUT", patchEndpoint, token["access_token"], data=jdata
+        )
     if response.status_code == status_code:
         pass
     else:
@@ -245,8 +276,7 @@ def makeAuditRequest(graph_filter, token):
     """
     This function makes a GET request to the Microsoft Graph API to get the audit logs for a specific object.
 
-    :param pid: The ID of the object to get the audit logs for.
-    :param graph_filter: The filter to use for the request.
+    :param graph_filter: The filter to use for the request, None to get the audit logs of all components.
     :param token: The token to use for authenticating the request.
     """
 
@@ -266,11 +296,12 @@ def makeAuditRequest(graph_filter, token):
     # Create query to get audit logs for the object
     # if not graph_filter:
     #    graph_filter = f"resources/any(s:s/resourceId eq '{pid}')"
+    date_filter = (
+        f"activityDateTime gt {start_date} and activityDateTime le {end_date} and "
+        "activityOperationType ne 'Get'"
+    )
     q_param = {
-        "$filter": (
-            f"{graph_filter} and activityDateTime gt {start_date} and activityDateTime le {end_date} and "
-            "activityOperationType ne 'Get'"
-        ),
+        "$filter": f"{graph_filter} and {date_filter}" if graph_filter else date_filter,
         "$select": "actor,activityDateTime,activityOperationType,activityResult,resources",
         "$orderby": "activityDateTime desc",
     }
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module contains the shared HTTP client used for all requests to Microsoft Graph and Azure.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .logger import log
+from .throttling import get_max_retries, send_with_retry
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT = 120
+
+
+class HttpClient:
+    """
+    A pooled, keep-alive HTTP client.
+
+    All requests share one requests.Session so connections to graph.microsoft.com
+    and main.iam.ad.ext.azure.com are reused instead of doing a new TCP and TLS
+    handshake for every call.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        """
+        :param pool_size: Number of connections to keep open per host
+        :param timeout: Timeout in seconds for each request
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+        self._headers = {}
+        self._lock = threading.Lock()
+
+    def headers(self, access_token):
+        """
+        Returns the default headers for the access token, the headers are only built once per token.
+
+        :param access_token: The access token to use for authenticating the request
+        :return: Dict of headers
+        """
+        headers = self._headers.get(access_token)
+        if headers is None:
+            with self._lock:
+                headers = {
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {access_token}",
+                }
+                self._headers[access_token] = headers
+
+        return headers
+
+    def request(
+        self,
+        method,
+        endpoint,
+        access_token,
+        params=None,
+        data=None,
+        headers=None,
+        service=None,
+        max_retries=None,
+    ):
+        """
+        Makes a request using the pooled session, throttled and failed requests are retried.
+
+        :param method: HTTP method to use
+        :param endpoint: The endpoint to make the request to
+        :param access_token: The access token to use for authenticating the request
+        :param params: The query parameters to use for the request
+        :param data: The data to send with the request
+        :param headers: Extra headers to add to the default headers
+        :param service: Name of the service the request is throttled as, found from the endpoint if not set
+        :param max_retries: Number of retries for 5xx responses, found from the method if not set
+        :return: The response from the request
+        """
+        request_headers = self.headers(access_token)
+        if headers:
+            request_headers = {**request_headers, **headers}
+
+        return send_with_retry(
+            endpoint,
+            lambda: self.session.request(
+                method,
+                endpoint,
+                headers=request_headers,
+                params=params,
+                data=data,
+                timeout=self.timeout,
+            ),
+            service,
+            get_max_retries(method) if max_retries is None else max_retries,
+        )
+
+    def close(self):
+        """Closes all pooled connections."""
+        self.session.close()
+
+
+# The shared client is kept in a dict so it can be created without a global statement
+_shared = {}
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the shared HTTP client, the client is created on first use.
+    The pool size can be configured with the HTTP_POOL_SIZE environment variable.
+
+    :return: The shared HttpClient
+    """
+
+    client = _shared.get("client")
+    if client is None:
+        with _client_lock:
+            client = _shared.get("client")
+            if client is None:
+                pool_size = int(os.getenv("HTTP_POOL_SIZE", str(DEFAULT_POOL_SIZE)))
+                log("get_client", f"Creating HTTP client with pool size {pool_size}")
+                client = _shared["client"] = HttpClient(pool_size=pool_size)
+
+    return client
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module keeps the state of the last backup so unchanged objects are not requested and saved again.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from .load_file import load_file
+from .logger import log
+
+STATE_FILE = ".intunecd_state.json"
+
+
+def hash_data(data):
+    """
+    Gets the hash of the data saved for an object.
+
+    :param data: The data saved for the object
+    :return: SHA-256 hash of the data
+    """
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class BackupState:
+    """
+    The ID, lastModifiedDateTime, content hash and output file of each object in the last backup.
+    The output file is kept relative to the backup path so the backup can be moved.
+
+    The state is kept per backup module. Objects that were not backed up during the run are
+    removed from the state when it is saved, their files are archived as usual.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the backup
+        """
+        self.path = path
+        self.objects = {}
+        self.seen = {}
+        self.stats = {"unchanged": 0, "changed": 0}
+        self._lock = threading.Lock()
+
+        state_file = os.path.join(path, STATE_FILE)
+        if os.path.exists(state_file):
+            try:
+                with open(state_file, "r", encoding="utf-8") as f:
+                    self.objects = json.load(f)
+            except ValueError:
+                log("BackupState", f"{state_file} is not valid, running a full backup")
+
+    def get_unchanged(self, module, obj):
+        """
+        Gets the data saved in the last backup if the object has not been modified since.
+
+        :param module: Name of the backup module
+        :param obj: The object from the list response with id and lastModifiedDateTime
+        :return: The saved data or None if the object must be requested again
+        """
+        entry = self.objects.get(module, {}).get(obj["id"])
+        saved = None
+        if (
+            entry
+            and obj.get("lastModifiedDateTime")
+            and entry["lastModifiedDateTime"] == obj["lastModifiedDateTime"]
+            and os.path.exists(os.path.join(self.path, entry["file"]))
+        ):
+            file = os.path.join(self.path, entry["file"])
+            with open(file, "r", encoding="utf-8") as f:
+                data = load_file(file, f)
+            # The file has been changed outside of the backup if the hash does not match
+            if hash_data(data) == entry["hash"]:
+                saved = data
+
+        with self._lock:
+            self.stats["unchanged" if saved is not None else "changed"] += 1
+
+        return saved
+
+    def is_current(self, module, obj_id, file, data):
+        """
+        Checks if the file already holds the data, so it does not have to be written again.
+
+        :param module: Name of the backup module
+        :param obj_id: ID of the object
+        :param file: Path of the output file
+        :param data: The data to save
+        :return: True if the file holds the data
+        """
+        entry = self.objects.get(module, {}).get(obj_id)
+        return bool(
+            entry
+            and entry["file"] == os.path.relpath(file, self.path)
+            and entry["hash"] == hash_data(data)
+            and os.path.exists(file)
+        )
+
+    def record(self, module, obj_id, last_modified, file, data):
+        """
+        Records the object as backed up during this run.
+
+        :param module: Name of the backup module
+        :param obj_id: ID of the object
+        :param last_modified: lastModifiedDateTime of the object
+        :param file: Path of the output file
+        :param data: The saved data
+        """
+        with self._lock:
+            self.objects.setdefault(module, {})[obj_id] = {
+                "lastModifiedDateTime": last_modified,
+                "hash": hash_data(data),
+                "file": os.path.relpath(file, self.path),
+            }
+            self.seen.setdefault(module, set()).add(obj_id)
+
+    def save(self):
+        """Saves the state, objects of the modules that ran but were not backed up are removed."""
+        with self._lock:
+            for module, ids in self.seen.items():
+                self.objects[module] = {
+                    obj_id: entry
+                    for obj_id, entry in self.objects[module].items()
+                    if obj_id in ids
+                }
+
+            state_file = os.path.join(self.path, STATE_FILE)
+            with open(f"{state_file}.tmp", "w", encoding="utf-8") as f:
+                json.dump(self.objects, f, indent=2, sort_keys=True)
+            os.replace(f"{state_file}.tmp", state_file)
+
+        log(
+            "BackupState",
+            f"{self.stats['unchanged']} unchanged objects, {self.stats['changed']} changed objects",
+        )
+
+
+# The state of the running backup is kept in a dict so it can be replaced without a global statement
+_shared = {}
+
+
+def load_backup_state(path):
+    """
+    Loads the state of the last backup, the state is used by the backup modules until it is saved.
+
+    :param path: Path of the backup
+    :return: The BackupState
+    """
+    state = _shared["state"] = BackupState(path)
+    return state
+
+
+def get_backup_state():
+    """
+    Gets the state of the last backup.
+
+    :return: The BackupState or None if the backup is not incremental
+    """
+    return _shared.get("state")
+
+
+def save_backup_state():
+    """Saves the state and stops using it."""
+    state = _shared.get("state")
+    if state is not None:
+        state.save()
+        _shared.pop("state", None)
@@ -5,9 +5,7 @@
 This module is used to load a file into a dictionary.
 """
 
-import json
-
-import yaml
+from .serializer import load_json, load_yaml
 
 
 def load_file(filename, file):
@@ -19,11 +17,10 @@ def load_file(filename, file):
     """
 
     if filename.endswith(".yaml"):
-        data = json.dumps(yaml.safe_load(file))
-        repo_data = json.loads(data)
+        repo_data = load_yaml(file)
 
     elif filename.endswith(".json"):
-        repo_data = json.load(file)
+        repo_data = load_json(file)
 
     else:
         raise ValueError(f"{filename} is not a valid file type.")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module writes the backup files in the background while the backup modules keep requesting data from Graph.
+"""
+
+import queue
+import threading
+
+from .logger import log
+
+# Writes waiting for the writer, the backup modules wait when the queue is full
+MAX_PENDING = 1000
+
+
+class OutputWriter:
+    """
+    Runs writes with a worker thread and a bounded queue.
+
+    Errors raised by a write are kept and raised by flush, so a failed write fails the run.
+    """
+
+    def __init__(self, workers=1, max_pending=MAX_PENDING):
+        """
+        :param workers: Number of threads writing files
+        :param max_pending: Number of writes that can wait in the queue
+        """
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.errors = []
+        self._lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._work, name=f"OutputWriter-{i}", daemon=True)
+            for i in range(max(int(workers or 1), 1))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                func, args = item
+                func(*args)
+            # Any error is kept and raised by flush, the thread must keep running or flush would never return
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                log("OutputWriter", f"Write failed: {e}")
+                with self._lock:
+                    self.errors.append(e)
+            finally:
+                self.queue.task_done()
+
+    def submit(self, func, *args):
+        """
+        Adds a write to the queue.
+
+        :param func: The function that writes the file
+        :param args: Arguments for the function
+        """
+        self.queue.put((func, args))
+
+    def flush(self):
+        """Waits until all writes are done and raises the first error of the writes."""
+        self.queue.join()
+        with self._lock:
+            errors = self.errors
+            self.errors = []
+
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """Finishes the queued writes and stops the threads, errors are not raised."""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+# The running writer is kept in a dict so it can be replaced without a global statement
+_shared = {}
+
+
+def start_output_writer(workers=1):
+    """
+    Starts writing the files in the background until stop_output_writer is called.
+
+    :param workers: Number of threads writing files
+    """
+    stop_output_writer()
+    _shared["writer"] = OutputWriter(workers)
+
+
+def stop_output_writer():
+    """Finishes the queued writes and writes files directly again."""
+    writer = _shared.pop("writer", None)
+    if writer is not None:
+        writer.close()
+
+
+def write_output(func, *args):
+    """
+    Writes a file, in the background if the writer is started.
+
+    :param func: The function that writes the file
+    :param args: Arguments for the function
+    :return: The result of the function, None if the write was queued
+    """
+    writer = _shared.get("writer")
+    if writer is None:
+        return func(*args)
+
+    writer.submit(func, *args)
+    return None
+
+
+def flush_output():
+    """Waits until the files are written, raises the first error of the writes."""
+    writer = _shared.get("writer")
+    if writer is not None:
+        writer.flush()
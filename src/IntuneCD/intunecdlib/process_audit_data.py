@@ -5,8 +5,14 @@
 This module processes the audit data from Intune.
 """
 
+import datetime
+import os
+import re
 import subprocess
+import threading
+import time
 
+from .audit_index import AuditIndex
 from .logger import log
 
 
@@ -25,46 +31,6 @@ def _git_installed():
     return True
 
 
-def _configure_git(audit_record, path):
-    """
-    Configures git with the user email and name.
-
-    :param audit_record: The audit record to use for the configuration.
-    :param path: The path to the git repo.
-    """
-    cmd = [
-        "git",
-        "-C",
-        path,
-        "config",
-        "--local",
-        "user.email",
-        f"{audit_record['actor']}",
-    ]
-    log(
-        "_configure_git",
-        f"Running command {cmd} to configure git user email to {audit_record['actor']}.",
-    )
-    subprocess.run(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
-    )
-
-    # configure the user name for git commits
-    cmd = [
-        "git",
-        "-C",
-        path,
-        "config",
-        "--local",
-        "user.name",
-        f"{audit_record['actor']}",
-    ]
-    log("_configure_git", f"Running command {cmd} to configure git user name.")
-    subprocess.run(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
-    )
-
-
 def _check_if_git_repo(path, file):
     """
     Checks if the path is a git repo.
@@ -88,100 +54,293 @@ def _check_if_git_repo(path, file):
     return False
 
 
-def _git_check_modified(path, file):
+def _git_run(path, *args):
     """
-    Checks if the file has been modified.
+    Runs a git command in the repo and returns the output, None if the command failed.
 
     :param path: The path to the git repo.
-    :param file: The file to check.
+    :param args: The arguments for git.
     """
-    cmd = ["git", "-C", path, "diff", "--name-only", f"{file}"]
-    log(
-        "_git_check_modified",
-        f"Running command {cmd} to check if {file} has been modified.",
-    )
+    cmd = ["git", "-C", path, *args]
     result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-    return result.stdout
+    if result.returncode != 0:
+        log("_git_run", f"Command {cmd} failed, error: {result.stderr}")
+        return None
+
+    return result.stdout.strip()
 
 
-def _git_check_new_file(path, file):
+def _git_changed_files(root, path):
     """
-    Checks if the file is a new file.
+    Gets the files in the path that are modified or not known to git.
 
-    :param path: The path to the git repo.
-    :param file: The file to check.
+    git status can not read the paths from stdin, the whole path is checked with one pathspec
+    so the command line does not grow with the number of files.
+
+    :param root: The top level directory of the git repo.
+    :param path: The path to check.
+    :return: Set of paths relative to the top level directory, None if git status failed.
     """
-    # check if it is a new file
-    cmd = ["git", "-C", path, "ls-files", "--error-unmatch", f"{file}"]
-    log(
-        "_git_check_new_file",
-        f"Running command {cmd} to check if {file} is a new file.",
-    )
-    new_file_result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-    # check if "did not match any file(s) known to git" is in the stderr
-    if "did not match any file(s) known to git" in new_file_result.stderr:
-        return True
+    pathspec = os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/")
+    cmd = [
+        "git",
+        "--literal-pathspecs",
+        "-C",
+        root,
+        "status",
+        "--porcelain",
+        "-z",
+        "--untracked-files=all",
+        "--",
+        pathspec,
+    ]
+    log("_git_changed_files", f"Running command {cmd} to find the changed files.")
+    result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        log("_git_changed_files", f"git status failed, error: {result.stderr}")
+        return None
 
-    return False
+    changed = set()
+    entries = iter(result.stdout.split("\0"))
+    for entry in entries:
+        if not entry:
+            continue
+        # Renamed and copied entries are followed by the original path
+        if entry[0] in "RC":
+            next(entries, None)
+        changed.add(entry[3:])
 
+    return changed
 
-def _git_commit_changes(audit_record, path, file):
+
+def _git_reset_files(root, files):
     """
-    Commits the changes to the git repo.
+    Resets the index of the files to HEAD, the paths are passed on stdin.
 
-    :param audit_record: The audit record to use for the commit.
-    :param path: The path to the git repo.
-    :param file: The file to commit.
+    :param root: The top level directory of the git repo.
+    :param files: The files to reset, relative to the top level directory.
     """
-    # commit the changes
-    cmd = ["git", "-C", path, "add", f"{file}"]
-    log("_git_commit_changes", f"Running command {cmd} to add {file} to the git repo.")
-    subprocess.run(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
-    )
-    log("_git_commit_changes", f"Committing the changes to {file}.")
     cmd = [
         "git",
+        "--literal-pathspecs",
         "-C",
-        path,
-        "commit",
-        "-m",
-        (
-            f"{audit_record['auditResourceType']} {audit_record['activityOperationType']} by {audit_record['actor']}\n"
-            f"Date: {audit_record['activityDateTime']}\n"
-            f"result: {audit_record['activityResult']}"
-        ),
+        root,
+        "reset",
+        "-q",
+        "--pathspec-from-file=-",
+        "--pathspec-file-nul",
     ]
+    log("_git_reset_files", f"Running git reset for {len(files)} files.")
+    result = subprocess.run(
+        cmd, input="\0".join(files), capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        log("_git_reset_files", f"git reset failed, error: {result.stderr}")
+
 
-    commit = subprocess.run(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
+def _quote_path(path):
+    """
+    Quotes a path for git fast-import.
+
+    :param path: The path to quote.
+    """
+    path = path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{path}"'
+
+
+def _git_timestamp(date):
+    """
+    Gets the timestamp of an audit record in the git date format.
+
+    :param date: The activityDateTime of the audit record.
+    """
+    try:
+        date = datetime.datetime.strptime(date[:19], "%Y-%m-%dT%H:%M:%S")
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    except (TypeError, ValueError):
+        date = datetime.datetime.now(datetime.timezone.utc)
+
+    return f"{int(date.timestamp())} +0000"
+
+
+def _commit_message(audit_record):
+    """
+    Gets the commit message for an audit record.
+
+    :param audit_record: The audit record to use for the commit.
+    """
+    return (
+        f"{audit_record['auditResourceType']} {audit_record['activityOperationType']} by {audit_record['actor']}\n"
+        f"Date: {audit_record['activityDateTime']}\n"
+        f"result: {audit_record['activityResult']}"
     )
 
-    if commit.returncode == 0:
-        log("_git_commit_changes", "Commit was successful.")
-    else:
-        log("_git_commit_changes", f"Commit was not successful, error: {commit.stderr}")
+
+def _fast_import_stream(ref, parent, commits):
+    """
+    Creates the git fast-import stream with one commit for each file.
+
+    :param ref: The branch to commit to.
+    :param parent: The commit the branch points to, None if the branch has no commits.
+    :param commits: List of tuples with the path relative to the repo, the file content and the audit record.
+    """
+    stream = []
+    now = f"{int(time.time())} +0000"
+    for path, content, record in commits:
+        actor = re.sub(r"[<>\n]", "", str(record["actor"]))
+        message = _commit_message(record).encode("utf-8")
+        stream.append(f"commit {ref}\n".encode("utf-8"))
+        stream.append(
+            f"author {actor} <{actor}> {_git_timestamp(record['activityDateTime'])}\n".encode(
+                "utf-8"
+            )
+        )
+        stream.append(f"committer {actor} <{actor}> {now}\n".encode("utf-8"))
+        stream.append(f"data {len(message)}\n".encode("utf-8") + message + b"\n")
+        if parent:
+            stream.append(f"from {parent}\n".encode("utf-8"))
+            parent = None
+        stream.append(f"M 100644 inline {_quote_path(path)}\n".encode("utf-8"))
+        stream.append(f"data {len(content)}\n".encode("utf-8") + content + b"\n\n")
+
+    stream.append(b"done\n")
+    return b"".join(stream)
+
+
+class AuditCommits:
+    """
+    The files saved during the run with the audit record of their latest change.
+
+    If the path is a git repo and git is installed is only checked once for each path. The changed
+    files are found with one git status and all commits are written with one git fast-import, with
+    the actor of each change as author. The index is updated afterwards so the working tree is clean.
+    """
+
+    def __init__(self):
+        self.changes = {}
+        self.repos = {}
+        self._lock = threading.Lock()
+
+    def is_repo(self, path):
+        """
+        Checks if the path is a git repo and git is installed, only the first call for a path runs git.
+
+        :param path: The path to check.
+        """
+        with self._lock:
+            if path not in self.repos:
+                self.repos[path] = _check_if_git_repo(path, path) and _git_installed()
+
+            return self.repos[path]
+
+    def add(self, path, file, audit_record):
+        """
+        Adds a file to commit, a file added more than once is committed with the first record.
+
+        :param path: The path to the git repo.
+        :param file: The file to commit.
+        :param audit_record: The audit record to use for the commit.
+        """
+        with self._lock:
+            self.changes.setdefault(path, {}).setdefault(
+                os.path.abspath(file), audit_record
+            )
+
+    def commit(self):
+        """Commits the added files, the files are removed afterwards."""
+        with self._lock:
+            changes = self.changes
+            self.changes = {}
+
+        for path, files in changes.items():
+            self._commit_path(path, files)
+
+    def reset(self):
+        """Removes the added files and the checked paths."""
+        with self._lock:
+            self.changes = {}
+            self.repos = {}
+
+    def _commit_path(self, path, files):
+        root = _git_run(path, "rev-parse", "--show-toplevel")
+        ref = _git_run(path, "symbolic-ref", "-q", "HEAD")
+        if not root or not ref:
+            log("AuditCommits", f"{path} is not on a branch, no changes committed.")
+            return
+        parent = _git_run(path, "rev-parse", "--verify", "-q", "HEAD")
+
+        relative = {
+            os.path.relpath(file, root).replace(os.sep, "/"): record
+            for file, record in files.items()
+        }
+        changed = _git_changed_files(root, path)
+        if changed is None:
+            log(
+                "AuditCommits",
+                "Could not find the changed files, no changes committed.",
+            )
+            return
+
+        commits = []
+        for file, record in relative.items():
+            if file not in changed:
+                log(
+                    "AuditCommits",
+                    f"{file} has not been modified, no changes to commit.",
+                )
+                continue
+            with open(os.path.join(root, file), "rb") as f:
+                commits.append((file, f.read(), record))
+
+        if not commits:
+            return
+
+        cmd = ["git", "-C", root, "fast-import", "--quiet", "--done"]
+        log("AuditCommits", f"Running git fast-import to commit {len(commits)} files.")
+        result = subprocess.run(
+            cmd,
+            input=_fast_import_stream(ref, parent, commits),
+            capture_output=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            log(
+                "AuditCommits",
+                f"Commit was not successful, error: {result.stderr.decode('utf-8', 'replace')}",
+            )
+            return
+
+        # fast-import does not touch the index, reset the committed files to the new commits.
+        # Other changes staged in the repo are kept.
+        _git_reset_files(root, [file for file, _, _ in commits])
+        log("AuditCommits", f"Committed {len(commits)} files.")
+
+
+_commits = AuditCommits()
+
+
+def commit_audit_changes():
+    """Commits the files saved during the run, called once all backup modules are done."""
+    _commits.commit()
+
+
+def reset_audit_commits():
+    """Removes the files to commit, used to start a new run."""
+    _commits.reset()
 
 
 def _get_payload_from_audit_data(audit_data, compare_data):
     """
     Gets the payload from the audit data.
 
-    :param audit_data: The audit data to get the payload from.
+    :param audit_data: The AuditIndex or list of audit records to get the payload from.
     :param compare_data: The data to compare the audit data to.
     """
 
-    records = []
-    for record in audit_data:
-        if record[compare_data["type"]] == compare_data["value"]:
-            records.append(record)
-
-    if records:
-        # sort the records by activityDateTime
-        records.sort(key=lambda x: x["activityDateTime"], reverse=True)
-        records = records[0]
+    if not isinstance(audit_data, AuditIndex):
+        audit_data = AuditIndex(audit_data)
 
-    return records
+    return audit_data.get_latest(compare_data) or []
 
 
 def process_audit_data(audit_data, compare_data, path, file):
@@ -195,33 +354,15 @@ def process_audit_data(audit_data, compare_data, path, file):
     """
 
     log("process_audit_data", f"Processing audit data for {file} in path {path}.")
-    # determine if the path we are using is a git repo
-    git_repo = _check_if_git_repo(path, file)
-
-    # Commit the changes
-    if git_repo:
-        record = _get_payload_from_audit_data(audit_data, compare_data)
-        if not record:
-            log("process_audit_data", f"No audit data found for {file}.")
-            return False
-        # check if git is installed
-        if not _git_installed():
-            return
-        # configure git
-        _configure_git(record, path)
-        # check if file has been modified
-        result = _git_check_modified(path, file)
-
-        if not result:
-            file_not_found = _git_check_new_file(path, file)
-
-        if result or file_not_found:
-            # commit the changes
-            _git_commit_changes(record, path, file)
-        else:
-            log(
-                "process_audit_data",
-                f"{file} has not been modified, no changes to commit.",
-            )
+    if not _commits.is_repo(path):
+        return
+
+    record = _get_payload_from_audit_data(audit_data, compare_data)
+    if not record:
+        log("process_audit_data", f"No audit data found for {file}.")
+        return False
+
+    # The file is committed with the other files once all backup modules are done
+    _commits.add(path, file, record)
 
     log("process_audit_data", "Audit data has been processed.")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module contains the $select projections used to only request the properties that are used from Graph.
+"""
+
+import os
+
+# Properties to request for each projection. Only requests where the used properties are known
+# up front have a projection, polymorphic collections such as mobileApps and deviceConfigurations
+# are saved with the properties of each derived type and are always requested in full.
+PROJECTIONS = {
+    # Lookups used to resolve IDs to names
+    "apps": "id,displayName",
+    "groups": "id,displayName,groupTypes,membershipRule",
+    "assignmentFilters": "id,displayName",
+    "complianceScripts": "id,displayName",
+    "reusablePolicySettingNames": "id,displayName",
+    "appScopeTags": "id,roleScopeTagIds",
+    # Lists of objects that are requested in full by ID afterwards
+    "conditionalAccessList": "id,displayName",
+    "notificationTemplateList": "id,displayName",
+    "reusablePolicySettingList": "id,displayName",
+    # Objects
+    "reusablePolicySettings": "id,settinginstance,displayname,description,settingDefinitionId,version",
+}
+
+
+def get_projection(name):
+    """
+    Gets the properties to request, no properties are returned when FULL_PAYLOAD is set.
+
+    :param name: Name of the projection
+    :return: Comma separated properties or None if the full object should be requested
+    """
+    if os.getenv("FULL_PAYLOAD"):
+        return None
+
+    return PROJECTIONS.get(name)
+
+
+def select_param(name):
+    """
+    Gets the query parameters for a request with makeapirequest.
+
+    :param name: Name of the projection
+    :return: Dict with $select or None if the full object should be requested
+    """
+    projection = get_projection(name)
+    if projection is None:
+        return None
+
+    return {"$select": projection}
+
+
+def select_query(name):
+    """
+    Gets the query string for a batch request.
+
+    :param name: Name of the projection
+    :return: Query string with $select or an empty string if the full object should be requested
+    """
+    projection = get_projection(name)
+    if projection is None:
+        return ""
+
+    return f"?$select={projection}"
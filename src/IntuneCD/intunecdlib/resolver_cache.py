@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module contains the run-wide cache used to resolve group and filter IDs to names.
+"""
+
+import threading
+
+from .logger import log
+
+
+class ResolverCache:
+    """
+    A lazily populated cache of Graph objects keyed by ID.
+
+    IDs that could not be resolved are cached as None so they are not requested again.
+    """
+
+    def __init__(self, name):
+        """
+        :param name: Name of the cache
+        """
+        self.name = name
+        self.entries = {}
+        self.stats = {"hits": 0, "misses": 0}
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def preload(self, fetch):
+        """
+        Fills the cache with all objects, only the first call in a run fetches the objects.
+
+        :param fetch: Function that returns a list of all objects with an "id" key
+        """
+        with self._lock:
+            if self.loaded:
+                return
+            # Other threads wait for the lock, so they see the loaded objects
+            for value in fetch() or []:
+                self.entries[value["id"]] = value
+            self.loaded = True
+
+    def add(self, values):
+        """
+        Adds objects that were already requested, e.g. as part of a backup.
+
+        :param values: List of objects with an "id" key
+        """
+        with self._lock:
+            for value in values or []:
+                self.entries[value["id"]] = value
+
+    def resolve(self, ids, fetch):
+        """
+        Resolves the IDs, only IDs not already in the cache are fetched.
+
+        :param ids: List of IDs to resolve, duplicates are ignored
+        :param fetch: Function that takes a list of IDs and returns a list of objects with an "id" key
+        :return: Dict of the resolved objects keyed by ID
+        """
+        ids = list(dict.fromkeys(i for i in ids if i))
+        with self._lock:
+            missing = [i for i in ids if i not in self.entries]
+            self.stats["hits"] += len(ids) - len(missing)
+            self.stats["misses"] += len(missing)
+
+        if missing:
+            fetched = {
+                value.get("id"): value for value in fetch(missing) or [] if value
+            }
+            with self._lock:
+                for i in missing:
+                    self.entries[i] = fetched.get(i)
+
+        return {i: self.entries[i] for i in ids if self.entries.get(i) is not None}
+
+    def clear(self):
+        """Removes all entries and resets the counters."""
+        with self._lock:
+            self.entries.clear()
+            self.stats = {"hits": 0, "misses": 0}
+            self.loaded = False
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name):
+    """
+    Gets the shared cache, the cache is created on first use.
+
+    :param name: Name of the cache, e.g. "groups" or "filters"
+    :return: The ResolverCache
+    """
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(name, ResolverCache(name))
+
+    return cache
+
+
+def reset_caches():
+    """Removes all caches, used to start a new run with an empty cache."""
+    with _caches_lock:
+        _caches.clear()
+
+
+def get_cache_stats():
+    """
+    Gets the hit and miss counters for each cache.
+
+    :return: Dict of counters keyed by cache name
+    """
+    return {name: dict(cache.stats) for name, cache in _caches.items()}
+
+
+def log_cache_stats():
+    """Logs the hit and miss counters for each cache."""
+    for name, stats in get_cache_stats().items():
+        log(
+            "log_cache_stats",
+            f"{name}: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{len(_caches[name].entries)} cached",
+        )
@@ -5,31 +5,112 @@
 This module is used to save the configuration to a file.
 """
 
-import json
 import os
+import threading
 
-import yaml
+from .output_writer import write_output
+from .serializer import dump_json, dump_yaml
+
+_stats = {"written": 0, "unchanged": 0}
+_stats_lock = threading.Lock()
+
+
+def _serialize(output, data):
+    """
+    Serializes the configuration in JSON or YAML format.
+
+    :param output: The format the configuration will be saved as
+    :param data: The configuration data
+    :return: The serialized configuration
+    """
+    if output == "yaml":
+        return dump_yaml(data)
+    if output == "json":
+        return dump_json(data)
+
+    raise ValueError("Invalid output format")
+
+
+def write_if_changed(file, content):
+    """
+    Writes the content to the file unless the file already has the same content.
+    The content is written to a temporary file which replaces the file, so the file is never partially written.
+
+    :param file: Path of the file
+    :param content: The content to write
+    :return: True if the file was written
+    """
+    # Newlines are translated the way a file opened with "w" would, e.g. to CRLF on Windows.
+    # The content is then compared and written as bytes so the file matches what is written.
+    content = content.replace("\n", os.linesep).encode("utf-8")
+    if os.path.exists(file):
+        with open(file, "rb") as f:
+            if f.read() == content:
+                with _stats_lock:
+                    _stats["unchanged"] += 1
+                return False
+
+    with open(f"{file}.tmp", "wb") as f:
+        f.write(content)
+    os.replace(f"{file}.tmp", file)
+
+    with _stats_lock:
+        _stats["written"] += 1
+
+    return True
+
+
+def _write_file(file, content):
+    directory = os.path.dirname(file)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+
+    return write_if_changed(file, content)
+
+
+def save_file(file, content):
+    """
+    This function saves text, e.g. a script or a payload, to a file.
+    The directory is created if needed and the file is written in the background if the output writer is started.
+
+    :param file: Path of the file
+    :param content: The text to save
+    :return: True if the file was written, None if the write was queued
+    """
+
+    return write_output(_write_file, file, content)
 
 
 def save_output(output, configpath, fname, data):
     """
     This function saves the configuration to a file in JSON or YAML format.
+    The file is not written if it already has the same configuration.
 
     :param output: The format the configuration will be saved as
     :param configpath: The path to save the configuration to
     :param fname: The filename of the configuration
     :param data: The configuration data
+    :return: True if the file was written, None if the write was queued
     """
 
-    if not os.path.exists(configpath):
-        os.makedirs(configpath)
+    # Serialized before the write is queued, so changes to the data after the call are not saved
+    content = _serialize(output, data)
 
-    if output == "yaml":
-        with open(configpath + fname + ".yaml", "w", encoding="utf-8") as yamlFile:
-            yaml.dump(data, yamlFile, sort_keys=False, default_flow_style=False)
-    elif output == "json":
-        with open(configpath + fname + ".json", "w", encoding="utf-8") as jsonFile:
-            json.dump(data, jsonFile, indent=5)
-
-    else:
-        raise ValueError("Invalid output format")
+    return save_file(f"{configpath}{fname}.{output}", content)
+
+
+def get_output_stats():
+    """
+    Gets the number of files written and files that were unchanged.
+
+    :return: Dict with the written and unchanged counters
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_output_stats():
+    """Resets the counters, used to start a new run."""
+    with _stats_lock:
+        _stats["written"] = 0
+        _stats["unchanged"] = 0
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module serializes the configurations saved as JSON or YAML files.
+
+orjson is used to load JSON and libyaml to load YAML when they are installed, the standard
+library and the pure Python YAML loader are used otherwise. The loaded data is the same with
+either backend.
+"""
+
+import json
+
+import yaml
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+
+def dump_json(data):
+    """
+    Serializes the data as JSON.
+
+    orjson only supports an indent of two spaces and does not escape non-ASCII characters,
+    the standard library is always used so the saved files do not change.
+
+    :param data: The data to serialize
+    :return: The JSON string
+    """
+    return json.dumps(data, indent=5)
+
+
+def load_json(file):
+    """
+    Loads JSON from a file.
+
+    :param file: The file object to load
+    :return: The loaded data
+    """
+    content = file.read()
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the standard library, e.g. for NaN or big integers
+            pass
+
+    return json.loads(content)
+
+
+def dump_yaml(data):
+    """
+    Serializes the data as YAML.
+
+    The libyaml emitter folds long double quoted strings differently, the pure Python dumper
+    is always used so the saved files do not change.
+
+    :param data: The data to serialize
+    :return: The YAML string
+    """
+    return yaml.dump(data, sort_keys=False, default_flow_style=False)
+
+
+def _json_keys(data):
+    """
+    Converts keys that are not strings the way JSON would, e.g. 1 to "1" and True to "true".
+
+    :param data: The loaded YAML data
+    :return: The data with only string keys
+    """
+    if isinstance(data, dict):
+        return {
+            (key if isinstance(key, str) else json.dumps(key)): _json_keys(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [_json_keys(value) for value in data]
+
+    return data
+
+
+def load_yaml(file):
+    """
+    Loads YAML from a file, the data is the same as if it was saved as JSON.
+
+    :param file: The file object to load
+    :return: The loaded data
+    """
+    return _json_keys(yaml.load(file, Loader=YamlLoader))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module runs backup tasks concurrently while respecting the dependencies between them.
+"""
+
+import contextvars
+import io
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .logger import log
+
+# The output buffer of the running task, threads started for the task with submit_in_task share it
+_task_buffer = contextvars.ContextVar("task_buffer", default=None)
+
+
+class GroupedOutput(io.TextIOBase):
+    """
+    A stdout replacement that buffers the output of each task.
+
+    Output written by a task, including the threads it submits with submit_in_task, is kept in a
+    buffer for that task and written to the wrapped stream in one piece when the task is done, so
+    the output of concurrent tasks is not interleaved. Output from any other thread is written
+    straight through.
+    """
+
+    def __init__(self, stream):
+        """
+        :param stream: The stream to write to
+        """
+        super().__init__()
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        buffer = _task_buffer.get()
+        with self._lock:
+            if buffer is not None:
+                return buffer.write(s)
+            return self.stream.write(s)
+
+    def flush(self):
+        self.stream.flush()
+
+    def start(self):
+        """
+        Starts buffering the output of the current task.
+
+        :return: Token used to stop buffering with release
+        """
+        return _task_buffer.set(io.StringIO())
+
+    def release(self, token):
+        """
+        Writes the buffered output of the current task to the stream.
+
+        :param token: The token returned by start
+        """
+        buffer = _task_buffer.get()
+        _task_buffer.reset(token)
+        with self._lock:
+            self.stream.write(buffer.getvalue())
+            self.stream.flush()
+
+
+def submit_in_task(executor, func, *args):
+    """
+    Submits a function to an executor in the context of the current task, so its output is
+    grouped with the output of the task.
+
+    :param executor: The executor to submit to
+    :param func: The function to run
+    :param args: Arguments for the function
+    :return: The future of the function
+    """
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+
+class Task:
+    """A function to run, the names of the tasks it depends on and if its result should be collected."""
+
+    def __init__(self, name, func, args, kwargs, depends_on, collect):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.depends_on = depends_on
+        self.collect = collect
+
+
+class TaskRunner:
+    """
+    Runs tasks with a pool of workers.
+
+    The result of each dependency is passed to the task as a keyword argument named after the
+    dependency. With one worker the tasks are run one by one in the order they were added.
+    """
+
+    def __init__(self, workers=1):
+        """
+        :param workers: Number of tasks to run at the same time
+        """
+        self.workers = max(int(workers or 1), 1)
+        self.tasks = {}
+
+    def add(self, name, func, *args, depends_on=(), collect=True, **kwargs):
+        """
+        Adds a task, dependencies must be added before the tasks that depend on them.
+
+        :param name: Unique name of the task
+        :param func: The function to run
+        :param depends_on: Names of the tasks that must be done before this task is started
+        :param collect: If the result should be part of the results returned by run
+        """
+        if name in self.tasks:
+            raise ValueError(f"Task {name} has already been added")
+        for dependency in depends_on:
+            if dependency not in self.tasks:
+                raise ValueError(
+                    f"Task {name} depends on {dependency} which has not been added"
+                )
+
+        self.tasks[name] = Task(name, func, args, kwargs, tuple(depends_on), collect)
+
+    def _call(self, task, done):
+        kwargs = dict(task.kwargs)
+        for dependency in task.depends_on:
+            kwargs[dependency] = done[dependency]
+
+        log("TaskRunner", f"Running task {task.name}")
+        return task.func(*task.args, **kwargs)
+
+    def _call_grouped(self, output, task, done):
+        token = output.start()
+        try:
+            return self._call(task, done)
+        finally:
+            output.release(token)
+
+    def run(self):
+        """
+        Runs all tasks.
+
+        :return: List of the collected results in the order the tasks were added
+        """
+        done = {}
+
+        if self.workers == 1:
+            for task in self.tasks.values():
+                done[task.name] = self._call(task, done)
+        else:
+            self._run_concurrent(done)
+
+        return [done[task.name] for task in self.tasks.values() if task.collect]
+
+    def _run_concurrent(self, done):
+        pending = list(self.tasks.values())
+        running = {}
+        output = GroupedOutput(sys.stdout)
+        old_stdout = sys.stdout
+        sys.stdout = output
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while pending or running:
+                    for task in [
+                        t for t in pending if all(d in done for d in t.depends_on)
+                    ]:
+                        pending.remove(task)
+                        future = executor.submit(self._call_grouped, output, task, done)
+                        running[future] = task
+
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        task = running.pop(future)
+                        # Raises the exception of a failed task, tasks not started yet are skipped
+                        done[task.name] = future.result()
+        finally:
+            sys.stdout = old_stdout
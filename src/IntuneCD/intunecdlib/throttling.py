@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module contains the retry and throttling engine used for all requests to Microsoft Graph and Azure.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+
+from .logger import log
+
+RETRY_CODES = [429, 502, 503, 504]
+# Retries for 5xx responses
+MAX_RETRIES = 3
+# Methods that are safe to send again after a 5xx response
+IDEMPOTENT_METHODS = ("GET", "DELETE")
+# Retries for 5xx responses to writes, a write that failed with a 5xx may still have been done
+# so it is sent again at most once, like before the retry engine
+MAX_WRITE_RETRIES = {"POST": 1}
+# Retries for 429 responses, these are expected under load and are always safe to retry
+MAX_THROTTLE_RETRIES = 10
+BASE_DELAY = 2
+MAX_DELAY = 60
+# Matches Intune paths in full endpoints and in the relative URLs of batched requests
+INTUNE_PATTERN = re.compile(r"(^|/)device(App)?Management")
+
+
+class ThrottleBucket:
+    """
+    A token bucket for one service.
+
+    Every request takes a token before it is sent. When any response carries Retry-After
+    the bucket is paused, which holds back all requests to the service until the pause ends.
+    """
+
+    def __init__(self, name, rate, capacity):
+        """
+        :param name: Name of the service
+        :param rate: Number of tokens added per second
+        :param capacity: Maximum number of tokens in the bucket
+        """
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "wait_seconds": 0,
+        }
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a token from the bucket, sleeps if the bucket is empty or paused."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            # Reserve the token up front so concurrent callers queue behind each other
+            self.tokens -= 1
+            wait = max(-self.tokens / self.rate, self.paused_until - now, 0)
+            self.stats["requests"] += 1
+            self.stats["wait_seconds"] += wait
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Pauses all requests to the service.
+
+        :param seconds: Number of seconds to pause for
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def record(self, status_code, retry):
+        """
+        Updates the counters for a response.
+
+        :param status_code: Status code of the response
+        :param retry: True if the request will be retried
+        """
+        with self._lock:
+            if status_code == 429:
+                self.stats["throttled"] += 1
+            elif status_code in RETRY_CODES:
+                self.stats["server_errors"] += 1
+            if retry:
+                self.stats["retries"] += 1
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_service(endpoint):
+    """
+    Gets the name of the service the endpoint belongs to.
+
+    :param endpoint: The endpoint of the request or the relative URL of a batched request
+    :return: Name of the service
+    """
+    if "main.iam.ad.ext.azure.com" in endpoint:
+        return "azure"
+    if INTUNE_PATTERN.search(endpoint):
+        return "intune"
+
+    return "entra"
+
+
+def get_bucket(service):
+    """
+    Gets the shared bucket for the service, the bucket is created on first use.
+    The refill rate and capacity can be configured with the THROTTLE_RATE and THROTTLE_CAPACITY
+    environment variables.
+
+    :param service: Name of the service
+    :return: The ThrottleBucket for the service
+    """
+    bucket = _buckets.get(service)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(service)
+            if bucket is None:
+                rate = float(os.getenv("THROTTLE_RATE", "50"))
+                capacity = float(os.getenv("THROTTLE_CAPACITY", "100"))
+                bucket = ThrottleBucket(service, rate, capacity)
+                _buckets[service] = bucket
+
+    return bucket
+
+
+def reset_buckets():
+    """Removes all buckets, used to start a new run with clean counters."""
+    with _buckets_lock:
+        _buckets.clear()
+
+
+def get_retry_after(response):
+    """
+    Gets the Retry-After value from the response headers.
+
+    :param response: The response object
+    :return: Number of seconds to wait or None if the header is not set
+    """
+    headers = response.headers or {}
+    retry_after = headers.get("Retry-After")
+    if retry_after is None:
+        return None
+    try:
+        return max(int(retry_after), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt):
+    """
+    Gets the time to wait before the next retry using exponential backoff with jitter.
+
+    :param attempt: Number of retries done so far
+    :return: Number of seconds to wait
+    """
+    delay = min(MAX_DELAY, BASE_DELAY * 2**attempt)
+    return random.uniform(delay / 2, delay)
+
+
+def get_max_retries(method):
+    """
+    Gets the number of retries for 5xx responses to a request, 429 responses are always retried.
+
+    :param method: HTTP method of the request
+    :return: Number of retries
+    """
+    if method.upper() in IDEMPOTENT_METHODS:
+        return MAX_RETRIES
+
+    return MAX_WRITE_RETRIES.get(method.upper(), 0)
+
+
+def send_with_retry(endpoint, send, service=None, max_retries=MAX_RETRIES):
+    """
+    Sends a request and retries it when it is throttled or fails with a transient error.
+
+    :param endpoint: The endpoint of the request, used to select the service bucket
+    :param send: Function that sends the request and returns the response
+    :param service: Name of the service, used instead of the endpoint, e.g. for $batch requests
+    :param max_retries: Number of retries for 5xx responses
+    :return: The last response
+    """
+    bucket = get_bucket(service or get_service(endpoint))
+    retries = 0
+    throttle_retries = 0
+
+    while True:
+        bucket.acquire()
+        response = send()
+        status_code = response.status_code
+
+        if status_code == 429:
+            retry = throttle_retries < MAX_THROTTLE_RETRIES
+            throttle_retries += 1
+        elif status_code in RETRY_CODES:
+            retry = retries < max_retries
+            retries += 1
+        else:
+            retry = False
+
+        bucket.record(status_code, retry)
+        if not retry:
+            return response
+
+        retry_after = get_retry_after(response)
+        if retry_after is not None:
+            print(f"Hit Graph throttling, trying again after {retry_after} seconds")
+            bucket.pause(retry_after)
+        else:
+            delay = backoff_delay(retries + throttle_retries - 1)
+            print(
+                f"Ran into issues with Graph request, waiting {delay:.0f} seconds and trying again..."
+            )
+            time.sleep(delay)
+
+
+def get_throttle_stats():
+    """
+    Gets the request counters for each service.
+
+    :return: Dict of counters keyed by service name
+    """
+    return {name: dict(bucket.stats) for name, bucket in _buckets.items()}
+
+
+def log_throttle_stats():
+    """Logs the request counters for each service."""
+    for name, stats in get_throttle_stats().items():
+        log(
+            "log_throttle_stats",
+            f"{name}: {stats['requests']} requests, {stats['retries']} retries, "
+            f"{stats['throttled']} throttled, {stats['server_errors']} server errors, "
+            f"{stats['wait_seconds']:.1f} seconds waited",
+        )
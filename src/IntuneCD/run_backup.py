@@ -30,8 +30,20 @@ from io import StringIO
 from .backup_entra import backup_entra
 from .backup_intune import backup_intune
 from .intunecdlib.archive import move_to_archive
+from .intunecdlib.audit_index import reset_audit_index
 from .intunecdlib.get_accesstoken import obtain_azure_token
 from .intunecdlib.get_authparams import getAuth
+from .intunecdlib.graph_batch import reset_batch_pacer
+from .intunecdlib.incremental import load_backup_state, save_backup_state
+from .intunecdlib.output_writer import (
+    flush_output,
+    start_output_writer,
+    stop_output_writer,
+)
+from .intunecdlib.process_audit_data import commit_audit_changes, reset_audit_commits
+from .intunecdlib.resolver_cache import log_cache_stats, reset_caches
+from .intunecdlib.save_output import get_output_stats, reset_output_stats
+from .intunecdlib.throttling import log_throttle_stats
 
 REPO_DIR = os.environ.get("REPO_DIR")
 
@@ -191,6 +203,32 @@ def start():
         help="The scopes to use when obtaining an access token interactively separated by space. Only used when using interactive auth. Default is: DeviceManagementApps.ReadWrite.All, DeviceManagementConfiguration.ReadWrite.All, DeviceManagementManagedDevices.Read.All, DeviceManagementServiceConfig.ReadWrite.All, DeviceManagementRBAC.ReadWrite.All, Group.Read.All, Policy.ReadWrite.ConditionalAccess, Policy.Read.All",
         nargs="+",
     )
+    parser.add_argument(
+        "--workers",
+        help="Number of backup modules to run at the same time. Default is 1",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--incremental",
+        help="When set, objects that have not been modified since the last backup are not requested and saved again. The state of the last backup is kept in .intunecd_state.json in the backup path",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--full-payload",
+        help="When set, requests full objects from Graph instead of only the properties that are used",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--batch-size",
+        help="Maximum number of requests in a Graph batch request, between 1 and 20. Batches are made smaller while Graph is throttling. Default is 20",
+        type=int,
+    )
+    parser.add_argument(
+        "--batch-concurrency",
+        help="Maximum number of Graph batch requests sent at the same time. Fewer are sent while Graph is throttling. Default is 4",
+        type=int,
+    )
     parser.add_argument(
         "-v", "--verbose", help="Prints verbose output", action="store_true"
     )
@@ -204,6 +242,12 @@ def start():
 
     if args.verbose:
         os.environ["VERBOSE"] = "True"
+    if args.full_payload:
+        os.environ["FULL_PAYLOAD"] = "True"
+    if args.batch_size:
+        os.environ["BATCH_SIZE"] = str(args.batch_size)
+    if args.batch_concurrency:
+        os.environ["BATCH_CONCURRENCY"] = str(args.batch_concurrency)
 
     def devtoprod():
         return "devtoprod"
@@ -249,19 +293,39 @@ def start():
 
     def run_backup(path, output, exclude, token, prefix, append_id):
         results = []
+        reset_caches()
+        reset_batch_pacer()
+        reset_audit_index()
+        reset_audit_commits()
+        reset_output_stats()
+        start_output_writer()
+        try:
+            if args.incremental:
+                load_backup_state(path)
 
-        if args.entrabackup:
-            print("***Entra backup***")
+            if args.entrabackup:
+                print("***Entra backup***")
 
-            backup_entra(results, path, output, token, azure_token, args, exclude)
+                backup_entra(results, path, output, token, azure_token, args, exclude)
 
-            print("***Intune backup***")
+                print("***Intune backup***")
 
-        backup_intune(results, path, output, exclude, token, prefix, append_id, args)
+            backup_intune(
+                results, path, output, exclude, token, prefix, append_id, args
+            )
+            # The files must be written before they are committed
+            flush_output()
+            commit_audit_changes()
 
-        from .intunecdlib.assignment_report import get_group_report
+            from .intunecdlib.assignment_report import get_group_report
 
-        get_group_report(path, output)
+            get_group_report(path, output)
+        finally:
+            # Files already fetched are written even if the backup failed
+            try:
+                flush_output()
+            finally:
+                stop_output_writer()
 
         config_count = sum([result.get("config_count", 0) for result in results])
 
@@ -274,6 +338,16 @@ def start():
         ]
 
         move_to_archive(path, created_files, output)
+        save_backup_state()
+
+        log_throttle_stats()
+        log_cache_stats()
+
+        output_stats = get_output_stats()
+        print(
+            f"***{output_stats['written']} files written, "
+            f"{output_stats['unchanged']} files unchanged***"
+        )
 
         return config_count
 
@@ -29,6 +29,9 @@ from io import StringIO
 
 from .intunecdlib.get_accesstoken import obtain_azure_token
 from .intunecdlib.get_authparams import getAuth
+from .intunecdlib.graph_batch import reset_batch_pacer
+from .intunecdlib.resolver_cache import log_cache_stats
+from .intunecdlib.throttling import log_throttle_stats
 from .update_entra import update_entra
 from .update_intune import update_intune
 
@@ -166,6 +169,16 @@ def start():
         help="The scopes to use when obtaining an access token interactively separated by space. Only used when using interactive auth. Default is: DeviceManagementApps.ReadWrite.All, DeviceManagementConfiguration.ReadWrite.All, DeviceManagementManagedDevices.Read.All, DeviceManagementServiceConfig.ReadWrite.All, DeviceManagementRBAC.ReadWrite.All, Group.Read.All, Policy.ReadWrite.ConditionalAccess, Policy.Read.All",
         nargs="+",
     )
+    parser.add_argument(
+        "--batch-size",
+        help="Maximum number of requests in a Graph batch request, between 1 and 20. Batches are made smaller while Graph is throttling. Default is 20",
+        type=int,
+    )
+    parser.add_argument(
+        "--batch-concurrency",
+        help="Maximum number of Graph batch requests sent at the same time. Fewer are sent while Graph is throttling. Default is 4",
+        type=int,
+    )
     parser.add_argument(
         "-v", "--verbose", help="Prints verbose output", action="store_true"
     )
@@ -174,6 +187,10 @@ def start():
 
     if args.verbose:
         os.environ["VERBOSE"] = "True"
+    if args.batch_size:
+        os.environ["BATCH_SIZE"] = str(args.batch_size)
+    if args.batch_concurrency:
+        os.environ["BATCH_CONCURRENCY"] = str(args.batch_concurrency)
 
     def devtoprod():
         return "devtoprod"
@@ -218,6 +235,7 @@ def start():
         azure_token = obtain_azure_token(os.environ.get("TENANT_ID"), args.path)
 
     def run_update(path, token, assignment, exclude, report, create_groups, remove):
+        reset_batch_pacer()
         diff_count = 0
         diff_summary = []
 
@@ -246,6 +264,9 @@ def start():
             for config in sum:
                 diff_count += config.count
 
+        log_throttle_stats()
+        log_cache_stats()
+
         return diff_count, diff_summary
 
     if token is None:
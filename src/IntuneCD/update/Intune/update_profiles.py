@@ -15,7 +15,11 @@ from deepdiff import DeepDiff
 
 from ...intunecdlib.check_file import check_file
 from ...intunecdlib.diff_summary import DiffSummary
-from ...intunecdlib.graph_batch import batch_assignment, get_object_assignment
+from ...intunecdlib.graph_batch import (
+    batch_assignment,
+    batch_oma_settings,
+    get_object_assignment,
+)
 from ...intunecdlib.graph_request import (
     makeapirequest,
     makeapirequestDelete,
@@ -60,6 +64,16 @@ def update(
         mem_assignments = batch_assignment(
             mem_data, "deviceManagement/deviceConfigurations/", "/assignments", token
         )
+        # Get the plain text values of all encrypted OMA settings in one batch
+        oma_values = batch_oma_settings(
+            [
+                val
+                for val in mem_data["value"]
+                if val.get("@odata.type")
+                == "#microsoft.graph.windows10CustomConfiguration"
+            ],
+            token,
+        )
 
         for filename in os.listdir(configpath):
             file = check_file(configpath, filename)
@@ -191,14 +205,8 @@ def update(
                     for setting in data.get("value").get("omaSettings"):
                         if setting["isEncrypted"]:
                             decoded_oma = {}
-                            oma_value = makeapirequest(
-                                ENDPOINT
-                                + "/"
-                                + mem_id
-                                + "/getOmaSettingPlainTextValue(secretReferenceValueId='"
-                                + setting["secretReferenceValueId"]
-                                + "')",
-                                token,
+                            oma_value = oma_values.get(
+                                (mem_id, setting["secretReferenceValueId"])
                             )
                             decoded_oma["@odata.type"] = setting["@odata.type"]
                             decoded_oma["displayName"] = setting["displayName"]
@@ -44,19 +44,19 @@ class TestBackupApplications(unittest.TestCase):
             ]
         }
 
-        self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Entra.backup_applications.makeapirequest"
+        self.iter_graph_items_patch = patch(
+            "src.IntuneCD.backup.Entra.backup_applications.iter_graph_items"
         )
-        self.makeapirequest = self.makeapirequest_patch.start()
+        self.iter_graph_items = self.iter_graph_items_patch.start()
 
     def tearDown(self):
         self.directory.cleanup()
-        self.makeapirequest_patch.stop()
+        self.iter_graph_items_patch.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
 
-        self.makeapirequest.return_value = self.applications
+        self.iter_graph_items.return_value = iter(self.applications["value"])
         self.count = savebackup(self.directory.path, "yaml", self.token)
 
         with open(self.saved_path + "yaml", "r", encoding="utf-8") as f:
@@ -70,7 +70,7 @@ class TestBackupApplications(unittest.TestCase):
     def test_backup_json(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
 
-        self.makeapirequest.return_value = self.applications
+        self.iter_graph_items.return_value = iter(self.applications["value"])
         self.count = savebackup(self.directory.path, "json", self.token)
 
         with open(self.saved_path + "json", "r", encoding="utf-8") as f:
@@ -83,7 +83,7 @@ class TestBackupApplications(unittest.TestCase):
     def test_backup_with_no_return_data(self):
         """The count should be 0 if no data is returned."""
 
-        self.makeapirequest.return_value = None
+        self.iter_graph_items.return_value = iter([])
         self.count = savebackup(self.directory.path, "json", self.token)
         self.assertEqual(0, self.count["config_count"])
 
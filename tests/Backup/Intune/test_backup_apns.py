@@ -63,11 +63,11 @@ class TestBackupAPNS(unittest.TestCase):
         )
         self.makeapirequest = self.makeapirequest_patch.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_apns.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_apns.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
         self.process_audit_data_patch = patch(
             "src.IntuneCD.backup.Intune.backup_apns.process_audit_data"
@@ -77,7 +77,7 @@ class TestBackupAPNS(unittest.TestCase):
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest_patch.stop()
-        self.makeAuditRequest_patch.stop()
+        self.get_audit_index_patch.stop()
         self.process_audit_data_patch.stop()
 
     def test_backup_yml(self):
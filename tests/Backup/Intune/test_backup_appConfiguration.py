@@ -103,23 +103,30 @@ class TestBackupAppConfig(unittest.TestCase):
         self.object_assignment.return_value = OBJECT_ASSIGNMENT
 
         self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_appConfiguration.makeapirequest"
+            "src.IntuneCD.backup.Intune.backup_appConfiguration.makeapirequestWithAssignments"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
-        self.makeapirequest.side_effect = self.app_config, self.app_data
+        self.makeapirequest.return_value = self.app_config
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_appConfiguration.makeAuditRequest"
+        self.resolve_apps_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_appConfiguration.resolve_apps"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.resolve_apps = self.resolve_apps_patch.start()
+        self.resolve_apps.return_value = {"0": self.app_data}
+
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_appConfiguration.get_audit_index"
+        )
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.batch_assignment.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.resolve_apps.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -166,7 +173,7 @@ class TestBackupAppConfig(unittest.TestCase):
 
     def test_backup_with_no_returned_data(self):
         """The count should be 0 if no data is returned."""
-        self.makeapirequest.side_effect = [{"value": []}]
+        self.makeapirequest.return_value = {"value": []}
         self.count = savebackup(
             self.directory.path,
             "json",
@@ -96,18 +96,18 @@ class TestBackupAppProtection(unittest.TestCase):
         self.makeapirequest = self.makeapirequest_patch.start()
         self.makeapirequest.return_value = self.app_protection
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_AppProtection.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_AppProtection.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.batch_assignment.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
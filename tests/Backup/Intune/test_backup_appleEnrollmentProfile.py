@@ -87,11 +87,11 @@ class TestBackupAppleEnrollmentProfile(unittest.TestCase):
         )
         self.batch_request = self.patch_batch_request.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_appleEnrollmentProfile.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_appleEnrollmentProfile.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
         self.process_audit_data_patch = patch(
             "src.IntuneCD.backup.Intune.backup_appleEnrollmentProfile.process_audit_data"
@@ -102,7 +102,7 @@ class TestBackupAppleEnrollmentProfile(unittest.TestCase):
         self.directory.cleanup()
         self.patch_batch_request.stop()
         self.patch_makeapirequest.stop()
-        self.makeAuditRequest_patch.stop()
+        self.get_audit_index_patch.stop()
         self.process_audit_data_patch.stop()
 
     def test_backup_yml(self):
@@ -87,15 +87,15 @@ class TestBackupApplications(unittest.TestCase):
         self.object_assignment.return_value = self.object_assignment_data
 
         self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_applications.makeapirequest"
+            "src.IntuneCD.backup.Intune.backup_applications.makeapirequestWithAssignments"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_applications.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_applications.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
@@ -103,7 +103,7 @@ class TestBackupApplications(unittest.TestCase):
         self.batch_assignment.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.get_audit_index.stop()
 
     def test_backup_ios_vpp_app(self):
         """The folder should be created, the file should be created, and the count should be 1."""
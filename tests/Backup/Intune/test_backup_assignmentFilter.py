@@ -63,16 +63,16 @@ class TestBackupAssignmentFilters(unittest.TestCase):
         )
         self.makeapirequest = self.patch_makeapirequest.start()
 
-        self.makeAuditRequest = patch(
-            "src.IntuneCD.backup.Intune.backup_assignmentFilters.makeAuditRequest",
+        self.get_audit_index = patch(
+            "src.IntuneCD.backup.Intune.backup_assignmentFilters.get_audit_index",
             return_value=self.audit_data,
         )
-        self.makeAuditRequest = self.makeAuditRequest.start()
+        self.get_audit_index = self.get_audit_index.start()
 
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -87,23 +87,30 @@ class TestBackupCompliance(unittest.TestCase):
         self.object_assignment.return_value = OBJECT_ASSIGNMENT
 
         self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_compliance.makeapirequest"
+            "src.IntuneCD.backup.Intune.backup_compliance.makeapirequestWithAssignments"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
         self.makeapirequest.return_value = self.compliance_policy
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_compliance.makeAuditRequest"
+        self.hydrate_collection_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_compliance.hydrate_collection"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.hydrate_collection = self.hydrate_collection_patch.start()
+        self.hydrate_collection.return_value = {}
+
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_compliance.get_audit_index"
+        )
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.batch_assignment.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.hydrate_collection.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -245,10 +252,7 @@ class TestBackupCompliance(unittest.TestCase):
         self.compliance_policy["value"][0]["deviceCompliancePolicyScript"] = {
             "deviceComplianceScriptId": "0"
         }
-        self.makeapirequest.side_effect = [
-            self.compliance_policy,
-            {"displayName": "test"},
-        ]
+        self.hydrate_collection.return_value = {"0": {"displayName": "test"}}
 
         self.count = savebackup(
             self.directory.path,
@@ -266,14 +270,18 @@ class TestBackupCompliance(unittest.TestCase):
                 f"{self.directory.path}/Compliance Policies/Policies/test_iosCompliancePolicy__0.json"
             ).exists()
         )
-        self.assertEqual(self.makeapirequest.call_count, 2)
+        self.assertEqual(self.makeapirequest.call_count, 1)
+        self.hydrate_collection.assert_called_once_with(
+            ["0"],
+            "deviceManagement/deviceComplianceScripts/{id}?$select=id,displayName",
+            self.token,
+        )
 
     def test_backup_custom_compliance_script_not_found(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
         self.compliance_policy["value"][0]["deviceCompliancePolicyScript"] = {
             "deviceComplianceScriptId": "0"
         }
-        self.makeapirequest.side_effect = [self.compliance_policy, {}]
 
         self.count = savebackup(
             self.directory.path,
@@ -289,7 +297,12 @@ class TestBackupCompliance(unittest.TestCase):
         self.assertEqual(
             self.compliance_policy["value"][0]["deviceComplianceScriptName"], None
         )
-        self.assertEqual(self.makeapirequest.call_count, 2)
+        self.assertEqual(self.makeapirequest.call_count, 1)
+        self.hydrate_collection.assert_called_once_with(
+            ["0"],
+            "deviceManagement/deviceComplianceScripts/{id}?$select=id,displayName",
+            self.token,
+        )
 
 
 if __name__ == "__main__":
@@ -75,11 +75,11 @@ class TestBackupCompliancePartner(unittest.TestCase):
         )
         self.makeapirequest = self.patch_makeapirequest.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_compliancePartner.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_compliancePartner.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
         self.process_audit_data_patch = patch(
             "src.IntuneCD.backup.Intune.backup_compliancePartner.process_audit_data"
@@ -89,7 +89,7 @@ class TestBackupCompliancePartner(unittest.TestCase):
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
-        self.makeAuditRequest_patch.stop()
+        self.get_audit_index_patch.stop()
         self.process_audit_data_patch.stop()
 
     def test_backup_yml(self):
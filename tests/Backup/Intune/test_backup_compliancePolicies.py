@@ -150,27 +150,38 @@ class TestBackupCompliance(unittest.TestCase):
         self.object_assignment.return_value = OBJECT_ASSIGNMENT
 
         self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_compliancePolicies.makeapirequest"
+            "src.IntuneCD.backup.Intune.backup_compliancePolicies.makeapirequestWithAssignments"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
-        self.makeapirequest.side_effect = [
-            self.compliance_policy,
-            {"value": [{"id": 0, "displayName": "test"}]},
-            self.scheduled_actions,
+        self.makeapirequest.return_value = self.compliance_policy
+
+        self.hydrate_collection_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_compliancePolicies.hydrate_collection"
+        )
+        self.hydrate_collection = self.hydrate_collection_patch.start()
+        self.hydrate_collection.side_effect = [
+            {
+                "ea75ed9d-2df4-4977-8eb7-340c837ed5ee": {
+                    "id": "ea75ed9d-2df4-4977-8eb7-340c837ed5ee",
+                    "displayName": "test",
+                }
+            },
+            {"0": self.scheduled_actions},
         ]
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_compliancePolicies.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_compliancePolicies.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.batch_assignment.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.hydrate_collection.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -224,11 +235,7 @@ class TestBackupCompliance(unittest.TestCase):
     def test_backup_with_no_returned_data(self):
         """The count should be 0 if no data is returned."""
 
-        self.makeapirequest.side_effect = [
-            {"value": []},
-            {"value": [{"id": 0, "displayName": "test"}]},
-            self.scheduled_actions,
-        ]
+        self.makeapirequest.return_value = {"value": []}
         self.count = savebackup(
             self.directory.path,
             "json",
@@ -265,12 +272,6 @@ class TestBackupCompliance(unittest.TestCase):
         """The count should be 0 if no data is returned."""
 
         self.compliance_policy["value"][0]["name"] = "linuxCompliancePolicy"
-        self.makeapirequest.side_effect = [
-            self.compliance_policy,
-            {"value": [{"id": 0, "displayName": "test"}]},
-            self.scheduled_actions,
-        ]
-
         self.count = savebackup(
             self.directory.path,
             "json",
@@ -318,11 +319,7 @@ class TestBackupCompliance(unittest.TestCase):
 
     def test_backup_custom_detection_script_not_found(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
-        self.makeapirequest.side_effect = [
-            self.compliance_policy,
-            {"value": []},
-            self.scheduled_actions,
-        ]
+        self.hydrate_collection.side_effect = [{}, {"0": self.scheduled_actions}]
 
         self.count = savebackup(
             self.directory.path,
@@ -338,7 +335,8 @@ class TestBackupCompliance(unittest.TestCase):
         self.assertEqual(
             self.compliance_policy["value"][0]["detectionScriptName"], None
         )
-        self.assertEqual(self.makeapirequest.call_count, 3)
+        self.assertEqual(self.makeapirequest.call_count, 1)
+        self.assertEqual(self.hydrate_collection.call_count, 2)
 
 
 if __name__ == "__main__":
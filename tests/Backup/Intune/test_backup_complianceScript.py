@@ -72,11 +72,11 @@ class TestBackupCompliance(unittest.TestCase):
         self.makeapirequest = self.makeapirequest_patch.start()
         self.makeapirequest.return_value = self.compliance_policy_script
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_complianceScripts.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_complianceScripts.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
         self.batch_request_patch = patch(
             "src.IntuneCD.backup.Intune.backup_complianceScripts.batch_request"
@@ -87,7 +87,7 @@ class TestBackupCompliance(unittest.TestCase):
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.get_audit_index.stop()
         self.batch_request.stop()
 
     def test_backup_yml(self):
@@ -77,11 +77,18 @@ class TestBackupConditionalAccess(unittest.TestCase):
             "src.IntuneCD.backup.Intune.backup_conditionalAccess.makeapirequest"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
-        self.makeapirequest.side_effect = [self.policy, self.policy["value"][0]]
+        self.makeapirequest.return_value = self.policy
+
+        self.hydrate_collection_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_conditionalAccess.hydrate_collection"
+        )
+        self.hydrate_collection = self.hydrate_collection_patch.start()
+        self.hydrate_collection.return_value = {1: self.policy["value"][0]}
 
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
+        self.hydrate_collection.stop()
 
     def test_backup_yml(self, _):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -115,7 +122,7 @@ class TestBackupConditionalAccess(unittest.TestCase):
     def test_backup_with_no_return_data(self, _):
         """The count should be 0 if no data is returned."""
 
-        self.makeapirequest.side_effect = [{"value": []}]
+        self.makeapirequest.return_value = {"value": []}
         self.count = savebackup(
             self.directory.path, "json", self.token, "", self.append_id
         )
@@ -3,6 +3,7 @@
 
 """This module tests backing up App Configuration."""
 
+import copy
 import json
 import os.path
 import unittest
@@ -13,6 +14,8 @@ import yaml
 from testfixtures import TempDirectory
 
 from src.IntuneCD.backup.Intune.backup_configurationPolicies import savebackup
+from src.IntuneCD.intunecdlib.graph_batch import BatchResponses
+from src.IntuneCD.intunecdlib.incremental import load_backup_state, save_backup_state
 
 BATCH_REQUEST = [
     {
@@ -117,7 +120,7 @@ class TestBackupConfigurationPolicy(unittest.TestCase):
             "src.IntuneCD.backup.Intune.backup_configurationPolicies.batch_request"
         )
         self.batch_request = self.batch_request_patch.start()
-        self.batch_request.return_value = BATCH_REQUEST
+        self.batch_request.return_value = BatchResponses(BATCH_REQUEST)
 
         self.object_assignment_patch = patch(
             "src.IntuneCD.backup.Intune.backup_configurationPolicies.get_object_assignment"
@@ -126,16 +129,16 @@ class TestBackupConfigurationPolicy(unittest.TestCase):
         self.object_assignment.return_value = OBJECT_ASSIGNMENT
 
         self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_configurationPolicies.makeapirequest"
+            "src.IntuneCD.backup.Intune.backup_configurationPolicies.makeapirequestWithAssignments"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
         self.makeapirequest.return_value = self.configuration_policy
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_configurationPolicies.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_configurationPolicies.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
@@ -143,7 +146,7 @@ class TestBackupConfigurationPolicy(unittest.TestCase):
         self.batch_request.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -272,6 +275,37 @@ class TestBackupConfigurationPolicy(unittest.TestCase):
         )
         self.assertEqual(1, self.count["config_count"])
 
+    def test_backup_incremental(self):
+        """The settings of an unchanged policy should not be requested again."""
+
+        self.configuration_policy["value"][0][
+            "lastModifiedDateTime"
+        ] = "2024-01-01T00:00:00Z"
+        policies = self.configuration_policy
+        self.makeapirequest.side_effect = lambda *args: copy.deepcopy(policies)
+
+        for _ in range(2):
+            load_backup_state(self.directory.path)
+            self.count = savebackup(
+                self.directory.path,
+                "json",
+                self.exclude,
+                self.token,
+                "",
+                self.append_id,
+                False,
+                None,
+            )
+            save_backup_state()
+
+        with open(self.saved_path + "json", "r", encoding="utf-8") as f:
+            saved_data = json.load(f)
+
+        self.assertEqual(self.batch_request.call_args_list[0].args[0], ["0"])
+        self.assertEqual(self.batch_request.call_args_list[1].args[0], [])
+        self.assertEqual(self.expected_data, saved_data)
+        self.assertEqual(1, self.count["config_count"])
+
 
 if __name__ == "__main__":
     unittest.main()
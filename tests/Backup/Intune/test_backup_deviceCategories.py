@@ -60,17 +60,17 @@ class TestBackupdeviceCategories(unittest.TestCase):
         )
         self.makeapirequest = self.patch_makeapirequest.start()
 
-        self.makeAuditRequest = patch(
-            "src.IntuneCD.backup.Intune.backup_deviceCategories.makeAuditRequest",
+        self.get_audit_index = patch(
+            "src.IntuneCD.backup.Intune.backup_deviceCategories.get_audit_index",
             return_value=self.audit_data,
         )
-        self.makeAuditRequest.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
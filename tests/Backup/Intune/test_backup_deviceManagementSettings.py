@@ -72,11 +72,11 @@ class TestBackupDeviceManagementSettings(unittest.TestCase):
             ]
         }
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_deviceManagementSettings.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_deviceManagementSettings.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
         self.process_audit_data_patch = patch(
             "src.IntuneCD.backup.Intune.backup_deviceManagementSettings.process_audit_data"
@@ -85,7 +85,7 @@ class TestBackupDeviceManagementSettings(unittest.TestCase):
 
     def tearDown(self):
         self.directory.cleanup()
-        self.makeAuditRequest_patch.stop()
+        self.get_audit_index_patch.stop()
         self.process_audit_data_patch.stop()
 
     def test_backup_yml(self, _, __):
@@ -66,12 +66,19 @@ class TestBackupEnrollmentStatusPage(unittest.TestCase):
             "src.IntuneCD.backup.Intune.backup_enrollmentStatusPage.makeapirequest"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
-        self.makeapirequest.side_effect = self.statuspage_profile, self.app_data
+        self.makeapirequest.return_value = self.statuspage_profile
+
+        self.resolve_apps_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_enrollmentStatusPage.resolve_apps"
+        )
+        self.resolve_apps = self.resolve_apps_patch.start()
+        self.resolve_apps.return_value = {"0": self.app_data}
 
     def tearDown(self):
         self.directory.cleanup()
         self.batch_assignment.stop()
         self.object_assignment.stop()
+        self.resolve_apps.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -119,7 +126,7 @@ class TestBackupEnrollmentStatusPage(unittest.TestCase):
     def test_backup_with_no_returned_data(self):
         """The count should be 0 if no data is returned."""
 
-        self.makeapirequest.side_effect = [{"value": []}]
+        self.makeapirequest.return_value = {"value": []}
         self.count = savebackup(
             self.directory.path,
             "json",
@@ -12,6 +12,7 @@ import yaml
 from testfixtures import TempDirectory
 
 from src.IntuneCD.backup.Intune.backup_groupPolicyConfiguration import savebackup
+from src.IntuneCD.intunecdlib.graph_batch import BatchResponses
 
 BATCH_ASSIGNMENT = [{"value": [{"id": "0", "target": {"groupName": "Group1"}}]}]
 OBJECT_ASSIGNMENT = [{"target": {"groupName": "Group1"}}]
@@ -54,6 +55,7 @@ class TestBackupGroupPolicyConfiguration(unittest.TestCase):
             ]
         }
         self.definitions = {
+            "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceManagement/groupPolicyConfigurations('0')/definitionValues(definition())",
             "value": [
                 {
                     "classType": "machine",
@@ -62,9 +64,12 @@ class TestBackupGroupPolicyConfiguration(unittest.TestCase):
                     "version": "1.0",
                     "id": "0",
                 }
-            ]
+            ],
+        }
+        self.presentations = {
+            "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceManagement/groupPolicyConfigurations('0')/definitionValues('0')/presentationValues(presentation())",
+            "value": [],
         }
-        self.presentations = {"value": []}
         self.audit_data = {
             "value": [
                 {
@@ -92,27 +97,33 @@ class TestBackupGroupPolicyConfiguration(unittest.TestCase):
         self.object_assignment.return_value = OBJECT_ASSIGNMENT
 
         self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_groupPolicyConfiguration.makeapirequest"
+            "src.IntuneCD.backup.Intune.backup_groupPolicyConfiguration.makeapirequestWithAssignments"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
-        self.makeapirequest.side_effect = (
-            self.group_policy,
-            self.definitions,
-            self.presentations,
+        self.makeapirequest.return_value = self.group_policy
+
+        self.batch_request_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_groupPolicyConfiguration.batch_request"
+        )
+        self.batch_request = self.batch_request_patch.start()
+        self.batch_request.side_effect = (
+            BatchResponses([self.definitions]),
+            BatchResponses([self.presentations]),
         )
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_groupPolicyConfiguration.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_groupPolicyConfiguration.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.batch_assignment.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.batch_request.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -161,10 +172,30 @@ class TestBackupGroupPolicyConfiguration(unittest.TestCase):
         self.assertEqual(self.expected_data, saved_data)
         self.assertEqual(1, self.count["config_count"])
 
+    def test_backup_batches_definitions_and_presentations(self):
+        """Definitions and presentations should be requested in one batch each."""
+
+        savebackup(
+            self.directory.path,
+            "json",
+            self.exclude,
+            self.token,
+            "",
+            self.append_id,
+            False,
+            None,
+        )
+
+        self.assertEqual(self.makeapirequest.call_count, 1)
+        self.assertEqual(self.batch_request.call_args_list[0].args[0], ["0"])
+        self.assertEqual(
+            self.batch_request.call_args_list[1].args[0], ["0/definitionValues/0"]
+        )
+
     def test_backup_with_no_returned_data(self):
         """The count should be 0 if no data is returned."""
 
-        self.makeapirequest.side_effect = [{"value": []}]
+        self.makeapirequest.return_value = {"value": []}
         self.count = savebackup(
             self.directory.path,
             "json",
@@ -59,11 +59,11 @@ class TestBackupManagedGPlay(unittest.TestCase):
         )
         self.makeapirequest = self.patch_makeapirequest.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_managedGPlay.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_managedGPlay.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
         self.process_audit_data_patch = patch(
             "src.IntuneCD.backup.Intune.backup_managedGPlay.process_audit_data"
@@ -73,7 +73,7 @@ class TestBackupManagedGPlay(unittest.TestCase):
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
-        self.makeAuditRequest_patch.stop()
+        self.get_audit_index_patch.stop()
         self.process_audit_data_patch.stop()
 
     def test_backup_yml(self):
@@ -93,20 +93,27 @@ class TestBackupNotificationTemplate(unittest.TestCase):
 
         self.patch_makeapirequest = patch(
             "src.IntuneCD.backup.Intune.backup_notificationTemplate.makeapirequest",
-            side_effect=[self.message_template, self.localized_messages],
+            return_value=self.message_template,
         )
         self.makeapirequest = self.patch_makeapirequest.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_notificationTemplate.makeAuditRequest"
+        self.hydrate_collection_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_notificationTemplate.hydrate_collection",
+            return_value={"0": self.localized_messages},
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.hydrate_collection = self.hydrate_collection_patch.start()
+
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_notificationTemplate.get_audit_index"
+        )
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.hydrate_collection.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -148,7 +155,7 @@ class TestBackupNotificationTemplate(unittest.TestCase):
     def test_backup_with_no_return_data(self):
         """The count should be 0 if no data is returned."""
 
-        self.makeapirequest.side_effect = [{"value": []}]
+        self.makeapirequest.return_value = {"value": []}
         self.count = savebackup(
             self.directory.path, "json", self.token, "", self.append_id, False, ""
         )
@@ -78,16 +78,16 @@ class TestBackupPowershellScript(unittest.TestCase):
         self.batch_request.return_value = self.batch_request_data
 
         self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_powershellScripts.makeapirequest"
+            "src.IntuneCD.backup.Intune.backup_powershellScripts.makeapirequestWithAssignments"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
         self.makeapirequest.return_value = self.script_policy_data
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_powershellScripts.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_powershellScripts.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
@@ -95,7 +95,7 @@ class TestBackupPowershellScript(unittest.TestCase):
         self.object_assignment.stop()
         self.batch_request.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -54,22 +54,29 @@ class TestBackupCustomProfiles(unittest.TestCase):
         self.object_assignment.return_value = OBJECT_ASSIGNMENT
 
         self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_profiles.makeapirequest"
+            "src.IntuneCD.backup.Intune.backup_profiles.makeapirequestWithAssignments"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_profiles.makeAuditRequest"
+        self.batch_oma_settings_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_profiles.batch_oma_settings"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.batch_oma_settings = self.batch_oma_settings_patch.start()
+        self.batch_oma_settings.return_value = {}
+
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_profiles.get_audit_index"
+        )
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.batch_assignment.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.batch_oma_settings.stop()
+        self.get_audit_index.stop()
 
     def test_backup_macOS_custom_profile(self):
         """The folders and files should be created and the count should be 2."""
@@ -177,7 +184,8 @@ class TestBackupCustomProfiles(unittest.TestCase):
             "value": "password",
         }
 
-        self.makeapirequest.side_effect = self.profile, self.oma_values
+        self.makeapirequest.return_value = self.profile
+        self.batch_oma_settings.return_value = {("0", "0"): self.oma_values}
 
         self.count = savebackup(
             self.directory.path,
@@ -197,6 +205,13 @@ class TestBackupCustomProfiles(unittest.TestCase):
             ).exists()
         )
         self.assertEqual(1, self.count["config_count"])
+        with open(
+            f"{self.directory.path}/Device Configurations/test_windows10CustomConfiguration.json",
+            "r",
+            encoding="utf-8",
+        ) as file:
+            data = json.load(file)
+        self.assertEqual("password", data["omaSettings"][0]["value"]["value"])
 
     def test_backup_windows_custom_profile_encrypted_ignore_omas(self):
         """The file should be created and the count should be 1."""
@@ -226,7 +241,8 @@ class TestBackupCustomProfiles(unittest.TestCase):
             "value": "password",
         }
 
-        self.makeapirequest.side_effect = self.profile, self.oma_values
+        self.makeapirequest.return_value = self.profile
+        self.batch_oma_settings.return_value = {("0", "0"): self.oma_values}
 
         self.count = savebackup(
             self.directory.path,
@@ -285,7 +301,8 @@ class TestBackupCustomProfiles(unittest.TestCase):
             "value": "password",
         }
 
-        self.makeapirequest.side_effect = self.profile, self.oma_values
+        self.makeapirequest.return_value = self.profile
+        self.batch_oma_settings.return_value = {("0", "0"): self.oma_values}
 
         self.count = savebackup(
             self.directory.path,
@@ -363,7 +380,8 @@ class TestBackupCustomProfiles(unittest.TestCase):
             "value": "password",
         }
 
-        self.makeapirequest.side_effect = self.profile, self.oma_values
+        self.makeapirequest.return_value = self.profile
+        self.batch_oma_settings.return_value = {("0", "0"): self.oma_values}
 
         self.count = savebackup(
             self.directory.path,
@@ -417,22 +435,22 @@ class TestBackupStandardProfiles(unittest.TestCase):
         self.object_assignment.return_value = OBJECT_ASSIGNMENT
 
         self.makeapirequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_profiles.makeapirequest"
+            "src.IntuneCD.backup.Intune.backup_profiles.makeapirequestWithAssignments"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_profiles.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_profiles.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.batch_assignment.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.get_audit_index.stop()
 
     def test_backup_non_custom_profile(self):
         """The file should be created and the count should be 1."""
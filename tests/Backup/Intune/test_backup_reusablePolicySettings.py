@@ -78,21 +78,27 @@ class TestBackupReusablePolicySettings(unittest.TestCase):
             "src.IntuneCD.backup.Intune.backup_reusablePolicySettings.makeapirequest"
         )
         self.makeapirequest = self.makeapirequest_patch.start()
-        self.makeapirequest.side_effect = [
-            self.reusable_policy_settings_policy_script,
-            self.reusable_policy_settings_policy_script["value"][0],
-        ]
+        self.makeapirequest.return_value = self.reusable_policy_settings_policy_script
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_reusablePolicySettings.makeAuditRequest"
+        self.hydrate_collection_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_reusablePolicySettings.hydrate_collection"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.hydrate_collection = self.hydrate_collection_patch.start()
+        self.hydrate_collection.side_effect = lambda data, url, token: {
+            policy["id"]: policy for policy in data["value"]
+        }
+
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_reusablePolicySettings.get_audit_index"
+        )
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.hydrate_collection.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -144,7 +150,7 @@ class TestBackupReusablePolicySettings(unittest.TestCase):
     def test_backup_with_no_returned_data(self):
         """The count should be 0 if no data is returned."""
 
-        self.makeapirequest.side_effect = [{"value": []}]
+        self.makeapirequest.return_value = {"value": []}
         self.count = savebackup(
             self.directory.path,
             "json",
@@ -181,10 +187,6 @@ class TestBackupReusablePolicySettings(unittest.TestCase):
         self.reusable_policy_settings_policy_script["value"][0][
             "displayName"
         ] = "notTestScript"
-        self.makeapirequest.side_effect = [
-            self.reusable_policy_settings_policy_script,
-            self.reusable_policy_settings_policy_script["value"][0],
-        ]
         self.count = savebackup(
             self.directory.path,
             "json",
@@ -234,10 +236,6 @@ class TestBackupReusablePolicySettings(unittest.TestCase):
         self.reusable_policy_settings_policy_script["value"][0].pop(
             "settingDefinitionId"
         )
-        self.makeapirequest.side_effect = [
-            self.reusable_policy_settings_policy_script,
-            self.reusable_policy_settings_policy_script["value"][0],
-        ]
         self.count = savebackup(
             self.directory.path, "json", self.token, "", True, False, None
         )
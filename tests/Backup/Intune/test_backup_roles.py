@@ -12,6 +12,7 @@ import yaml
 from testfixtures import TempDirectory
 
 from src.IntuneCD.backup.Intune.backup_roles import savebackup
+from src.IntuneCD.intunecdlib.graph_batch import BatchResponses
 
 
 class TestBackupRoles(unittest.TestCase):
@@ -80,6 +81,7 @@ class TestBackupRoles(unittest.TestCase):
             ]
         }
         self.assignment = {
+            "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceManagement/roleDefinitions('0')/roleAssignments",
             "value": [
                 {
                     "id": "0",
@@ -90,7 +92,7 @@ class TestBackupRoles(unittest.TestCase):
                     "resourceScopes": ["222"],
                     "members": ["111"],
                 }
-            ]
+            ],
         }
         self.audit_data = {
             "value": [
@@ -108,26 +110,40 @@ class TestBackupRoles(unittest.TestCase):
 
         self.patch_makeapirequest = patch(
             "src.IntuneCD.backup.Intune.backup_roles.makeapirequest",
+            return_value=self.role,
+        )
+        self.makeapirequest = self.patch_makeapirequest.start()
+
+        self.batch_request_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_roles.batch_request",
             side_effect=[
-                self.role,
-                self.assignment,
-                self.assignment["value"][0],
-                {"displayName": "admin"},
-                {"displayName": "test"},
+                BatchResponses([self.assignment]),
+                BatchResponses([self.assignment["value"][0]]),
             ],
         )
-        self.makeapirequest = self.patch_makeapirequest.start()
+        self.batch_request = self.batch_request_patch.start()
+
+        self.resolve_groups_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_roles.resolve_groups",
+            return_value={
+                "1": {"id": "1", "displayName": "admin"},
+                "111": {"id": "111", "displayName": "test"},
+            },
+        )
+        self.resolve_groups = self.resolve_groups_patch.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_roles.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_roles.get_audit_index"
         )
-        self.makeAuditRequest = self.makeAuditRequest_patch.start()
-        self.makeAuditRequest.return_value = self.audit_data
+        self.get_audit_index = self.get_audit_index_patch.start()
+        self.get_audit_index.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
-        self.makeAuditRequest.stop()
+        self.batch_request.stop()
+        self.resolve_groups.stop()
+        self.get_audit_index.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
@@ -158,10 +174,41 @@ class TestBackupRoles(unittest.TestCase):
         self.assertEqual(self.expected_data, self.saved_data)
         self.assertEqual(1, self.count["config_count"])
 
+    def test_backup_resolves_groups_once(self):
+        """The groups of all assignments should be resolved in one call."""
+
+        savebackup(
+            self.directory.path, "json", "", self.token, self.append_id, False, None
+        )
+
+        self.assertEqual(self.makeapirequest.call_count, 1)
+        self.assertEqual(self.batch_request.call_args_list[0].args[0], ["0"])
+        self.assertEqual(self.batch_request.call_args_list[1].args[0], ["0"])
+        self.resolve_groups.assert_called_once_with(["1", "111"], self.token)
+
+    def test_backup_exclude_assignments(self):
+        """Assignments should not be requested when they are excluded."""
+
+        savebackup(
+            self.directory.path,
+            "json",
+            ["assignments"],
+            self.token,
+            self.append_id,
+            False,
+            None,
+        )
+
+        with open(self.saved_path + "json", "r", encoding="utf-8") as f:
+            self.saved_data = json.load(f)
+
+        self.batch_request.assert_not_called()
+        self.assertNotIn("roleAssignments", self.saved_data)
+
     def test_backup_with_no_return_data(self):
         """The count should be 0 if no data is returned."""
 
-        self.makeapirequest.side_effect = [{"value": []}, {"value": []}, {"value": []}]
+        self.makeapirequest.return_value = {"value": []}
         self.count = savebackup(
             self.directory.path, "json", "", self.token, self.append_id, False, None
         )
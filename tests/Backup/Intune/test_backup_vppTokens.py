@@ -47,16 +47,16 @@ class TestBackupVPPTokens(unittest.TestCase):
         )
         self.makeapirequest = self.patch_makeapirequest.start()
 
-        self.makeAuditRequest_patch = patch(
-            "src.IntuneCD.backup.Intune.backup_vppTokens.makeAuditRequest"
+        self.get_audit_index_patch = patch(
+            "src.IntuneCD.backup.Intune.backup_vppTokens.get_audit_index"
         )
-        self.get_scope_tags = self.makeAuditRequest_patch.start()
+        self.get_scope_tags = self.get_audit_index_patch.start()
         self.get_scope_tags.return_value = self.audit_data
 
     def tearDown(self):
         self.directory.cleanup()
         self.makeapirequest.stop()
-        self.makeAuditRequest_patch.stop()
+        self.get_audit_index_patch.stop()
 
     def test_backup_yml(self):
         """The folder should be created, the file should have the expected contents, and the count should be 1."""
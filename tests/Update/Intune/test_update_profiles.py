@@ -63,6 +63,12 @@ class TestUpdateProfiles(unittest.TestCase):
         self.makeapirequest = self.makeapirequest_patch.start()
         self.makeapirequest.return_value = self.mem_data_base
 
+        self.batch_oma_settings_patch = patch(
+            "src.IntuneCD.update.Intune.update_profiles.batch_oma_settings"
+        )
+        self.batch_oma_settings = self.batch_oma_settings_patch.start()
+        self.batch_oma_settings.return_value = {}
+
         self.update_assignment_patch = patch(
             "src.IntuneCD.update.Intune.update_profiles.update_assignment"
         )
@@ -107,6 +113,7 @@ class TestUpdateProfiles(unittest.TestCase):
         self.batch_assignment.stop()
         self.object_assignment.stop()
         self.makeapirequest.stop()
+        self.batch_oma_settings.stop()
         self.update_assignment.stop()
         self.load_file.stop()
         self.post_assignment_update.stop()
@@ -426,7 +433,8 @@ class TestUpdateProfiles(unittest.TestCase):
             }
         ]
 
-        self.makeapirequest.side_effect = self.mem_data_base, self.oma_values
+        self.makeapirequest.return_value = self.mem_data_base
+        self.batch_oma_settings.return_value = {("0", "0"): self.oma_values}
 
         self.count = update(
             self.directory.path, self.token, assignment=True, report=False, remove=False
@@ -477,7 +485,8 @@ class TestUpdateProfiles(unittest.TestCase):
             }
         ]
 
-        self.makeapirequest.side_effect = self.mem_data_base, self.oma_values
+        self.makeapirequest.return_value = self.mem_data_base
+        self.batch_oma_settings.return_value = {("0", "0"): self.oma_values}
 
         self.count = update(
             self.directory.path,
@@ -533,7 +542,8 @@ class TestUpdateProfiles(unittest.TestCase):
             }
         ]
 
-        self.makeapirequest.side_effect = self.mem_data_base, self.oma_values
+        self.makeapirequest.return_value = self.mem_data_base
+        self.batch_oma_settings.return_value = {("0", "0"): self.oma_values}
 
         self.count = update(
             self.directory.path, self.token, assignment=True, report=False, remove=False
@@ -584,7 +594,8 @@ class TestUpdateProfiles(unittest.TestCase):
             }
         ]
 
-        self.makeapirequest.side_effect = self.mem_data_base, self.oma_values
+        self.makeapirequest.return_value = self.mem_data_base
+        self.batch_oma_settings.return_value = {("0", "0"): self.oma_values}
 
         self.count = update(
             self.directory.path,
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the audit_index module.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from src.IntuneCD.intunecdlib.audit_index import (
+    AuditIndex,
+    get_audit_index,
+    reset_audit_index,
+)
+
+
+def _record(resource_id, date, resource_type="DeviceConfiguration", actor="test"):
+    return {
+        "resourceId": resource_id,
+        "auditResourceType": resource_type,
+        "actor": actor,
+        "activityDateTime": date,
+        "activityOperationType": "Patch",
+        "activityResult": "Success",
+    }
+
+
+class TestAuditIndex(unittest.TestCase):
+    """Test class for audit_index."""
+
+    def setUp(self):
+        reset_audit_index()
+        self.records = [
+            _record("0", "2021-01-02T00:00:00Z", actor="new"),
+            _record("1", "2021-01-03T00:00:00Z", resource_type="MobileApp"),
+            _record("0", "2021-01-01T00:00:00Z", actor="old"),
+        ]
+
+    def tearDown(self):
+        reset_audit_index()
+
+    def test_get_latest_resource_id(self):
+        """The latest record of the resource should be returned."""
+        index = AuditIndex(self.records)
+
+        self.assertEqual(
+            index.get_latest({"type": "resourceId", "value": "0"})["actor"], "new"
+        )
+        self.assertIsNone(index.get_latest({"type": "resourceId", "value": "2"}))
+
+    def test_get_latest_resource_type(self):
+        """The latest record of the resource type should be returned."""
+        index = AuditIndex(self.records)
+
+        self.assertEqual(
+            index.get_latest({"type": "auditResourceType", "value": "MobileApp"})[
+                "resourceId"
+            ],
+            "1",
+        )
+
+    def test_get_latest_other_field(self):
+        """Fields that are not indexed should be matched by scanning the records."""
+        index = AuditIndex(self.records)
+
+        self.assertEqual(
+            index.get_latest({"type": "actor", "value": "test"})["resourceId"], "1"
+        )
+        self.assertIsNone(index.get_latest({"type": "actor", "value": "none"}))
+
+    @patch("src.IntuneCD.intunecdlib.audit_index.makeAuditRequest")
+    def test_get_audit_index_requested_once(self, mock_request):
+        """The audit events should only be requested once per run."""
+        mock_request.return_value = self.records
+
+        index = get_audit_index({"access_token": "token"})
+        self.assertIs(get_audit_index({"access_token": "token"}), index)
+        mock_request.assert_called_once_with(None, {"access_token": "token"})
+        self.assertEqual(len(index), 3)
+
+        reset_audit_index()
+        get_audit_index({"access_token": "token"})
+        self.assertEqual(mock_request.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -41,13 +41,13 @@ def _mock_response(
 
 
 @patch("src.IntuneCD.intunecdlib.azure_request.make_azure_request")
-@patch("requests.get")
+@patch("requests.Session.request")
 @patch("time.sleep", return_value=None)
 class TestMakeAzureRequestGet(unittest.TestCase):
     """Test class for graph_request."""
 
     def setUp(self):
-        self.token = {"access_token": "token"}
+        self.token = "token"
 
     def test_make_azure_request_status_200_no_q_param(self, _, mock_get, __):
         """The request should be made once and no exception should be raised."""
@@ -92,12 +92,12 @@ class TestMakeAzureRequestGet(unittest.TestCase):
 
 
 @patch("src.IntuneCD.intunecdlib.azure_request.make_azure_request_put")
-@patch("requests.put")
+@patch("requests.Session.request")
 class TestAzureRequestPut(unittest.TestCase):
     """Test class for azure_request."""
 
     def setUp(self):
-        self.token = {"access_token": "token"}
+        self.token = "token"
 
     def test_make_azure_request_put_no_q_param(self, mock_patch, _):
         """The request should be made and the response should be returned."""
@@ -134,12 +134,12 @@ class TestAzureRequestPut(unittest.TestCase):
 
 
 @patch("src.IntuneCD.intunecdlib.azure_request.make_azure_request_patch")
-@patch("requests.patch")
+@patch("requests.Session.request")
 class TestAzureRequestPatch(unittest.TestCase):
     """Test class for azure_request."""
 
     def setUp(self):
-        self.token = {"access_token": "token"}
+        self.token = "token"
 
     def test_make_azure_request_patch_no_q_param(self, mock_patch, _):
         """The request should be made and the response should be returned."""
@@ -178,12 +178,12 @@ class TestAzureRequestPatch(unittest.TestCase):
 
 
 @patch("src.IntuneCD.intunecdlib.azure_request.make_azure_request_post")
-@patch("requests.post")
+@patch("requests.Session.request")
 class TestAzureRequestPost(unittest.TestCase):
     """Test class for azure_request."""
 
     def setUp(self):
-        self.token = {"access_token": "token"}
+        self.token = "token"
 
     def test_make_azure_request_post_no_q_param(self, mock_patch, _):
         """The request should be made and the response should be returned."""
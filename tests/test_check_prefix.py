@@ -7,7 +7,7 @@ This module tests the check_file function.
 
 import unittest
 
-from src.IntuneCD.intunecdlib.check_prefix import check_prefix_match
+from src.IntuneCD.intunecdlib.check_prefix import check_prefix_match, filter_prefix
 
 
 class TestCheckFile(unittest.TestCase):
@@ -23,6 +23,20 @@ class TestCheckFile(unittest.TestCase):
         self.prefix = check_prefix_match("test1 - platform - configtype", "test2")
         self.assertFalse(self.prefix)
 
+    def test_filter_prefix(self):
+        """Should only keep the objects matching the prefix."""
+        self.data = filter_prefix(
+            {"value": [{"name": "test1 - policy"}, {"name": "test2 - policy"}]},
+            "test1",
+            "name",
+        )
+        self.assertEqual(self.data, {"value": [{"name": "test1 - policy"}]})
+
+    def test_filter_prefix_no_prefix(self):
+        """Should keep all objects when no prefix is set."""
+        self.data = filter_prefix({"value": [{"displayName": "test2"}]}, "")
+        self.assertEqual(self.data, {"value": [{"displayName": "test2"}]})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,17 +5,29 @@
 This module tests the graph_batch module.
 """
 
+import json
 import os
+import threading
 import unittest
 from unittest.mock import patch
 
 from src.IntuneCD.intunecdlib.graph_batch import (
+    BatchPacer,
+    BatchResponses,
     batch_assignment,
     batch_intents,
+    batch_oma_settings,
     batch_request,
+    get_batch_pacer,
+    get_group_names,
     get_object_assignment,
     get_object_details,
+    hydrate_collection,
+    reset_batch_pacer,
+    resolve_apps,
+    seed_apps,
 )
+from src.IntuneCD.intunecdlib.resolver_cache import get_cache_stats, reset_caches
 
 
 @patch("time.sleep", return_value=None)
@@ -23,6 +35,8 @@ class TestGraphBatch(unittest.TestCase):
     """Test class for graph_batch."""
 
     def setUp(self):
+        reset_caches()
+        reset_batch_pacer()
         self.token = "token"
         os.environ["VERBOSE"] = "True"
         self.batch_request_data = ["1", "2", "3"]
@@ -59,26 +73,30 @@ class TestGraphBatch(unittest.TestCase):
             }
         ]
         self.filter_responses = [{"displayName": "test", "id": "0"}]
-        self.category_responses = [
-            {
-                "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceManagement/templates('0')/categories",
-                "value": [{"id": "0", "displayName": "test"}],
-            }
-        ]
-        self.settings_responses = [
-            {
-                "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceManagement/intents('0')/categories('0')/settings",
-                "value": [
-                    {
-                        "@odata.type": "#microsoft.graph.deviceManagementBooleanSettingInstance",
-                        "id": "0",
-                        "definitionId": "Protection",
-                        "valueJson": "null",
-                        "value": None,
-                    }
-                ],
-            }
-        ]
+        self.category_responses = BatchResponses(
+            [
+                {
+                    "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceManagement/templates('0')/categories",
+                    "value": [{"id": "0", "displayName": "test"}],
+                }
+            ]
+        )
+        self.settings_responses = BatchResponses(
+            [
+                {
+                    "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceManagement/intents('0')/categories('0')/settings",
+                    "value": [
+                        {
+                            "@odata.type": "#microsoft.graph.deviceManagementBooleanSettingInstance",
+                            "id": "0",
+                            "definitionId": "Protection",
+                            "valueJson": "null",
+                            "value": None,
+                        }
+                    ],
+                }
+            ]
+        )
 
         self.makeapirequestPost_patch = patch(
             "src.IntuneCD.intunecdlib.graph_batch.makeapirequestPost"
@@ -193,6 +211,28 @@ class TestGraphBatch(unittest.TestCase):
         self.assertEqual(self.makeapirequestPost.call_count, 2)
         self.assertEqual(self.result, self.expected_result)
 
+    def test_batch_request_429_service(self, _):
+        """A throttled batch should be sent and paused as the service of its requests."""
+        self.makeapirequestPost.side_effect = (
+            {
+                "responses": [
+                    {"id": "1", "status": 429, "headers": {"Retry-After": "30"}},
+                ]
+            },
+            {"responses": [{"id": "1", "status": 200, "headers": {}, "body": {}}]},
+        )
+        with patch(
+            "src.IntuneCD.intunecdlib.graph_batch.get_bucket"
+        ) as mock_get_bucket:
+            batch_request(["0"], "groups/", "", self.token)
+
+        mock_get_bucket.assert_called_once_with("entra")
+        mock_get_bucket.return_value.pause.assert_called_once_with(30)
+        self.assertEqual(
+            [c.kwargs["service"] for c in self.makeapirequestPost.call_args_list],
+            ["entra", "entra"],
+        )
+
     def test_batch_request_503(self, _):
         """The batch request function should return the expected result."""
 
@@ -239,6 +279,182 @@ class TestGraphBatch(unittest.TestCase):
         self.assertEqual(self.makeapirequestPost.call_count, 2)
         self.assertEqual(self.result, self.expected_result)
 
+    def test_batch_request_concurrent_order(self, _):
+        """Responses from concurrent batches should be returned in the order of the IDs."""
+
+        def post(endpoint, token, jdata, service, max_retries):
+            requests = json.loads(jdata)["requests"]
+            return {
+                "responses": [
+                    {
+                        "id": str(req["id"]),
+                        "status": 200,
+                        "headers": {},
+                        "body": {"id": req["url"].split("/")[1]},
+                    }
+                    for req in reversed(requests)
+                ]
+            }
+
+        self.makeapirequestPost.side_effect = post
+        self.batch_request_data = [str(i) for i in range(45)]
+        self.result = batch_request(self.batch_request_data, "test/", "", self.token)
+
+        self.assertEqual(self.makeapirequestPost.call_count, 3)
+        self.assertEqual([r["id"] for r in self.result], self.batch_request_data)
+
+    def test_batch_pacer(self, _):
+        """The limits should be halved when throttled and grow back when healthy."""
+
+        pacer = BatchPacer(20, 4)
+        pacer.record([{"status": 429}, {"status": 200}, {"status": 200}])
+
+        self.assertEqual((pacer.size, pacer.concurrency), (10, 2))
+
+        pacer.record([{"status": 200}] * 10)
+        pacer.record([{"status": 200}] * 11)
+
+        self.assertEqual((pacer.size, pacer.concurrency), (12, 4))
+
+        for _ in range(10):
+            pacer.record([{"status": 200}])
+
+        self.assertEqual((pacer.size, pacer.concurrency), (20, 4))
+
+    @patch.dict(os.environ, {"BATCH_SIZE": "5", "BATCH_CONCURRENCY": "1"})
+    def test_batch_request_batch_size(self, _):
+        """The batch size should be read from the environment and shrink when throttled."""
+
+        reset_batch_pacer()
+        throttled = {"3"}
+
+        def post(endpoint, token, jdata, service, max_retries):
+            requests = json.loads(jdata)["requests"]
+            responses = []
+            for req in requests:
+                o_id = req["url"].split("/")[1]
+                throttled_req = o_id in throttled
+                throttled.discard(o_id)
+                responses.append(
+                    {
+                        "id": str(req["id"]),
+                        "status": 429 if throttled_req else 200,
+                        "headers": {},
+                        "body": {"id": o_id},
+                    }
+                )
+            return {"responses": responses}
+
+        self.makeapirequestPost.side_effect = post
+        self.batch_request_data = [str(i) for i in range(8)]
+        self.result = batch_request(self.batch_request_data, "test/", "", self.token)
+
+        batch_sizes = [
+            len(json.loads(c.kwargs["jdata"])["requests"])
+            for c in self.makeapirequestPost.call_args_list
+        ]
+        # The first batch is throttled so the next batches are halved
+        self.assertEqual(batch_sizes, [5, 2, 1, 1])
+        self.assertEqual(get_batch_pacer().max_size, 5)
+        self.assertEqual(sorted(r["id"] for r in self.result), self.batch_request_data)
+
+    @patch.dict(os.environ, {"BATCH_SIZE": "1", "BATCH_CONCURRENCY": "2"})
+    def test_batch_request_sliding_window(self, _):
+        """A new batch should be sent as soon as one is done, not when all batches in flight are done."""
+
+        reset_batch_pacer()
+        third_sent = threading.Event()
+
+        def post(endpoint, token, jdata, service, max_retries):
+            request = json.loads(jdata)["requests"][0]
+            o_id = request["url"].split("/")[1]
+            if o_id == "0":
+                # The first batch is only done once the third batch has been sent
+                self.assertTrue(third_sent.wait(5))
+            if o_id == "2":
+                third_sent.set()
+            return {
+                "responses": [
+                    {
+                        "id": str(request["id"]),
+                        "status": 200,
+                        "headers": {},
+                        "body": {"id": o_id},
+                    }
+                ]
+            }
+
+        self.makeapirequestPost.side_effect = post
+        self.result = batch_request(["0", "1", "2"], "test/", "", self.token)
+
+        self.assertTrue(third_sent.is_set())
+        self.assertEqual([r["id"] for r in self.result], ["0", "1", "2"])
+
+    def test_batch_request_failed_requests(self, _):
+        """Failed and permanently failed requests should be reported separately."""
+
+        statuses = {1: 404, 2: 429, 3: 200}
+
+        def post(endpoint, token, jdata, service, max_retries):
+            return {
+                "responses": [
+                    {
+                        "id": str(req["id"]),
+                        "status": statuses[req["id"]],
+                        "headers": {},
+                        "body": {"id": str(req["id"])},
+                    }
+                    for req in json.loads(jdata)["requests"]
+                ]
+            }
+
+        self.makeapirequestPost.side_effect = post
+        self.result = batch_request(self.batch_request_data, "test/", "", self.token)
+
+        self.assertEqual(self.result, [{"id": "3"}])
+        self.assertEqual(self.result.failed, {1: 404})
+        self.assertEqual(list(self.result.permanently_failed), [2])
+        self.assertEqual(self.result.permanently_failed[2]["url"], "test/2")
+        # The initial request and the 10 retries
+        self.assertEqual(self.makeapirequestPost.call_count, 11)
+
+    def test_batch_request_next_link(self, _):
+        """The next pages should be batch requested and their values added to the first page."""
+
+        self.makeapirequestPost.return_value = {
+            "responses": [
+                {
+                    "id": "1",
+                    "status": 200,
+                    "headers": {},
+                    "body": {
+                        "value": [{"id": "0"}],
+                        "@odata.nextLink": "https://graph.microsoft.com/beta/test/1/settings?$skiptoken=1",
+                    },
+                },
+                {
+                    "id": "2",
+                    "status": 200,
+                    "headers": {},
+                    "body": {"value": [{"id": "2"}]},
+                },
+            ]
+        }
+        self.next_pages = BatchResponses()
+        self.next_pages.add({"value": [{"id": "1"}]}, "test/1/settings?$skiptoken=1")
+        self.batch_request.side_effect = None
+        self.batch_request.return_value = self.next_pages
+
+        self.result = batch_request(["1", "2"], "test/", "/settings", self.token)
+
+        self.batch_request.assert_called_once_with(
+            ["test/1/settings?$skiptoken=1"], "", "", self.token
+        )
+        self.assertEqual(
+            self.result,
+            [{"value": [{"id": "0"}, {"id": "1"}]}, {"value": [{"id": "2"}]}],
+        )
+
     def test_batch_assignment(self, _):
         """The batch assignment function should return the expected result."""
 
@@ -263,6 +479,79 @@ class TestGraphBatch(unittest.TestCase):
 
         self.assertEqual(self.result, self.expected_result)
 
+    def test_batch_assignment_cached_names(self, _):
+        """Groups and filters resolved once should not be requested again during the run."""
+
+        self.batch_request.side_effect = (
+            self.responses,
+            self.group_responses,
+            self.filter_responses,
+            json.loads(json.dumps(self.responses)),
+        )
+
+        batch_assignment(self.batch_assignment_data, "test", "test", self.token)
+        self.result = batch_assignment(
+            self.batch_assignment_data, "test", "test", self.token
+        )
+
+        self.assertEqual(self.batch_request.call_count, 4)
+        self.assertEqual(self.result[0]["value"][0]["target"]["groupName"], "test")
+        self.assertEqual(
+            self.result[0]["value"][0]["target"][
+                "deviceAndAppManagementAssignmentFilterId"
+            ],
+            "test",
+        )
+        self.assertEqual(get_cache_stats()["groups"], {"hits": 1, "misses": 1})
+        self.assertEqual(get_cache_stats()["filters"], {"hits": 1, "misses": 1})
+
+    def test_get_group_names_multiple_groups(self, _):
+        """Each assignment should get the name of its own group."""
+
+        self.responses = [
+            {
+                "value": [
+                    {"target": {"groupId": "1"}},
+                    {"target": {"groupId": "0"}},
+                    {"target": {"groupId": "2"}},
+                    {"target": {"@odata.type": "#allDevices"}},
+                ]
+            },
+            None,
+        ]
+        self.batch_request.side_effect = None
+        self.batch_request.return_value = [
+            {"id": "0", "displayName": "static", "groupTypes": []},
+            {
+                "id": "1",
+                "displayName": "dynamic",
+                "groupTypes": ["DynamicMembership"],
+                "membershipRule": "rule",
+            },
+        ]
+
+        get_group_names(self.responses, ["1", "0", "2", "0"], self.token)
+
+        self.assertEqual(self.batch_request.call_args.args[0], ["1", "0", "2"])
+        self.assertEqual(
+            [val["target"] for val in self.responses[0]["value"]],
+            [
+                {
+                    "groupId": "1",
+                    "groupName": "dynamic",
+                    "groupType": "DynamicMembership",
+                    "membershipRule": "rule",
+                },
+                {
+                    "groupId": "0",
+                    "groupName": "static",
+                    "groupType": "StaticMembership",
+                },
+                {"groupId": "2"},
+                {"@odata.type": "#allDevices"},
+            ],
+        )
+
     def test_batch_assignment_expand_assignments(self, _):
         """The batch assignment function should return the expected result."""
 
@@ -308,6 +597,40 @@ class TestGraphBatch(unittest.TestCase):
 
         self.assertEqual(self.result, self.expected_result)
 
+    def test_batch_assignment_expanded_list(self, _):
+        """Assignments already in the list objects should be used without requesting them."""
+
+        self.batch_assignment_data = {
+            "value": [
+                {
+                    "id": "0",
+                    "assignments@odata.context": "test",
+                    "assignments": [
+                        {
+                            "target": {
+                                "groupId": "0",
+                                "deviceAndAppManagementAssignmentFilterId": "0",
+                            }
+                        }
+                    ],
+                }
+            ]
+        }
+        self.batch_request.side_effect = (self.group_responses, self.filter_responses)
+
+        self.result = batch_assignment(
+            self.batch_assignment_data, "test", "/assignments", self.token
+        )
+
+        # Only the groups and filters should be requested
+        self.assertEqual(self.batch_request.call_count, 2)
+        self.assertEqual(self.batch_assignment_data, {"value": [{"id": "0"}]})
+        self.assertEqual(
+            self.result[0]["value"][0]["target"]["groupName"],
+            "test",
+        )
+        self.assertEqual(self.result.get_responses("0"), [self.result[0]])
+
     def test_batch_assignment_appProtection_mdmWindowsInformationProtectionPolicy(
         self, _
     ):
@@ -437,16 +760,134 @@ class TestGraphBatch(unittest.TestCase):
 
         self.assertEqual(self.result, self.expected_result)
 
-    def test_get_object_assignment(self, _):
-        """The get object assignment function should return the expected result."""
+    def test_batch_oma_settings(self, _):
+        """The plain text values should be requested in one batch and keyed by profile and secret ID."""
 
-        self.id = "0"
-        self.response = [
+        self.oma_response = {
+            "@odata.context": "https://graph.microsoft.com/beta/$metadata#Edm.String",
+            "value": "password",
+        }
+        self.responses = BatchResponses()
+        self.responses.add(
+            self.oma_response,
+            "0/getOmaSettingPlainTextValue(secretReferenceValueId='1')",
+        )
+        self.batch_request.side_effect = None
+        self.batch_request.return_value = self.responses
+
+        self.result = batch_oma_settings(
+            [
+                {
+                    "id": "0",
+                    "omaSettings": [
+                        {"isEncrypted": True, "secretReferenceValueId": "1"},
+                        {"isEncrypted": False, "secretReferenceValueId": "2"},
+                        {"isEncrypted": True, "secretReferenceValueId": "3"},
+                    ],
+                },
+                {"id": "4", "omaSettings": None},
+            ],
+            self.token,
+        )
+
+        self.assertEqual(self.batch_request.call_count, 1)
+        self.assertEqual(
+            self.batch_request.call_args.args[0],
+            [
+                "0/getOmaSettingPlainTextValue(secretReferenceValueId='1')",
+                "0/getOmaSettingPlainTextValue(secretReferenceValueId='3')",
+            ],
+        )
+        self.assertEqual(self.result, {("0", "1"): self.oma_response})
+
+    def test_hydrate_collection(self, _):
+        """Each object should be requested once and the responses keyed by ID in the order of the list."""
+
+        self.batch_request.side_effect = None
+        self.batch_request.return_value = BatchResponses()
+        self.batch_request.return_value.add({"id": "1", "displayName": "policy1"}, "1")
+        self.batch_request.return_value.add({"id": "0", "displayName": "policy0"}, "0")
+
+        self.result = hydrate_collection(
+            {"value": [{"id": "0"}, {"id": "1"}, {"id": "1"}, {"id": "2"}]},
+            "deviceManagement/test/{id}?$expand=settings",
+            self.token,
+        )
+
+        self.batch_request.assert_called_once_with(
+            ["0", "1", "2"],
+            "deviceManagement/test/",
+            "?$expand=settings",
+            self.token,
+        )
+        self.assertEqual(list(self.result), ["0", "1"])
+        self.assertEqual(self.result["0"]["displayName"], "policy0")
+
+    def test_hydrate_collection_no_objects(self, _):
+        """No request should be made when there are no objects."""
+
+        self.assertEqual(hydrate_collection([], "test/{id}", self.token), {})
+        self.batch_request.assert_not_called()
+
+    def test_resolve_apps(self, _):
+        """Seeded apps should not be requested and missing apps should be batch requested once."""
+
+        seed_apps(
+            [
+                {
+                    "@odata.type": "#microsoft.graph.iosVppApp",
+                    "id": "0",
+                    "displayName": "app0",
+                    "assignments": [],
+                }
+            ]
+        )
+        self.batch_request.side_effect = None
+        self.batch_request.return_value = [
             {
-                "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceAppManagement/mobileAppConfigurations('0')/assignments",
-                "value": [{"id": "0", "target": {"groupId": "0", "groupName": "test"}}],
+                "@odata.type": "#microsoft.graph.win32LobApp",
+                "id": "1",
+                "displayName": "app1",
             }
         ]
+
+        resolve_apps(["0"], self.token)
+        self.result = resolve_apps(["0", "1", "1"], self.token)
+
+        self.batch_request.assert_called_once()
+        self.assertEqual(self.batch_request.call_args.args[0], ["1"])
+        self.assertEqual(
+            self.result["0"],
+            {
+                "id": "0",
+                "displayName": "app0",
+                "@odata.type": "#microsoft.graph.iosVppApp",
+            },
+        )
+        self.assertEqual(
+            self.result["1"]["@odata.type"], "#microsoft.graph.win32LobApp"
+        )
+
+    def test_resolve_apps_no_ids(self, _):
+        """No request should be made when there are no app IDs."""
+
+        self.assertEqual(resolve_apps([], self.token), {})
+        self.batch_request.assert_not_called()
+
+    def test_get_object_assignment(self, _):
+        """The get object assignment function should return the expected result."""
+
+        self.id = "0"
+        self.response = BatchResponses(
+            [
+                {
+                    "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceAppManagement/mobileAppConfigurations('0')/assignments",
+                    "value": [
+                        {"id": "0", "target": {"groupId": "0", "groupName": "test"}}
+                    ],
+                }
+            ]
+        )
         self.expected_result = [{"target": {"groupName": "test"}}]
 
         self.result = get_object_assignment(self.id, self.response)
@@ -457,29 +898,31 @@ class TestGraphBatch(unittest.TestCase):
         """The get object details function should return the expected result."""
 
         self.id = "0"
-        self.response = [
-            {
-                "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceAppManagement/mobileAppConfigurations('0')",
-                "value": [
-                    {
-                        "id": "0",
-                        "displayName": "test",
-                        "description": "",
-                        "templateId": "0",
-                        "roleScopeTagIds": ["0"],
-                        "settingsDelta": [
-                            {
-                                "@odata.type": "#microsoft.graph.deviceManagementBooleanSettingInstance",
-                                "definitionId": "Protection",
-                                "id": "0",
-                                "value": None,
-                                "valueJson": "null",
-                            }
-                        ],
-                    }
-                ],
-            }
-        ]
+        self.response = BatchResponses(
+            [
+                {
+                    "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceAppManagement/mobileAppConfigurations('0')",
+                    "value": [
+                        {
+                            "id": "0",
+                            "displayName": "test",
+                            "description": "",
+                            "templateId": "0",
+                            "roleScopeTagIds": ["0"],
+                            "settingsDelta": [
+                                {
+                                    "@odata.type": "#microsoft.graph.deviceManagementBooleanSettingInstance",
+                                    "definitionId": "Protection",
+                                    "id": "0",
+                                    "value": None,
+                                    "valueJson": "null",
+                                }
+                            ],
+                        }
+                    ],
+                }
+            ]
+        )
         self.expected_result = [
             {
                 "description": "",
@@ -503,6 +946,61 @@ class TestGraphBatch(unittest.TestCase):
 
         self.assertEqual(self.result, self.expected_result)
 
+    def test_batch_request_index(self, _):
+        """The responses should be indexed on the requested ID and the IDs in the context."""
+
+        self.makeapirequestPost.return_value = {
+            "responses": [
+                {
+                    "id": "1",
+                    "status": 200,
+                    "headers": {},
+                    "body": {
+                        "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceManagement/intents('a')/categories('b')/settings",
+                        "value": [{"id": "0"}],
+                    },
+                },
+                {
+                    "id": "2",
+                    "status": 200,
+                    "headers": {},
+                    "body": {"id": "c", "roleScopeTagIds": ["0"]},
+                },
+            ]
+        }
+        self.result = batch_request(["a/categories/b", "c"], "test/", "", self.token)
+
+        self.assertIsInstance(self.result, BatchResponses)
+        self.assertEqual(self.result.get_responses("a"), [self.result[0]])
+        self.assertEqual(self.result.get_responses("b"), [self.result[0]])
+        self.assertEqual(self.result.get_responses("c"), [self.result[1]])
+        self.assertEqual(self.result.get_responses("d"), [])
+
+    def test_get_object_assignment_index(self, _):
+        """The get object assignment function should use the index of the responses."""
+
+        self.response = BatchResponses()
+        self.response.add(
+            {
+                "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceAppManagement/mobileAppConfigurations('0')/assignments",
+                "value": [{"id": "0", "target": {"groupId": "0", "groupName": "test"}}],
+            }
+        )
+        self.response.add(
+            {
+                "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceAppManagement/mobileAppConfigurations('1')/assignments",
+                "value": [
+                    {"id": "1", "target": {"groupId": "1", "groupName": "test1"}}
+                ],
+            }
+        )
+
+        self.assertEqual(
+            get_object_assignment("1", self.response),
+            [{"target": {"groupName": "test1"}}],
+        )
+        self.assertEqual(get_object_details("2", self.response), [])
+
 
 if __name__ == "__main__":
     unittest.main()
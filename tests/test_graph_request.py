@@ -9,14 +9,20 @@ import unittest
 from unittest import mock
 from unittest.mock import patch
 
+import requests
+
 from src.IntuneCD.intunecdlib.graph_request import (
+    iter_graph_items,
+    iter_graph_pages,
     makeapirequest,
     makeapirequestDelete,
     makeapirequestPatch,
     makeapirequestPost,
     makeapirequestPut,
+    makeapirequestWithAssignments,
     makeAuditRequest,
 )
+from src.IntuneCD.intunecdlib.throttling import reset_buckets
 
 
 def _mock_response(
@@ -41,13 +47,14 @@ def _mock_response(
 
 
 @patch("src.IntuneCD.intunecdlib.graph_request.makeapirequest")
-@patch("requests.get")
+@patch("requests.Session.request")
 @patch("time.sleep", return_value=None)
 class TestGraphRequestGet(unittest.TestCase):
     """Test class for graph_request."""
 
     def setUp(self):
         self.token = {"access_token": "token"}
+        reset_buckets()
 
     def test_makeapirequest_status_429_no_q_param(self, _, mock_get, __):
         """The request should be made once and exception should be raised."""
@@ -127,45 +134,116 @@ class TestGraphRequestGet(unittest.TestCase):
         self.assertEqual(self.result, {"value": [{"id": "0"}]})
 
     def test_makeapirequest_status_502_with_q_param(self, _, mock_get, __):
-        """The request should be made twice and exception should be raised."""
+        """The request should be retried with the query parameters and exception should be raised."""
         with self.assertRaises(Exception):
             self.mock_resp = _mock_response(self, status=502, content="request timeout")
             mock_get.return_value = self.mock_resp
             makeapirequest("https://endpoint", self.token, q_param="$filter=id eq '0'")
 
-        self.assertEqual(2, mock_get.call_count)
+        self.assertEqual(4, mock_get.call_count)
+        for call in mock_get.call_args_list:
+            self.assertEqual(call.kwargs["params"], "$filter=id eq '0'")
 
     def test_makeapirequest_status_503_with_q_param(self, _, mock_get, __):
-        """The request should be made twice and exception should be raised."""
+        """The request should be retried with the query parameters and exception should be raised."""
         with self.assertRaises(Exception):
             self.mock_resp = _mock_response(self, status=503, content="request timeout")
             mock_get.return_value = self.mock_resp
             makeapirequest("https://endpoint", self.token, q_param="$filter=id eq '0'")
 
-        self.assertEqual(2, mock_get.call_count)
+        self.assertEqual(4, mock_get.call_count)
+        for call in mock_get.call_args_list:
+            self.assertEqual(call.kwargs["params"], "$filter=id eq '0'")
 
     def test_makeapirequest_status_504_with_q_param(self, _, mock_get, __):
-        """The request should be made twice and exception should be raised."""
+        """The request should be retried with the query parameters and exception should be raised."""
         with self.assertRaises(Exception):
             self.mock_resp = _mock_response(self, status=504, content="request timeout")
             mock_get.return_value = self.mock_resp
             makeapirequest("https://endpoint", self.token, q_param="$filter=id eq '0'")
 
-        self.assertEqual(2, mock_get.call_count)
+        self.assertEqual(4, mock_get.call_count)
+        for call in mock_get.call_args_list:
+            self.assertEqual(call.kwargs["params"], "$filter=id eq '0'")
 
-    def test_makeapirequest_odata_nextlink(self, _, mock_get, mock_makeapirequest):
+    def test_makeapirequest_odata_nextlink(self, _, mock_get, __):
         """The request should be made and the response should contain next link values."""
-        self.NEXT_LINK_VALUE = {"value": [{"id": "1"}]}
-        mock_makeapirequest.return_value = self.NEXT_LINK_VALUE
         self.mock_resp = _mock_response(
             self,
             status=200,
-            content='{"value": [{"id": "0"}], "@odata.nextLink": "https://endpoint"}',
+            content='{"value": [{"id": "0"}], "@odata.nextLink": "https://endpoint/next"}',
         )
-        mock_get.return_value = self.mock_resp
+        self.mock_resp2 = _mock_response(
+            self,
+            status=200,
+            content='{"value": [{"id": "1"}], "@odata.nextLink": "https://endpoint/last"}',
+        )
+        self.mock_resp3 = _mock_response(
+            self, status=200, content='{"value": [{"id": "2"}]}'
+        )
+        mock_get.side_effect = self.mock_resp, self.mock_resp2, self.mock_resp3
         self.result = makeapirequest("https://endpoint", self.token)
 
-        self.assertEqual(self.result["value"], [{"id": "0"}, {"id": "1"}])
+        self.assertEqual(
+            self.result, {"value": [{"id": "0"}, {"id": "1"}, {"id": "2"}]}
+        )
+        self.assertEqual(3, mock_get.call_count)
+        self.assertEqual(mock_get.call_args.args[1], "https://endpoint/last")
+
+    def test_iter_graph_pages(self, _, mock_get, __):
+        """Each page should be yielded and the query parameters only sent with the first request."""
+        self.mock_resp = _mock_response(
+            self,
+            status=200,
+            content='{"value": [{"id": "0"}], "@odata.nextLink": "https://endpoint/next"}',
+        )
+        self.mock_resp2 = _mock_response(
+            self, status=200, content='{"value": [{"id": "1"}]}'
+        )
+        mock_get.side_effect = self.mock_resp, self.mock_resp2
+        self.result = list(
+            iter_graph_pages("https://endpoint", self.token, q_param={"$top": "1"})
+        )
+
+        self.assertEqual(len(self.result), 2)
+        self.assertEqual(mock_get.call_args_list[0].kwargs["params"], {"$top": "1"})
+        self.assertIsNone(mock_get.call_args_list[1].kwargs["params"])
+
+    def test_iter_graph_items(self, _, mock_get, __):
+        """Each object from all pages should be yielded."""
+        self.mock_resp = _mock_response(
+            self,
+            status=200,
+            content='{"value": [{"id": "0"}], "@odata.nextLink": "https://endpoint/next"}',
+        )
+        self.mock_resp2 = _mock_response(
+            self, status=200, content='{"value": [{"id": "1"}]}'
+        )
+        mock_get.side_effect = self.mock_resp, self.mock_resp2
+        self.result = list(iter_graph_items("https://endpoint", self.token))
+
+        self.assertEqual(self.result, [{"id": "0"}, {"id": "1"}])
+
+    def test_iter_graph_items_status_404(self, _, mock_get, __):
+        """No objects should be yielded if the resource is not found."""
+        self.mock_resp = _mock_response(self, status=404, content="not found")
+        mock_get.return_value = self.mock_resp
+        self.result = list(iter_graph_items("https://endpoint", self.token))
+
+        self.assertEqual(self.result, [])
+
+    def test_iter_graph_items_next_page_404(self, _, mock_get, __):
+        """A missing next page should raise instead of returning part of the objects."""
+        self.mock_resp = _mock_response(
+            self,
+            status=200,
+            content='{"value": [{"id": "0"}], "@odata.nextLink": "https://endpoint/next"}',
+        )
+        self.mock_resp2 = _mock_response(self, status=404, content="not found")
+        mock_get.side_effect = self.mock_resp, self.mock_resp2
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            list(iter_graph_items("https://endpoint", self.token))
 
     def test_makeapirequest_status_404(self, _, mock_get, __):
         """The request should be made and the response should be returned."""
@@ -196,14 +274,50 @@ class TestGraphRequestGet(unittest.TestCase):
 
         self.assertEqual(1, mock_get.call_count)
 
+    def test_makeapirequestWithAssignments(self, _, __, mock_makeapirequest):
+        """The assignments should be expanded together with the expands in the query parameters."""
+        mock_makeapirequest.return_value = {"value": []}
+        makeapirequestWithAssignments(
+            "https://endpoint", self.token, {"$expand": "settings"}
+        )
+
+        mock_makeapirequest.assert_called_once_with(
+            "https://endpoint", self.token, {"$expand": "settings,assignments"}
+        )
+
+    def test_makeapirequestWithAssignments_not_supported(
+        self, _, __, mock_makeapirequest
+    ):
+        """The request should be made without the expand if the endpoint rejects it."""
+        mock_makeapirequest.side_effect = (
+            requests.exceptions.HTTPError("Request failed with 400"),
+            {"value": []},
+        )
+        self.result = makeapirequestWithAssignments("https://endpoint", self.token)
+
+        self.assertEqual(self.result, {"value": []})
+        self.assertEqual(
+            mock_makeapirequest.call_args_list[0].args[2], {"$expand": "assignments"}
+        )
+        self.assertIsNone(mock_makeapirequest.call_args_list[1].args[2])
+
 
 @patch("src.IntuneCD.intunecdlib.graph_request.makeapirequestPatch")
-@patch("requests.patch")
+@patch("requests.Session.request")
 class TestGraphRequestPatch(unittest.TestCase):
     """Test class for graph_request."""
 
     def setUp(self):
         self.token = {"access_token": "token"}
+        reset_buckets()
+
+    def test_makeapirequestPatch_status_503(self, mock_patch, _):
+        """A PATCH should not be sent again after a 5xx response."""
+        mock_patch.return_value = _mock_response(self, status=503, content="Error")
+        with self.assertRaises(Exception):
+            makeapirequestPatch("https://endpoint", self.token, jdata='{"id": "0"}')
+
+        self.assertEqual(1, mock_patch.call_count)
 
     def test_makeapirequestPatch_no_q_param(self, mock_patch, _):
         """The request should be made and the response should be returned."""
@@ -249,13 +363,14 @@ class TestGraphRequestPatch(unittest.TestCase):
 
 
 @patch("src.IntuneCD.intunecdlib.graph_request.makeapirequestPost")
-@patch("requests.post")
+@patch("requests.Session.request")
 @patch("time.sleep", return_value=None)
 class TestGraphRequestPost(unittest.TestCase):
     """Test class for graph_request."""
 
     def setUp(self):
         self.token = {"access_token": "token"}
+        reset_buckets()
         self.jdata = {"id": "0"}
         self.content = '{"id": "0"}'
         self.expected_result = {"id": "0"}
@@ -265,29 +380,46 @@ class TestGraphRequestPost(unittest.TestCase):
         self.mock_resp = _mock_response(
             self, status=429, content="Too Many equests", headers={"Retry-After": "10"}
         )
-        self.mock_resp2 = _mock_response(self, status=200, content="Success")
+        self.mock_resp2 = _mock_response(self, status=200, content=self.content)
         mock_patch.side_effect = self.mock_resp, self.mock_resp2
-        makeapirequestPost("https://endpoint", self.token)
+        self.result = makeapirequestPost("https://endpoint", self.token)
 
         self.assertEqual(2, mock_patch.call_count)
+        self.assertEqual(self.result, self.expected_result)
 
     def test_makeapirequestPost_status_429_with_q_param(self, _, mock_patch, __):
         """The request should be made twice."""
         self.mock_resp = _mock_response(
             self, status=429, content="Too Many Requests", headers={"Retry-After": "10"}
         )
-        self.mock_resp2 = _mock_response(self, status=200, content="Success")
+        self.mock_resp2 = _mock_response(self, status=200, content=self.content)
         mock_patch.side_effect = self.mock_resp, self.mock_resp2
-        makeapirequestPost("https://endpoint", self.token, q_param="$filter=id eq '0'")
+        self.result = makeapirequestPost(
+            "https://endpoint", self.token, q_param="$filter=id eq '0'"
+        )
 
         self.assertEqual(2, mock_patch.call_count)
+        self.assertEqual(self.result, self.expected_result)
 
     def test_makeapirequestPost_status_504_no_q_param(self, _, mock_patch, __):
         """The request should be made twice."""
         self.mock_resp = _mock_response(self, status=504, content="Error")
-        self.mock_resp2 = _mock_response(self, status=200, content="Success")
+        self.mock_resp2 = _mock_response(self, status=200, content=self.content)
         mock_patch.side_effect = self.mock_resp, self.mock_resp2
-        makeapirequestPost("https://endpoint", self.token)
+        self.result = makeapirequestPost("https://endpoint", self.token)
+
+        self.assertEqual(2, mock_patch.call_count)
+        self.assertEqual(self.result, self.expected_result)
+
+    def test_makeapirequestPost_status_503_retried_once(self, _, mock_patch, __):
+        """A POST should only be sent again once, it may already have been created."""
+        mock_patch.side_effect = (
+            _mock_response(self, status=503, content="Error"),
+            _mock_response(self, status=503, content="Error"),
+            _mock_response(self, status=200, content=self.content),
+        )
+        with self.assertRaises(Exception):
+            makeapirequestPost("https://endpoint", self.token)
 
         self.assertEqual(2, mock_patch.call_count)
 
@@ -331,12 +463,13 @@ class TestGraphRequestPost(unittest.TestCase):
 
 
 @patch("src.IntuneCD.intunecdlib.graph_request.makeapirequestPut")
-@patch("requests.put")
+@patch("requests.Session.request")
 class TestGraphRequestPut(unittest.TestCase):
     """Test class for graph_request."""
 
     def setUp(self):
         self.token = {"access_token": "token"}
+        reset_buckets()
 
     def test_makeapirequestPut_no_q_param(self, mock_patch, _):
         """The request should be made and the response should be returned."""
@@ -382,12 +515,13 @@ class TestGraphRequestPut(unittest.TestCase):
 
 
 @patch("src.IntuneCD.intunecdlib.graph_request.makeapirequestDelete")
-@patch("requests.delete")
+@patch("requests.Session.request")
 class TestGraphRequestDelete(unittest.TestCase):
     """Test class for graph_request."""
 
     def setUp(self):
         self.token = {"access_token": "token"}
+        reset_buckets()
 
     def test_makeapirequestDelete_no_q_param(self, mock_patch, _):
         """The request should be made and the response should be returned."""
@@ -433,13 +567,14 @@ class TestGraphRequestDelete(unittest.TestCase):
 
 
 @patch("src.IntuneCD.intunecdlib.graph_request.makeAuditRequest")
-@patch("requests.get")
+@patch("requests.Session.request")
 @patch("time.sleep", return_value=None)
 class TestGraphAuditRequest(unittest.TestCase):
     """Test class for graph_request."""
 
     def setUp(self):
         self.token = {"access_token": "token"}
+        reset_buckets()
 
     def test_makeAuditRequest(self, _, mock_get, __):
         """The request should be made and the response should be returned."""
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the http_client module.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from src.IntuneCD.intunecdlib import http_client
+from src.IntuneCD.intunecdlib.http_client import HttpClient, get_client
+
+
+class TestHttpClient(unittest.TestCase):
+    """Test class for http_client."""
+
+    def setUp(self):
+        self.client = HttpClient(pool_size=5)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_pool_size(self):
+        """The session adapter should use the configured pool size."""
+        adapter = self.client.session.get_adapter("https://graph.microsoft.com")
+
+        self.assertEqual(adapter._pool_connections, 5)
+        self.assertEqual(adapter._pool_maxsize, 5)
+
+    def test_headers_built_once_per_token(self):
+        """The same headers object should be returned for the same token."""
+        headers = self.client.headers("token")
+
+        self.assertIs(headers, self.client.headers("token"))
+        self.assertEqual(headers["Authorization"], "Bearer token")
+        self.assertIsNot(headers, self.client.headers("token2"))
+
+    @patch("requests.Session.request")
+    def test_request_merges_headers(self, mock_request):
+        """Extra headers should be merged with the default headers."""
+        self.client.request(
+            "GET", "https://endpoint", "token", headers={"host": "test"}
+        )
+
+        headers = mock_request.call_args.kwargs["headers"]
+        self.assertEqual(headers["Authorization"], "Bearer token")
+        self.assertEqual(headers["host"], "test")
+        self.assertNotIn("host", self.client.headers("token"))
+
+    @patch.dict("os.environ", {"HTTP_POOL_SIZE": "3"})
+    def test_get_client_shared(self):
+        """The shared client should only be created once."""
+        with patch.dict(http_client._shared, clear=True):
+            client = get_client()
+
+            self.assertIs(client, get_client())
+            self.assertEqual(client.pool_size, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
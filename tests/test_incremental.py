@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the incremental module.
+"""
+
+import json
+import os
+import unittest
+
+from testfixtures import TempDirectory
+
+from src.IntuneCD.intunecdlib.incremental import (
+    STATE_FILE,
+    BackupState,
+    get_backup_state,
+    load_backup_state,
+    save_backup_state,
+)
+
+
+class TestIncremental(unittest.TestCase):
+    """Test class for incremental."""
+
+    def setUp(self):
+        self.directory = TempDirectory()
+        self.directory.create()
+        self.path = self.directory.path
+        self.file = f"{self.path}/Settings Catalog/test.json"
+        self.data = {"name": "test", "settings": [{"id": "0"}]}
+        self.policy = {"id": "0", "lastModifiedDateTime": "2024-01-01T00:00:00Z"}
+
+        os.makedirs(f"{self.path}/Settings Catalog")
+        with open(self.file, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+
+        state = BackupState(self.path)
+        state.record(
+            "configurationPolicies", "0", "2024-01-01T00:00:00Z", self.file, self.data
+        )
+        state.save()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_unchanged(self):
+        """The saved data should be returned for an object that has not been modified."""
+        state = BackupState(self.path)
+
+        self.assertEqual(
+            state.get_unchanged("configurationPolicies", self.policy), self.data
+        )
+        self.assertTrue(
+            state.is_current("configurationPolicies", "0", self.file, self.data)
+        )
+
+    def test_modified(self):
+        """Nothing should be returned for an object that has been modified."""
+        state = BackupState(self.path)
+        self.policy["lastModifiedDateTime"] = "2024-01-02T00:00:00Z"
+
+        self.assertIsNone(state.get_unchanged("configurationPolicies", self.policy))
+        self.assertFalse(
+            state.is_current("configurationPolicies", "0", self.file, {"name": "new"})
+        )
+
+    def test_file_changed(self):
+        """Nothing should be returned if the file has been changed outside of the backup."""
+        with open(self.file, "w", encoding="utf-8") as f:
+            json.dump({"name": "changed"}, f)
+        state = BackupState(self.path)
+
+        self.assertIsNone(state.get_unchanged("configurationPolicies", self.policy))
+
+    def test_save_removes_deleted_objects(self):
+        """Objects not backed up during the run should be removed from the state."""
+        load_backup_state(self.path)
+        get_backup_state().record(
+            "configurationPolicies", "1", None, self.file, self.data
+        )
+        save_backup_state()
+
+        with open(os.path.join(self.path, STATE_FILE), encoding="utf-8") as f:
+            objects = json.load(f)
+
+        self.assertEqual(list(objects["configurationPolicies"]), ["1"])
+        self.assertEqual(
+            objects["configurationPolicies"]["1"]["file"], "Settings Catalog/test.json"
+        )
+        self.assertIsNone(get_backup_state())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the output_writer module.
+"""
+
+import os
+import threading
+import unittest
+
+from testfixtures import TempDirectory
+
+from src.IntuneCD.intunecdlib.output_writer import (
+    OutputWriter,
+    flush_output,
+    start_output_writer,
+    stop_output_writer,
+    write_output,
+)
+from src.IntuneCD.intunecdlib.save_output import save_file, save_output
+
+
+class TestOutputWriter(unittest.TestCase):
+    """Test class for output_writer."""
+
+    def setUp(self):
+        self.directory = TempDirectory()
+        self.directory.create()
+        self.path = f"{self.directory.path}/"
+
+    def tearDown(self):
+        stop_output_writer()
+        self.directory.cleanup()
+
+    def test_write_output_not_started(self):
+        """The write should be done directly if the writer is not started."""
+        self.assertEqual(write_output(lambda a, b: a + b, 1, 2), 3)
+
+    def test_write_output_started(self):
+        """The write should be done in the background and be done after flush."""
+        start_output_writer()
+        release = threading.Event()
+        done = []
+
+        def write(value):
+            release.wait(5)
+            done.append(value)
+
+        self.assertIsNone(write_output(write, "file"))
+        self.assertEqual(done, [])
+
+        release.set()
+        flush_output()
+        self.assertEqual(done, ["file"])
+
+    def test_flush_raises_error(self):
+        """An error raised by a write should be raised by flush."""
+        writer = OutputWriter()
+
+        def write():
+            raise OSError("disk full")
+
+        writer.submit(write)
+        with self.assertRaises(OSError):
+            writer.flush()
+
+        # The error is only raised once
+        writer.flush()
+        writer.close()
+
+    def test_flush_after_other_error(self):
+        """The writer should keep writing after a write raised any other error."""
+        writer = OutputWriter()
+        done = []
+
+        def write():
+            raise TypeError("not serializable")
+
+        writer.submit(write)
+        with self.assertRaises(TypeError):
+            writer.flush()
+
+        writer.submit(done.append, "file")
+        writer.flush()
+        self.assertEqual(done, ["file"])
+        writer.close()
+
+    def test_save_output_started(self):
+        """Files saved while the writer is started should be written after flush."""
+        start_output_writer()
+        save_output("json", f"{self.path}Profiles/", "profile", {"id": "0"})
+        save_file(f"{self.path}Profiles/Script Data/script.ps1", "Write-Host")
+        flush_output()
+
+        self.assertTrue(os.path.exists(f"{self.path}Profiles/profile.json"))
+        with open(
+            f"{self.path}Profiles/Script Data/script.ps1", "r", encoding="utf-8"
+        ) as f:
+            self.assertEqual(f.read(), "Write-Host")
+
+    def test_save_file_crlf(self):
+        """Files with CRLF line endings should be unchanged when saved again."""
+        file = f"{self.path}Script Data/script.ps1"
+        content = "Write-Host hi\r\nexit 0\r\n"
+
+        self.assertTrue(save_file(file, content))
+        self.assertFalse(save_file(file, content))
+        with open(file, "rb") as f:
+            self.assertEqual(
+                f.read(), content.replace("\n", os.linesep).encode("utf-8")
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
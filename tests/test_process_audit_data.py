@@ -1,14 +1,13 @@
 # -*- coding: utf-8 -*-
 import unittest
-from unittest.mock import patch
+from unittest.mock import mock_open, patch
 
 from src.IntuneCD.intunecdlib.process_audit_data import (
+    AuditCommits,
     _check_if_git_repo,
-    _configure_git,
+    _fast_import_stream,
     _get_payload_from_audit_data,
-    _git_check_modified,
-    _git_check_new_file,
-    _git_commit_changes,
+    _git_changed_files,
     _git_installed,
     process_audit_data,
 )
@@ -19,20 +18,6 @@ class TestProcessAuditData(unittest.TestCase):
     Test process audit data
     """
 
-    @patch("src.IntuneCD.intunecdlib.process_audit_data.subprocess.run")
-    def test_configure_git(self, mock_run):
-        """
-        Test configure git
-        """
-        self.record = {
-            "activityDateTime": "2021-05-25T20:00:00Z",
-            "activityResourceType": "test",
-            "userPrincipalName": "test",
-            "actor": "test",
-        }
-        mock_run.return_value.returncode = 0
-        self.assertIsNone(_configure_git(self.record, "path"))
-
     @patch("src.IntuneCD.intunecdlib.process_audit_data.subprocess.run")
     def test_git_installed(self, mock_run):
         """
@@ -55,47 +40,6 @@ class TestProcessAuditData(unittest.TestCase):
         mock_run.return_value.stdout = "false"
         self.assertFalse(_check_if_git_repo("path", "file"))
 
-    @patch("src.IntuneCD.intunecdlib.process_audit_data.subprocess.run")
-    def test_git_check_modified(self, mock_run):
-        """
-        Test git check modified
-        """
-        mock_run.return_value.stdout = "modified"
-        self.assertTrue(_git_check_modified("path", "file"))
-
-        mock_run.return_value.stdout = ""
-        self.assertFalse(_git_check_modified("path", "file"))
-
-    @patch("src.IntuneCD.intunecdlib.process_audit_data.subprocess.run")
-    def test_git_check_new_file(self, mock_run):
-        """
-        Test git check new file
-        """
-        mock_run.return_value.stderr = "did not match any file(s) known to git"
-        self.assertTrue(_git_check_new_file("path", "file"))
-
-        mock_run.return_value.stderr = ""
-        self.assertFalse(_git_check_new_file("path", "file"))
-
-    @patch("src.IntuneCD.intunecdlib.process_audit_data.subprocess.run")
-    def test_git_commit_changes(self, mock_run):
-        """
-        Test git commit changes
-        """
-        mock_run.return_value.returncode = 0
-        self.record = {
-            "activityDateTime": "2021-05-25T20:00:00Z",
-            "auditResourceType": "test",
-            "userPrincipalName": "test",
-            "actor": "test",
-            "activityOperationType": "test",
-            "activityResult": "test",
-        }
-        self.assertIsNone(_git_commit_changes(self.record, "path", "file"))
-
-        mock_run.return_value.returncode = 1
-        self.assertIsNone(_git_commit_changes(self.record, "path", "file"))
-
     def test_get_payload_from_audit_data(self):
         """
         Test get payload from audit data
@@ -116,79 +60,158 @@ class TestProcessAuditData(unittest.TestCase):
             _get_payload_from_audit_data(self.record, self.compare_data)
         )
 
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._check_if_git_repo")
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._configure_git")
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._git_installed")
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._get_payload_from_audit_data")
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._git_check_modified")
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._git_commit_changes")
-    def test_process_audit_data(
+    @patch("src.IntuneCD.intunecdlib.process_audit_data.subprocess.run")
+    def test_git_changed_files(self, mock_run):
+        """
+        Test git changed files
+        """
+        mock_run.return_value.returncode = 0
+        mock_run.return_value.stdout = (
+            " M a.json\0?? Device Configurations/b c.json\0R  d.json\0e.json\0"
+        )
+
+        self.assertEqual(
+            _git_changed_files("/repo", "/repo/backup"),
+            {"a.json", "Device Configurations/b c.json", "d.json"},
+        )
+        self.assertEqual(mock_run.call_args.args[0][-2:], ["--", "backup"])
+
+    @patch("src.IntuneCD.intunecdlib.process_audit_data.subprocess.run")
+    def test_git_changed_files_failed(self, mock_run):
+        """
+        Test git changed files when git status fails
+        """
+        mock_run.return_value.returncode = 128
+        mock_run.return_value.stderr = "fatal: error"
+
+        self.assertIsNone(_git_changed_files("/repo", "/repo/backup"))
+
+    def test_fast_import_stream(self):
+        """
+        Test fast import stream
+        """
+        self.record = {
+            "activityDateTime": "2021-05-25T20:00:00.1234567Z",
+            "auditResourceType": "test",
+            "actor": "test",
+            "activityOperationType": "Patch",
+            "activityResult": "Success",
+        }
+        stream = _fast_import_stream(
+            "refs/heads/main",
+            "abc",
+            [("a.json", b"{}", self.record), ("b.json", b"[]", self.record)],
+        ).decode("utf-8")
+
+        self.assertEqual(stream.count("commit refs/heads/main\n"), 2)
+        self.assertEqual(stream.count("from abc\n"), 1)
+        self.assertIn("author test <test> 1621972800 +0000\n", stream)
+        self.assertIn('M 100644 inline "a.json"\ndata 2\n{}\n', stream)
+        self.assertTrue(stream.endswith("done\n"))
+
+    @patch("src.IntuneCD.intunecdlib.process_audit_data.subprocess.run")
+    @patch("src.IntuneCD.intunecdlib.process_audit_data._git_reset_files")
+    @patch("src.IntuneCD.intunecdlib.process_audit_data._git_changed_files")
+    @patch("src.IntuneCD.intunecdlib.process_audit_data._git_run")
+    def test_audit_commits(
         self,
-        mock_get_payload_from_audit_data,
-        mock_git_installed,
-        mock_configure_git,
-        mock_check_if_git_repo,
-        mock_git_check_modified,
-        _,
+        mock_git_run,
+        mock_git_changed_files,
+        mock_git_reset_files,
+        mock_run,
     ):
         """
-        Test process audit data
+        Test audit commits, only changed files should be committed in one fast-import
         """
-        mock_get_payload_from_audit_data.return_value = {
+        mock_git_run.side_effect = ["/repo", "refs/heads/main", "abc"]
+        mock_git_changed_files.return_value = {"a.json"}
+        mock_run.return_value.returncode = 0
+        self.record = {
             "activityDateTime": "2021-05-25T20:00:00Z",
-            "userPrincipalName": "test",
+            "auditResourceType": "test",
             "actor": "test",
-            "activityOperationType": "test",
-            "activityResult": "test",
-            "test": "test",
+            "activityOperationType": "Patch",
+            "activityResult": "Success",
         }
-        mock_git_installed.return_value = True
-        mock_check_if_git_repo.return_value = True
-        self.assertIsNone(
-            process_audit_data("audit_data", "compare_data", "path", "file")
-        )
 
-        mock_git_installed.return_value = False
-        self.assertIsNone(
-            process_audit_data("audit_data", "compare_data", "path", "file")
+        commits = AuditCommits()
+        commits.add("/repo", "/repo/a.json", self.record)
+        commits.add("/repo", "/repo/b.json", self.record)
+        with patch("builtins.open", mock_open(read_data=b"{}")):
+            commits.commit()
+
+        mock_git_changed_files.assert_called_once_with("/repo", "/repo")
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(
+            mock_run.call_args.args[0],
+            ["git", "-C", "/repo", "fast-import", "--quiet", "--done"],
         )
+        self.assertEqual(mock_run.call_args.kwargs["input"].count(b"commit "), 1)
+        mock_git_reset_files.assert_called_once_with("/repo", ["a.json"])
+        self.assertEqual(commits.changes, {})
 
+    @patch("src.IntuneCD.intunecdlib.process_audit_data._git_installed")
+    @patch("src.IntuneCD.intunecdlib.process_audit_data._check_if_git_repo")
+    def test_audit_commits_is_repo(self, mock_check_if_git_repo, mock_git_installed):
+        """
+        Test audit commits checks the repo once for each path
+        """
+        mock_check_if_git_repo.return_value = True
         mock_git_installed.return_value = True
+
+        commits = AuditCommits()
+        self.assertTrue(commits.is_repo("path"))
+        self.assertTrue(commits.is_repo("path"))
+        self.assertEqual(mock_check_if_git_repo.call_count, 1)
+
         mock_check_if_git_repo.return_value = False
+        self.assertFalse(commits.is_repo("other"))
+
+    @patch("src.IntuneCD.intunecdlib.process_audit_data._commits")
+    def test_process_audit_data(self, mock_commits):
+        """
+        Test process audit data, the file should be added to the commits
+        """
+        mock_commits.is_repo.return_value = True
+        self.audit_data = [
+            {
+                "resourceId": "0",
+                "auditResourceType": "test",
+                "actor": "test",
+                "activityDateTime": "2021-05-25T20:00:00Z",
+                "activityOperationType": "Patch",
+                "activityResult": "Success",
+            }
+        ]
         self.assertIsNone(
-            process_audit_data("audit_data", "compare_data", "path", "file")
+            process_audit_data(
+                self.audit_data, {"type": "resourceId", "value": "0"}, "path", "file"
+            )
         )
+        mock_commits.add.assert_called_once_with("path", "file", self.audit_data[0])
 
-        mock_git_installed.return_value = True
-        mock_check_if_git_repo.return_value = True
-        mock_configure_git.return_value = None
-        mock_git_check_modified.return_value = "yes"
-
+    @patch("src.IntuneCD.intunecdlib.process_audit_data._commits")
+    def test_process_audit_data_no_record(self, mock_commits):
+        """
+        Test process audit data no records
+        """
+        mock_commits.is_repo.return_value = True
         self.assertFalse(
-            process_audit_data("audit_data", "compare_data", "path", "file")
+            process_audit_data([], {"type": "resourceId", "value": "0"}, "path", "file")
         )
+        mock_commits.add.assert_not_called()
 
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._check_if_git_repo")
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._configure_git")
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._git_installed")
-    @patch("src.IntuneCD.intunecdlib.process_audit_data._get_payload_from_audit_data")
-    def test_process_audit_data_no_record(
-        self,
-        mock_get_payload_from_audit_data,
-        mock_git_installed,
-        _,
-        mock_check_if_git_repo,
-    ):
+    @patch("src.IntuneCD.intunecdlib.process_audit_data._commits")
+    def test_process_audit_data_not_git_repo(self, mock_commits):
         """
-        Test process audit data no records
+        Test process audit data when the path is not a git repo
         """
-        mock_get_payload_from_audit_data.return_value = {}
-        mock_git_installed.return_value = True
-        mock_check_if_git_repo.return_value = True
+        mock_commits.is_repo.return_value = False
 
-        self.assertFalse(
-            process_audit_data("audit_data", "compare_data", "path", "file")
+        self.assertIsNone(
+            process_audit_data([], {"type": "resourceId", "value": "0"}, "path", "file")
         )
+        mock_commits.add.assert_not_called()
 
 
 if __name__ == "__main__":
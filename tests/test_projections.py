@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the projections module.
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+from src.IntuneCD.intunecdlib.projections import select_param, select_query
+
+
+class TestProjections(unittest.TestCase):
+    """Test class for projections."""
+
+    def test_select(self):
+        """The properties of the projection should be selected."""
+        self.assertEqual(select_param("apps"), {"$select": "id,displayName"})
+        self.assertEqual(select_query("apps"), "?$select=id,displayName")
+
+    def test_select_unknown_projection(self):
+        """The full object should be requested when there is no projection."""
+        self.assertIsNone(select_param("unknown"))
+        self.assertEqual(select_query("unknown"), "")
+
+    @patch.dict(os.environ, {"FULL_PAYLOAD": "True"})
+    def test_select_full_payload(self):
+        """The full object should be requested when FULL_PAYLOAD is set."""
+        self.assertIsNone(select_param("apps"))
+        self.assertEqual(select_query("apps"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
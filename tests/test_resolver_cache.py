@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the resolver_cache module.
+"""
+
+import unittest
+from unittest import mock
+
+from src.IntuneCD.intunecdlib.resolver_cache import (
+    ResolverCache,
+    get_cache,
+    get_cache_stats,
+    reset_caches,
+)
+
+
+class TestResolverCache(unittest.TestCase):
+    """Test class for resolver_cache."""
+
+    def setUp(self):
+        reset_caches()
+        self.cache = ResolverCache("groups")
+        self.fetch = mock.Mock(
+            side_effect=lambda ids: [
+                {"id": i, "displayName": f"group {i}"} for i in ids
+            ]
+        )
+
+    def test_resolve_deduplicates(self):
+        """Duplicate IDs should only be fetched once."""
+        result = self.cache.resolve(["0", "1", "0", None], self.fetch)
+
+        self.fetch.assert_called_once_with(["0", "1"])
+        self.assertEqual(result["0"]["displayName"], "group 0")
+        self.assertEqual(list(result), ["0", "1"])
+
+    def test_resolve_cached(self):
+        """Cached IDs should not be fetched again."""
+        self.cache.resolve(["0"], self.fetch)
+        result = self.cache.resolve(["0", "1"], self.fetch)
+
+        self.assertEqual(self.fetch.call_args_list[1].args[0], ["1"])
+        self.assertEqual(list(result), ["0", "1"])
+        self.assertEqual(self.cache.stats, {"hits": 1, "misses": 2})
+
+    def test_resolve_missing(self):
+        """IDs that could not be resolved should be cached and left out of the result."""
+        fetch = mock.Mock(return_value=[])
+
+        self.assertEqual(self.cache.resolve(["0"], fetch), {})
+        self.assertEqual(self.cache.resolve(["0"], fetch), {})
+        fetch.assert_called_once()
+
+    def test_preload(self):
+        """Only the first preload should fetch, later resolves should hit the loaded objects."""
+        fetch_all = mock.Mock(return_value=[{"id": "0", "displayName": "group 0"}])
+
+        self.cache.preload(fetch_all)
+        self.cache.preload(fetch_all)
+        result = self.cache.resolve(["0"], self.fetch)
+
+        fetch_all.assert_called_once()
+        self.fetch.assert_not_called()
+        self.assertEqual(result["0"]["displayName"], "group 0")
+
+    def test_add(self):
+        """Added objects should be resolved without fetching."""
+        self.cache.add([{"id": "0", "displayName": "group 0"}])
+        result = self.cache.resolve(["0", "1"], self.fetch)
+
+        self.fetch.assert_called_once_with(["1"])
+        self.assertEqual(result["0"]["displayName"], "group 0")
+
+    def test_get_cache_shared(self):
+        """The same cache should be returned for the same name until it is reset."""
+        cache = get_cache("filters")
+
+        self.assertIs(cache, get_cache("filters"))
+        self.assertIn("filters", get_cache_stats())
+
+        reset_caches()
+        self.assertIsNot(cache, get_cache("filters"))
+
+
+if __name__ == "__main__":
+    unittest.main()
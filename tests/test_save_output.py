@@ -6,13 +6,18 @@ This module tests the save_output function with a JSON file.
 """
 
 import json
+import os
 import unittest
 from unittest.mock import patch
 
 import yaml
 from testfixtures import TempDirectory
 
-from src.IntuneCD.intunecdlib.save_output import save_output
+from src.IntuneCD.intunecdlib.save_output import (
+    get_output_stats,
+    reset_output_stats,
+    save_output,
+)
 
 
 @patch("src.IntuneCD.intunecdlib.save_output")
@@ -26,6 +31,7 @@ class TestSaveOutput(unittest.TestCase):
         self.fname = "file_name"
         self.data = {"test_content": "Hello World"}
         self.expected_data = {"test_content": "Hello World"}
+        reset_output_stats()
 
     def tearDown(self):
         self.directory.cleanup()
@@ -49,6 +55,42 @@ class TestSaveOutput(unittest.TestCase):
 
         self.assertEqual(self.yaml["test_content"], self.expected_data["test_content"])
 
+    def test_save_output_unchanged(self, _):
+        """The file should not be written again if the content is the same."""
+        self.assertTrue(save_output("json", self.path, self.fname, self.data))
+        file = self.path + self.fname + ".json"
+        os.utime(file, (0, 0))
+
+        self.assertFalse(save_output("json", self.path, self.fname, self.data))
+        self.assertEqual(os.path.getmtime(file), 0)
+        self.assertEqual(get_output_stats(), {"written": 1, "unchanged": 1})
+
+    def test_save_output_changed(self, _):
+        """The file should be replaced if the content has changed."""
+        save_output("yaml", self.path, self.fname, self.data)
+        self.assertTrue(
+            save_output("yaml", self.path, self.fname, {"test_content": "changed"})
+        )
+
+        with open(self.path + self.fname + ".yaml", "r", encoding="utf-8") as f:
+            self.assertEqual(yaml.safe_load(f), {"test_content": "changed"})
+        self.assertEqual(os.listdir(self.path), [self.fname + ".yaml"])
+        self.assertEqual(get_output_stats(), {"written": 2, "unchanged": 0})
+
+    def test_save_output_windows_line_endings(self, _):
+        """The file should have CRLF line endings on Windows and be unchanged when saved again."""
+        file = self.path + self.fname + ".json"
+        with patch.object(os, "linesep", "\r\n"):
+            self.assertTrue(save_output("json", self.path, self.fname, self.data))
+            self.assertFalse(save_output("json", self.path, self.fname, self.data))
+
+        with open(file, "rb") as f:
+            content = f.read()
+        self.assertEqual(
+            content,
+            json.dumps(self.data, indent=5).replace("\n", "\r\n").encode("utf-8"),
+        )
+
     def test_save_output_invalid_format(self, _):
         """The function should raise an error if the format is invalid."""
         with self.assertRaises(ValueError):
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the serializer module.
+"""
+
+import io
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import yaml
+
+from src.IntuneCD.intunecdlib.serializer import (
+    dump_json,
+    dump_yaml,
+    load_json,
+    load_yaml,
+)
+
+
+class TestSerializer(unittest.TestCase):
+    """Test class for serializer."""
+
+    def setUp(self):
+        self.data = {
+            "displayName": "é test",
+            "description": "line one\nline two " + "word " * 30,
+            "settings": [{"yes": True, "value": None}, 1, 1.5],
+        }
+
+    def test_dump_json(self):
+        """The JSON should be the same as the standard library with an indent of 5."""
+        self.assertEqual(dump_json(self.data), json.dumps(self.data, indent=5))
+
+    def test_dump_yaml(self):
+        """The YAML should be the same as yaml.dump."""
+        self.assertEqual(
+            dump_yaml(self.data),
+            yaml.dump(self.data, sort_keys=False, default_flow_style=False),
+        )
+
+    def test_load_json(self):
+        """The loaded JSON should be the same as the saved data."""
+        self.assertEqual(load_json(io.StringIO(dump_json(self.data))), self.data)
+
+    def test_load_json_orjson_error(self):
+        """JSON orjson can not load should be loaded with the standard library."""
+        orjson = Mock()
+        orjson.JSONDecodeError = ValueError
+        orjson.loads.side_effect = ValueError
+
+        with patch("src.IntuneCD.intunecdlib.serializer.orjson", orjson):
+            self.assertEqual(load_json(io.StringIO('{"value": 1}')), {"value": 1})
+
+        orjson.loads.assert_called_once_with('{"value": 1}')
+
+    def test_load_yaml(self):
+        """The loaded YAML should be the same as the saved data."""
+        self.assertEqual(load_yaml(io.StringIO(dump_yaml(self.data))), self.data)
+
+    def test_load_yaml_keys(self):
+        """Keys that are not strings should be converted the way JSON would."""
+        self.assertEqual(
+            load_yaml(io.StringIO("1.5: a\ntrue: b\n~: c\nnested:\n- 2: d\n")),
+            {"1.5": "a", "true": "b", "null": "c", "nested": [{"2": "d"}]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
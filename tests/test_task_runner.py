@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the task_runner module.
+"""
+
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+from src.IntuneCD.intunecdlib.task_runner import TaskRunner, submit_in_task
+
+
+class TestTaskRunner(unittest.TestCase):
+    """Test class for task_runner."""
+
+    def setUp(self):
+        self.old_stdout = sys.stdout
+        sys.stdout = self.stdout = StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.old_stdout
+
+    def _add_tasks(self, runner, order):
+        def module(name, scope_tags):
+            order.append(name)
+            print(f"Backing up {name}")
+            print(f"Done with {name} {scope_tags}")
+            return {"config_count": len(name)}
+
+        runner.add(
+            "scope_tags", lambda: order.append("scope_tags") or ["0"], collect=False
+        )
+        for name in ("a", "bb", "ccc", "dddd"):
+            runner.add(name, module, name, depends_on=["scope_tags"])
+        runner.add("autopilot", lambda: order.append("autopilot"), collect=False)
+
+    def test_run_sequential(self):
+        """With one worker the tasks should run in the order they were added."""
+        order = []
+        runner = TaskRunner(1)
+        self._add_tasks(runner, order)
+
+        result = runner.run()
+
+        self.assertEqual(order, ["scope_tags", "a", "bb", "ccc", "dddd", "autopilot"])
+        self.assertEqual([r["config_count"] for r in result], [1, 2, 3, 4])
+
+    def test_run_concurrent(self):
+        """With more workers the results and the output should be grouped per task."""
+        order = []
+        runner = TaskRunner(4)
+        self._add_tasks(runner, order)
+
+        result = runner.run()
+
+        self.assertEqual(order[0], "scope_tags")
+        self.assertEqual([r["config_count"] for r in result], [1, 2, 3, 4])
+        self.assertIs(sys.stdout, self.stdout)
+        lines = self.stdout.getvalue().splitlines()
+        for name in ("a", "bb", "ccc", "dddd"):
+            index = lines.index(f"Backing up {name}")
+            self.assertEqual(lines[index + 1], f"Done with {name} ['0']")
+
+    def test_run_concurrent_submitted_threads(self):
+        """Output of threads submitted by a task should be grouped with the task."""
+        barrier = threading.Barrier(4)
+
+        def work(name, part):
+            # All threads of both tasks print at the same time
+            barrier.wait(5)
+            print(f"{name} {part}")
+
+        def module(name):
+            print(f"Backing up {name}")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                for future in [
+                    submit_in_task(executor, work, name, part) for part in (1, 2)
+                ]:
+                    future.result()
+            print(f"Done with {name}")
+
+        runner = TaskRunner(2)
+        runner.add("a", module, "a")
+        runner.add("b", module, "b")
+
+        runner.run()
+
+        lines = self.stdout.getvalue().splitlines()
+        for name in ("a", "b"):
+            index = lines.index(f"Backing up {name}")
+            self.assertEqual(
+                sorted(lines[index + 1 : index + 3]), [f"{name} 1", f"{name} 2"]
+            )
+            self.assertEqual(lines[index + 3], f"Done with {name}")
+
+    def test_run_concurrent_dependency(self):
+        """A task should not start before its dependencies are done."""
+        started = threading.Event()
+        order = []
+
+        def slow():
+            started.wait(1)
+            order.append("slow")
+            return "slow result"
+
+        def dependent(slow):
+            order.append(slow)
+
+        runner = TaskRunner(3)
+        runner.add("slow", slow)
+        runner.add("dependent", dependent, depends_on=["slow"])
+        runner.add("other", started.set)
+
+        runner.run()
+
+        self.assertEqual(order, ["slow", "slow result"])
+
+    def test_run_concurrent_error(self):
+        """An error in a task should be raised by run."""
+
+        def fail():
+            raise ValueError("failed")
+
+        runner = TaskRunner(2)
+        runner.add("fail", fail)
+
+        with self.assertRaises(ValueError):
+            runner.run()
+        self.assertIs(sys.stdout, self.stdout)
+
+    def test_add_unknown_dependency(self):
+        """Dependencies should be added before the tasks that depend on them."""
+        runner = TaskRunner(2)
+
+        with self.assertRaises(ValueError):
+            runner.add("a", print, depends_on=["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the throttling module.
+"""
+
+import unittest
+from unittest import mock
+from unittest.mock import patch
+
+from src.IntuneCD.intunecdlib.throttling import (
+    MAX_RETRIES,
+    backoff_delay,
+    get_bucket,
+    get_max_retries,
+    get_service,
+    get_throttle_stats,
+    reset_buckets,
+    send_with_retry,
+)
+
+
+def _mock_response(status=200, headers=None):
+    """Mock the response from the requests library."""
+    mock_resp = mock.Mock()
+    mock_resp.status_code = status
+    mock_resp.headers = headers or {}
+
+    return mock_resp
+
+
+@patch("time.sleep", return_value=None)
+class TestThrottling(unittest.TestCase):
+    """Test class for throttling."""
+
+    def setUp(self):
+        reset_buckets()
+        self.endpoint = "https://graph.microsoft.com/beta/deviceManagement/test"
+
+    def test_get_service(self, _):
+        """The endpoint should be matched to the correct service."""
+        self.assertEqual(get_service(self.endpoint), "intune")
+        self.assertEqual(get_service("deviceAppManagement/mobileApps/0"), "intune")
+        self.assertEqual(get_service("groups/0"), "entra")
+        self.assertEqual(
+            get_service("https://graph.microsoft.com/beta/policies/test"), "entra"
+        )
+        self.assertEqual(
+            get_service("https://main.iam.ad.ext.azure.com/api/test"), "azure"
+        )
+
+    def test_backoff_delay(self, _):
+        """The delay should grow exponentially and be capped."""
+        self.assertTrue(1 <= backoff_delay(0) <= 2)
+        self.assertTrue(8 <= backoff_delay(3) <= 16)
+        self.assertTrue(backoff_delay(20) <= 60)
+
+    def test_send_with_retry_server_error(self, mock_sleep):
+        """5xx responses should be retried with backoff until the retries are used up."""
+        send = mock.Mock(return_value=_mock_response(503))
+
+        response = send_with_retry(self.endpoint, send)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(send.call_count, MAX_RETRIES + 1)
+        self.assertEqual(get_throttle_stats()["intune"]["retries"], MAX_RETRIES)
+        self.assertEqual(
+            get_throttle_stats()["intune"]["server_errors"], MAX_RETRIES + 1
+        )
+
+    def test_send_with_retry_retry_after(self, mock_sleep):
+        """Retry-After should pause the shared bucket for the service."""
+        send = mock.Mock(
+            side_effect=(
+                _mock_response(429, {"Retry-After": "30"}),
+                _mock_response(200),
+            )
+        )
+
+        response = send_with_retry(self.endpoint, send)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(send.call_count, 2)
+        self.assertTrue(mock_sleep.call_args.args[0] > 29)
+        self.assertEqual(get_throttle_stats()["intune"]["throttled"], 1)
+
+    def test_pause_is_shared(self, mock_sleep):
+        """A pause in a bucket should hold back the next request to the same service only."""
+        get_bucket("intune").pause(30)
+
+        get_bucket("entra").acquire()
+        mock_sleep.assert_not_called()
+
+        get_bucket("intune").acquire()
+        self.assertTrue(mock_sleep.call_args.args[0] > 29)
+
+    def test_get_max_retries(self, _):
+        """Only reads should be retried on 5xx responses, a POST is retried once."""
+        self.assertEqual(get_max_retries("GET"), MAX_RETRIES)
+        self.assertEqual(get_max_retries("DELETE"), MAX_RETRIES)
+        self.assertEqual(get_max_retries("POST"), 1)
+        self.assertEqual(get_max_retries("PATCH"), 0)
+        self.assertEqual(get_max_retries("PUT"), 0)
+
+    def test_send_with_retry_write_throttled(self, mock_sleep):
+        """429 responses should be retried even if 5xx responses are not."""
+        send = mock.Mock(
+            side_effect=(
+                _mock_response(429, {"Retry-After": "1"}),
+                _mock_response(503),
+            )
+        )
+
+        response = send_with_retry(self.endpoint, send, max_retries=0)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(send.call_count, 2)
+
+    def test_send_with_retry_no_retry(self, mock_sleep):
+        """Other status codes should not be retried."""
+        send = mock.Mock(return_value=_mock_response(400))
+
+        response = send_with_retry(self.endpoint, send)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(send.call_count, 1)
+        mock_sleep.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()